@@ -0,0 +1 @@
+'''Skrypty pomiarowe kursu (uruchamiane przez python -m benchmarki.<nazwa>)'''
@@ -0,0 +1,102 @@
+'''Porównanie raportu "Powierzchnia w czasie": podzapytanie skorelowane vs zestawienie miesięczne
+
+Uruchomienie z katalogu głównego kursu:
+    python -m benchmarki.powierzchnia_w_czasie --rozmiary 10000 100000 1000000
+'''
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from narzedzia.baza_cwiczenia import SCHEMAT, ZAPYTANIE_POWIERZCHNIA_W_CZASIE
+
+# Pierwotne zapytanie z lekcji 6 (przed wprowadzeniem pola_miesiecznie)
+ZAPYTANIE_SKORELOWANE = """
+    SELECT strftime('%Y-%m', created_at) as miesiac,
+           SUM(powierzchnia) as nowa_powierzchnia,
+           (SELECT SUM(powierzchnia)
+            FROM pola p2
+            WHERE strftime('%Y-%m', p2.created_at) <= strftime('%Y-%m', p1.created_at)
+           ) as laczna_powierzchnia
+    FROM pola p1
+    GROUP BY strftime('%Y-%m', created_at)
+    ORDER BY miesiac
+"""
+
+GLEBY = ['gliniasta', 'piaszczysta', 'ilasta', 'torfiasta']
+
+
+def _wiersze(n: int, miesiace: int, ziarno: int = 42):
+    rng = np.random.default_rng(ziarno)
+    powierzchnie = rng.uniform(0.5, 50.0, n).round(2)
+    gleby = rng.integers(0, len(GLEBY), n)
+    plony = rng.uniform(4.0, 12.0, n).round(2)
+    dni = np.sort(rng.integers(0, miesiace * 30, n))
+    daty = (np.datetime64('2015-01-01') + dni.astype('timedelta64[D]')).astype(str)
+    for i in range(n):
+        yield (f"Pole {i}", float(powierzchnie[i]), GLEBY[gleby[i]], float(plony[i]), f"{daty[i]} 12:00:00")
+
+
+def _czas(funkcja, powtorzenia: int) -> float:
+    '''Najlepszy czas z kilku powtórzeń [s]'''
+    wyniki = []
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        funkcja()
+        wyniki.append(time.perf_counter() - start)
+    return min(wyniki)
+
+
+def zmierz(n: int, miesiace: int, powtorzenia: int, limit_skorelowanego: int) -> dict:
+    with tempfile.TemporaryDirectory() as katalog:
+        conn = sqlite3.connect(Path(katalog) / "benchmark.db")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(SCHEMAT)
+
+        start = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO pola (nazwa, powierzchnia, gleba, plon_ubiegloroczny, created_at) VALUES (?, ?, ?, ?, ?)",
+                _wiersze(n, miesiace)
+            )
+        wstawianie = time.perf_counter() - start
+
+        nowe = conn.execute(ZAPYTANIE_POWIERZCHNIA_W_CZASIE).fetchall()
+        wynik = {
+            "wiersze": n,
+            "wstawianie_s": wstawianie,
+            "zestawienie_s": _czas(lambda: conn.execute(ZAPYTANIE_POWIERZCHNIA_W_CZASIE).fetchall(), powtorzenia),
+            "skorelowane_s": None,
+        }
+        if n <= limit_skorelowanego:
+            stare = conn.execute(ZAPYTANIE_SKORELOWANE).fetchall()
+            assert [m for m, *_ in stare] == [m for m, *_ in nowe]
+            assert np.allclose([r[1:] for r in stare], [r[1:] for r in nowe])
+            wynik["skorelowane_s"] = _czas(lambda: conn.execute(ZAPYTANIE_SKORELOWANE).fetchall(), powtorzenia)
+        conn.close()
+        return wynik
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rozmiary", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--miesiace", type=int, default=120, help="zakres dat created_at w miesiącach")
+    parser.add_argument("--powtorzenia", type=int, default=3)
+    parser.add_argument("--limit-skorelowanego", type=int, default=1_000_000,
+                        help="powyżej tej liczby wierszy pomijamy wolne zapytanie skorelowane")
+    argumenty = parser.parse_args()
+
+    print(f"{'wiersze':>10} {'wstawianie':>12} {'skorelowane':>13} {'zestawienie':>13} {'przyspieszenie':>15}")
+    for n in argumenty.rozmiary:
+        w = zmierz(n, argumenty.miesiace, argumenty.powtorzenia, argumenty.limit_skorelowanego)
+        skorelowane = f"{w['skorelowane_s']:.4f} s" if w['skorelowane_s'] is not None else "pominięte"
+        przyspieszenie = f"{w['skorelowane_s'] / w['zestawienie_s']:.0f}x" if w['skorelowane_s'] else "-"
+        print(f"{n:>10,} {w['wstawianie_s']:>10.2f} s {skorelowane:>13} {w['zestawienie_s']:>11.5f} s {przyspieszenie:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from io import StringIO
 import sys
-from contextlib import redirect_stdout
-import unittest
+
+from narzedzia.ocenianie import ocen_zgloszenie, zarejestruj_testy
+from narzedzia.widoki import pokaz_wynik_oceny
 
 # ========== CZĘŚĆ 1: TEORIA (Corey Schafer style) ==========
 def teoria():
@@ -101,6 +101,39 @@ rodzaj_gleby = "{user_gleba}"
                 st.error(f"❌ Błąd: {e}")
 
 # ========== CZĘŚĆ 3: MINI-PROJEKT Z TESTAMI (ArjanCodes style) ==========
+TESTY_POLE_UPRAWNE = """
+import unittest
+
+class TestPoleUprawne(unittest.TestCase):
+    def setUp(self):
+        self.pole = PoleUprawne("Testowe", 5.0, "Gliniasta", 8.5)
+    
+    def test_szacowany_plon(self):
+        # Test obliczeń
+        expected = 5.0 * 8.5  # 42.5
+        result = self.pole.szacowany_plon()
+        self.assertAlmostEqual(result, expected, places=2,
+                             msg=f"Oczekiwano {expected}, otrzymano {result}")
+    
+    def test_czy_opłacalne(self):
+        # Test opłacalności
+        self.pole.powierzchnia = 10.0
+        self.pole.plon_standardowy = 8.0
+        # Przychód: 10 * 8 * 800 = 64,000
+        # Próg: 20,000 * 1.5 = 30,000
+        self.assertTrue(self.pole.czy_opłacalne(20000),
+                       "Powinno być opłacalne")
+        self.assertFalse(self.pole.czy_opłacalne(50000),
+                        "Nie powinno być opłacalne")
+    
+    def test_reprezentacja(self):
+        # Test metody __str__
+        result = str(self.pole)
+        self.assertIn("Pole:", result)
+        self.assertIn("Testowe", result)
+"""
+zarejestruj_testy(TESTY_POLE_UPRAWNE)
+
 def mini_projekt_z_testami():
     st.subheader("🚀 **Mini-projekt z testami jednostkowymi** (jak u ArjanCodes)")
     
@@ -141,75 +174,10 @@ def mini_projekt_z_testami():
     )
     
     if st.button("🧪 **Uruchom testy jednostkowe**", key="testy_button"):
-        # Utworzenie pliku testowego w pamięci
-        test_code = f"""
-import unittest
-
-{kod_projektu}
-
-class TestPoleUprawne(unittest.TestCase):
-    def setUp(self):
-        self.pole = PoleUprawne("Testowe", 5.0, "Gliniasta", 8.5)
-    
-    def test_szacowany_plon(self):
-        # Test obliczeń
-        expected = 5.0 * 8.5  # 42.5
-        result = self.pole.szacowany_plon()
-        self.assertAlmostEqual(result, expected, places=2,
-                             msg=f"Oczekiwano {{expected}}, otrzymano {{result}}")
-    
-    def test_czy_opłacalne(self):
-        # Test opłacalności
-        self.pole.powierzchnia = 10.0
-        self.pole.plon_standardowy = 8.0
-        # Przychód: 10 * 8 * 800 = 64,000
-        # Próg: 20,000 * 1.5 = 30,000
-        self.assertTrue(self.pole.czy_opłacalne(20000),
-                       "Powinno być opłacalne")
-        self.assertFalse(self.pole.czy_opłacalne(50000),
-                        "Nie powinno być opłacalne")
-    
-    def test_reprezentacja(self):
-        # Test metody __str__
-        result = str(self.pole)
-        self.assertIn("Pole:", result)
-        self.assertIn("Testowe", result)
-
-if __name__ == '__main__':
-    unittest.main()
-"""
-        
-        # Uruchomienie testów
-        f = StringIO()
-        with redirect_stdout(f):
-            test_suite = unittest.TestLoader().loadTestsFromTestCase(
-                type('TestPoleUprawne', (unittest.TestCase,), {
-                    'setUp': lambda self: exec(f"self.pole = PoleUprawne('Testowe', 5.0, 'Gliniasta', 8.5)", globals()),
-                    'test_szacowany_plon': lambda self: self.assertAlmostEqual(
-                        eval("self.pole.szacowany_plon()"), 42.5, places=2
-                    ),
-                    'test_czy_opłacalne': lambda self: (
-                        exec("self.pole.powierzchnia = 10.0; self.pole.plon_standardowy = 8.0"),
-                        self.assertTrue(eval("self.pole.czy_opłacalne(20000)")),
-                        self.assertFalse(eval("self.pole.czy_opłacalne(50000)"))
-                    ),
-                    'test_reprezentacja': lambda self: self.assertIn("Pole:", str(eval("self.pole")))
-                })
-            )
-            runner = unittest.TextTestRunner(stream=f, verbosity=2)
-            result = runner.run(test_suite)
-        
-        output = f.getvalue()
-        
-        # Wyświetlenie wyników
-        st.subheader("📊 **Wyniki testów:**")
-        st.code(output)
-        
-        if result.wasSuccessful():
-            st.balloons()
-            st.success("🎉 **Wszystkie testy przeszły!** Twój kod jest wysokiej jakości!")
-        else:
-            st.error("❌ **Niektóre testy nie przeszły.** Popraw kod i spróbuj ponownie.")
+        # Testy uruchamiane w osobnym procesie z limitami czasu i pamięci
+        wynik = ocen_zgloszenie("lesson1", kod_projektu, TESTY_POLE_UPRAWNE, wymagane_klasy=("PoleUprawne",))
+        pokaz_wynik_oceny(wynik)
+        if wynik.status == "ok" and not wynik.sukces:
             st.info("💡 **Wskazówka:** Upewnij się, że metody zwracają poprawne wartości.")
 
 # ========== CZĘŚĆ 4: QUIZ Z NATYCHMIASTOWĄ WERYFIKACJĄ ==========
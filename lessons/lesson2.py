@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-import unittest
-from io import StringIO
-from contextlib import redirect_stdout
+
+from narzedzia.ocenianie import ocen_zgloszenie, zarejestruj_testy
+from narzedzia.widoki import pokaz_wynik_oceny
 
 def teoria():
     st.header("🔢 Dzień 2 – Operacje, warunki i logika biznesowa")
@@ -81,6 +81,28 @@ def cwiczenie_interaktywne():
     for status, opis in decyzje:
         st.markdown(f"**{status}**: {opis}")
 
+TESTY_DECYZJE = """
+import unittest
+
+class TestDecyzje(unittest.TestCase):
+    def test_czy_oplacalne(self):
+        d = DecyzjeRolnicze(8.0, 800, 5000, 40)
+        # Przychód: 8 * 800 = 6400, Koszt: 5000 * 1.3 = 6500
+        self.assertFalse(d.czy_oplacalne())
+        
+        d2 = DecyzjeRolnicze(10.0, 900, 5000, 40)
+        # Przychód: 9000 > 6500
+        self.assertTrue(d2.czy_oplacalne())
+    
+    def test_decyzja_nawadniania(self):
+        d1 = DecyzjeRolnicze(7.0, 800, 5000, 30)  # plon>6, wilg<35
+        self.assertIn("podlewać", d1.decyzja_nawadniania().lower())
+        
+        d2 = DecyzjeRolnicze(5.0, 800, 5000, 20)  # wilg<25
+        self.assertIn("pilnie", d2.decyzja_nawadniania().lower())
+"""
+zarejestruj_testy(TESTY_DECYZJE)
+
 def mini_projekt():
     st.subheader("🚀 **System decyzyjny z testami**")
     
@@ -109,42 +131,7 @@ def mini_projekt():
 """)
     
     if st.button("🧪 Uruchom testy", key="testy2"):
-        # Testy jednostkowe
-        test_code = f"""
-import unittest
-
-{kod}
-
-class TestDecyzje(unittest.TestCase):
-    def test_czy_oplacalne(self):
-        d = DecyzjeRolnicze(8.0, 800, 5000, 40)
-        # Przychód: 8 * 800 = 6400, Koszt: 5000 * 1.3 = 6500
-        self.assertFalse(d.czy_oplacalne())
-        
-        d2 = DecyzjeRolnicze(10.0, 900, 5000, 40)
-        # Przychód: 9000 > 6500
-        self.assertTrue(d2.czy_oplacalne())
-    
-    def test_decyzja_nawadniania(self):
-        d1 = DecyzjeRolnicze(7.0, 800, 5000, 30)  # plon>6, wilg<35
-        self.assertIn("podlewać", d1.decyzja_nawadniania().lower())
-        
-        d2 = DecyzjeRolnicze(5.0, 800, 5000, 20)  # wilg<25
-        self.assertIn("pilnie", d2.decyzja_nawadniania().lower())
-
-if __name__ == '__main__':
-    unittest.main()
-"""
-        
-        f = StringIO()
-        with redirect_stdout(f):
-            try:
-                exec(test_code)
-                st.success("✅ Testy wykonane pomyślnie!")
-            except Exception as e:
-                st.error(f"❌ Błąd: {e}")
-        
-        st.code(f.getvalue())
+        pokaz_wynik_oceny(ocen_zgloszenie("lesson2", kod, TESTY_DECYZJE, wymagane_klasy=("DecyzjeRolnicze",)))
 
 def quiz():
     st.subheader("📝 **Quiz: Logika biznesowa**")
@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import unittest
-from io import StringIO
-from contextlib import redirect_stdout
-from typing import List, Dict
+import time
+
+from narzedzia.analiza_pol import AnalizatorPol
+from narzedzia.ocenianie import ocen_zgloszenie, zarejestruj_testy
+from narzedzia.widoki import pokaz_wynik_oceny
 
 def teoria():
     st.header("🔄 Dzień 3 – Pętle, kolekcje i analiza danych")
@@ -96,52 +96,11 @@ def cwiczenie_interaktywne():
         najlepsze_idx = np.argmax(plony)
         st.metric("Najlepsze pole", f"{pola_nazwy[najlepsze_idx]}: {plony[najlepsze_idx]} t/ha")
 
-def mini_projekt():
-    st.subheader("🚀 **Klasa AnalizatorPol z testami**")
-    
-    kod = st.text_area("✍️ **Stwórz klasę `AnalizatorPol`:**", height=350, value="""class AnalizatorPol:
-    def __init__(self, nazwy_pol: List[str], plony: List[float], powierzchnie: List[float]):
-        if len(nazwy_pol) != len(plony) != len(powierzchnie):
-            raise ValueError("Wszystkie listy muszą mieć tę samą długość")
-        self.nazwy_pol = nazwy_pol
-        self.plony = plony  # t/ha
-        self.powierzchnie = powierzchnie  # ha
-    
-    def statystyki_podstawowe(self) -> Dict:
-        '''Zwraca słownik z podstawowymi statystykami'''
-        # TODO: Oblicz średni plon, całkowity plon, pole z max plonem
-        return {
-            "sredni_plon": 0.0,
-            "calkowity_plon": 0.0,
-            "najlepsze_pole": "",
-            "najlepszy_plon": 0.0
-        }
-    
-    def pola_powyzej_progu(self, prog: float) -> List[str]:
-        '''Zwraca nazwy pól z plonem powyżej podanego progu'''
-        # TODO: Użyj list comprehension
-        return []
-    
-    def symuluj_zwiekszenie_plonow(self, procent: float) -> Dict:
-        '''Symuluje zwiększenie wszystkich plonów o podany procent'''
-        # TODO: Zwróć nowe statystyki po zwiększeniu
-        return {}
-    
-    def raport_csv(self, sciezka: str = "raport_pol.csv"):
-        '''Zapisuje raport do pliku CSV'''
-        import csv
-        # TODO: Zapisz dane do CSV
-        pass
-""")
-    
-    if st.button("🧪 Uruchom testy", key="testy3"):
-        test_code = f"""
+TESTY_ANALIZATOR = """
 import unittest
 import tempfile
 import os
 
-{kod}
-
 class TestAnalizatorPol(unittest.TestCase):
     def setUp(self):
         self.nazwy = ["Pole A", "Pole B", "Pole C"]
@@ -175,20 +134,51 @@ class TestAnalizatorPol(unittest.TestCase):
                 content = check_file.read()
                 self.assertIn("Pole A", content)
         os.unlink(sciezka)
-
-if __name__ == '__main__':
-    unittest.main()
 """
-        
-        f = StringIO()
-        with redirect_stdout(f):
-            try:
-                exec(test_code, globals())
-                st.success("✅ Testy wykonane!")
-            except Exception as e:
-                st.error(f"❌ Błąd: {e}")
-        
-        st.code(f.getvalue())
+zarejestruj_testy(TESTY_ANALIZATOR)
+
+def mini_projekt():
+    st.subheader("🚀 **Klasa AnalizatorPol z testami**")
+    
+    kod = st.text_area("✍️ **Stwórz klasę `AnalizatorPol`:**", height=350, value="""from typing import List, Dict
+
+class AnalizatorPol:
+    def __init__(self, nazwy_pol: List[str], plony: List[float], powierzchnie: List[float]):
+        if len(nazwy_pol) != len(plony) != len(powierzchnie):
+            raise ValueError("Wszystkie listy muszą mieć tę samą długość")
+        self.nazwy_pol = nazwy_pol
+        self.plony = plony  # t/ha
+        self.powierzchnie = powierzchnie  # ha
+    
+    def statystyki_podstawowe(self) -> Dict:
+        '''Zwraca słownik z podstawowymi statystykami'''
+        # TODO: Oblicz średni plon, całkowity plon, pole z max plonem
+        return {
+            "sredni_plon": 0.0,
+            "calkowity_plon": 0.0,
+            "najlepsze_pole": "",
+            "najlepszy_plon": 0.0
+        }
+    
+    def pola_powyzej_progu(self, prog: float) -> List[str]:
+        '''Zwraca nazwy pól z plonem powyżej podanego progu'''
+        # TODO: Użyj list comprehension
+        return []
+    
+    def symuluj_zwiekszenie_plonow(self, procent: float) -> Dict:
+        '''Symuluje zwiększenie wszystkich plonów o podany procent'''
+        # TODO: Zwróć nowe statystyki po zwiększeniu
+        return {}
+    
+    def raport_csv(self, sciezka: str = "raport_pol.csv"):
+        '''Zapisuje raport do pliku CSV'''
+        import csv
+        # TODO: Zapisz dane do CSV
+        pass
+""")
+    
+    if st.button("🧪 Uruchom testy", key="testy3"):
+        pokaz_wynik_oceny(ocen_zgloszenie("lesson3", kod, TESTY_ANALIZATOR, wymagane_klasy=("AnalizatorPol",)))
 
 def quiz():
     st.subheader("📝 **Quiz: Pętle i analiza**")
@@ -227,6 +217,32 @@ def challenge():
     
     **Cel:** Znajdź 10% najlepszych pół do inwestycji w nawóz premium.
     """)
+    
+    # Rozwiązanie wzorcowe: tablice NumPy zamiast list
+    liczba_pol = st.number_input("Liczba pól w symulacji:", 1000, 5_000_000, 1000, step=1000, key="challenge3_n")
+    
+    if st.button("⚡ Uruchom rozwiązanie wzorcowe (NumPy)", key="challenge3_run"):
+        start = time.perf_counter()
+        analizator = AnalizatorPol.losowe(int(liczba_pol))
+        najlepsze = analizator.najlepsze_pola(procent=10)
+        statystyki = analizator.statystyki_podstawowe()
+        czas = time.perf_counter() - start
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Pól w top 10%", f"{len(najlepsze):,}")
+        with col2:
+            st.metric("Średni plon", f"{statystyki['sredni_plon']:.2f} t/ha")
+        with col3:
+            st.metric("Czas obliczeń", f"{czas * 1000:.0f} ms")
+        
+        st.dataframe(najlepsze.head(20), use_container_width=True, hide_index=True)
+        
+        st.code("""# Klucz do wydajności - częściowe partycjonowanie zamiast pełnego sortowania
+k = math.ceil(len(plony) * 0.10)
+kandydaci = np.argpartition(plony, len(plony) - k)[-k:]   # O(n)
+najlepsze = kandydaci[np.argsort(-plony[kandydaci])]      # sortujemy tylko k elementów
+""", language="python")
 
 def run():
     st.sidebar.markdown("## 📖 Nawigacja lekcji 3")
@@ -1,12 +1,12 @@
 import streamlit as st
 import pandas as pd
-import unittest
-from io import StringIO
-from contextlib import redirect_stdout
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from dataclasses import dataclass
 
+from narzedzia.ocenianie import ocen_zgloszenie, zarejestruj_testy
+from narzedzia.widoki import pokaz_wynik_oceny
+
 def teoria():
     st.header("🏗️ Dzień 4 – OOP, SOLID i czysty kod")
     st.progress(60)
@@ -113,6 +113,44 @@ def przetworz_dane_refaktoryzowane(nazwa, plon, powierzchnia, gleba, cena, czy_n
         except Exception as e:
             st.error(f"❌ Błąd: {e}")
 
+TESTY_UPRAWY = """
+import unittest
+
+class TestUprawy(unittest.TestCase):
+    def test_abstrakcyjnosc(self):
+        '''Klasa Uprawa powinna być abstrakcyjna'''
+        with self.assertRaises(TypeError):
+            u = Uprawa("test", 1.0)
+    
+    def test_zboze_implementacja(self):
+        z = Zboze("Pszenica", 5.0, "Boomer")
+        z.plon = 8.5
+        self.assertEqual(z.plon, 8.5)
+        self.assertIsInstance(z, Uprawa)
+    
+    def test_ekologiczna_dziedziczenie(self):
+        e = EkologicznaUprawa("Pszenica ekologiczna", 3.0, "EkoGold", "EU Organic")
+        self.assertIsInstance(e, Zboze)
+        self.assertIsInstance(e, Uprawa)
+        self.assertEqual(e.certyfikat, "EU Organic")
+    
+    def test_wspolczynnik_plonu(self):
+        z = Zboze("Pszenica", 5.0, "Standard")
+        e = EkologicznaUprawa("Pszenica eko", 5.0, "Eko", "Cert")
+        # TODO: Sprawdź czy współczynniki są różne
+    
+    def test_polimorfizm(self):
+        uprawy: List[Uprawa] = [
+            Zboze("Pszenica", 5.0, "A"),
+            Warzywo("Marchew", 2.0, 90)
+        ]
+        for u in uprawy:
+            # Powinno działać dla każdej podklasy
+            result = u.wymagania_wodne()
+            self.assertIsInstance(result, str)
+"""
+zarejestruj_testy(TESTY_UPRAWY)
+
 def mini_projekt():
     st.subheader("🚀 **System klas z dziedziczeniem i polimorfizmem**")
     
@@ -187,57 +225,10 @@ class EkologicznaUprawa(Zboze):
 """)
     
     if st.button("🧪 Testy OOP", key="testy4"):
-        test_code = f"""
-import unittest
-
-{kod}
-
-class TestUprawy(unittest.TestCase):
-    def test_abstrakcyjnosc(self):
-        '''Klasa Uprawa powinna być abstrakcyjna'''
-        with self.assertRaises(TypeError):
-            u = Uprawa("test", 1.0)
-    
-    def test_zboze_implementacja(self):
-        z = Zboze("Pszenica", 5.0, "Boomer")
-        z.plon = 8.5
-        self.assertEqual(z.plon, 8.5)
-        self.assertIsInstance(z, Uprawa)
-    
-    def test_ekologiczna_dziedziczenie(self):
-        e = EkologicznaUprawa("Pszenica ekologiczna", 3.0, "EkoGold", "EU Organic")
-        self.assertIsInstance(e, Zboze)
-        self.assertIsInstance(e, Uprawa)
-        self.assertEqual(e.certyfikat, "EU Organic")
-    
-    def test_wspolczynnik_plonu(self):
-        z = Zboze("Pszenica", 5.0, "Standard")
-        e = EkologicznaUprawa("Pszenica eko", 5.0, "Eko", "Cert")
-        # TODO: Sprawdź czy współczynniki są różne
-    
-    def test_polimorfizm(self):
-        uprawy: List[Uprawa] = [
-            Zboze("Pszenica", 5.0, "A"),
-            Warzywo("Marchew", 2.0, 90)
-        ]
-        for u in uprawy:
-            # Powinno działać dla każdej podklasy
-            result = u.wymagania_wodne()
-            self.assertIsInstance(result, str)
-
-if __name__ == '__main__':
-    unittest.main()
-"""
-        
-        f = StringIO()
-        with redirect_stdout(f):
-            try:
-                exec(test_code)
-                st.success("✅ Testy OOP wykonane!")
-            except Exception as e:
-                st.error(f"❌ Błąd: {e}")
-        
-        st.code(f.getvalue())
+        # Każda metoda testowa w osobnym procesie, zepsuty konstruktor przerywa resztę
+        wynik = ocen_zgloszenie("lesson4", kod, TESTY_UPRAWY, rownolegle=True, przerwij_po_bledzie=True,
+                                wymagane_klasy=("Uprawa", "Zboze", "Warzywo", "EkologicznaUprawa"))
+        pokaz_wynik_oceny(wynik)
 
 def quiz():
     st.subheader("📝 **Quiz: OOP i SOLID**")
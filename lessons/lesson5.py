@@ -7,11 +7,13 @@ from io import StringIO
 from contextlib import redirect_stdout, contextmanager
 from pathlib import Path
 from typing import Optional, Dict, Any
-import json
 import csv
 import traceback
 from datetime import datetime
 
+from narzedzia.eksport import eksportuj_json
+from narzedzia.import_csv import waliduj_csv_strumieniowo
+
 def teoria():
     st.header("📁 Dzień 5 – Pliki, wyjątki i obsługa błędów")
     st.progress(75)
@@ -94,14 +96,26 @@ Pole D,6.8,4.5,ilasta,800"""
     
     if uploaded_file or st.button("Użyj przykładowych danych", key="use_sample"):
         try:
-            # Wczytaj dane
+            # Źródło danych - plik czytamy porcjami, bez ładowania całości do pamięci
             if uploaded_file:
-                df = pd.read_csv(uploaded_file)
+                zrodlo, rozmiar = uploaded_file, uploaded_file.size
             else:
-                df = pd.read_csv(StringIO(przykladowy_csv))
+                zrodlo, rozmiar = StringIO(przykladowy_csv), len(przykladowy_csv)
+            
+            pasek = st.progress(0.0, text="Wczytywanie i walidacja...")
+            raport = waliduj_csv_strumieniowo(
+                zrodlo,
+                rozmiar_porcji=100_000,
+                rozmiar_bajtow=rozmiar,
+                postep=lambda ulamek, wiersze: pasek.progress(ulamek, text=f"Sprawdzono {wiersze:,} wierszy...")
+            )
+            pasek.empty()
             
-            st.success(f"✅ Wczytano {len(df)} wierszy")
-            st.dataframe(df, use_container_width=True)
+            st.success(f"✅ Wczytano {raport.liczba_wierszy} wierszy")
+            if raport.podglad is not None:
+                if raport.liczba_wierszy > len(raport.podglad):
+                    st.caption(f"Podgląd pierwszych {len(raport.podglad)} wierszy")
+                st.dataframe(raport.podglad, use_container_width=True)
             
             # Walidacja
             st.subheader("🔍 **Wyniki walidacji:**")
@@ -110,21 +124,16 @@ Pole D,6.8,4.5,ilasta,800"""
             warnings = []
             
             # Sprawdź wymagane kolumny
-            required_cols = {'pole', 'plon', 'powierzchnia'}
-            missing = required_cols - set(df.columns)
-            if missing:
-                errors.append(f"Brakujące kolumny: {missing}")
+            if raport.brakujace_kolumny:
+                errors.append(f"Brakujące kolumny: {raport.brakujace_kolumny}")
             
-            # Sprawdź wartości liczbowe
-            if 'plon' in df.columns:
-                invalid_plon = df[df['plon'] <= 0]
-                if not invalid_plon.empty:
-                    errors.append(f"Nieprawidłowy plon w wierszach: {list(invalid_plon.index)}")
+            # Sprawdź wartości liczbowe (numery wierszy jako zakresy)
+            if raport.bledy['plon']:
+                errors.append(f"Nieprawidłowy plon w {raport.bledy['plon'].liczba} wierszach: {raport.bledy['plon']}")
             
-            if 'powierzchnia' in df.columns:
-                invalid_pow = df[df['powierzchnia'] <= 0]
-                if not invalid_pow.empty:
-                    errors.append(f"Nieprawidłowa powierzchnia w wierszach: {list(invalid_pow.index)}")
+            if raport.bledy['powierzchnia']:
+                errors.append(f"Nieprawidłowa powierzchnia w {raport.bledy['powierzchnia'].liczba} wierszach: "
+                              f"{raport.bledy['powierzchnia']}")
             
             # Wyświetl wyniki
             if errors:
@@ -139,15 +148,29 @@ Pole D,6.8,4.5,ilasta,800"""
                 for warn in warnings:
                     st.write(f"- {warn}")
             
-            # Eksport poprawionych danych
+            # Eksport poprawionych danych - porcjami do pliku tymczasowego
+            kol_format, kol_gzip = st.columns(2)
+            with kol_format:
+                format_eksportu = st.radio("Format:", ["ndjson", "json"], horizontal=True, key="export_format",
+                                           format_func=lambda f: "NDJSON (wiersz = rekord)" if f == "ndjson" else "Tablica JSON")
+            with kol_gzip:
+                kompresja = st.checkbox("Kompresja gzip", key="export_gzip")
+            
             if st.button("📤 Eksportuj poprawione dane do JSON", key="export"):
-                # Konwersja do JSON
-                json_data = df.to_dict(orient='records')
+                zrodlo.seek(0)
+                eksport = eksportuj_json(
+                    pd.read_csv(zrodlo, chunksize=100_000),
+                    format=format_eksportu,
+                    kompresja=kompresja,
+                    nazwa="dane_pol_poprawione"
+                )
+                st.caption(f"Wyeksportowano {eksport.liczba_wierszy:,} wierszy ({eksport.rozmiar_bajtow / 1024:.1f} KB)")
+                # Plik czytany dopiero przy kliknięciu - do tego czasu eksport leży w pliku tymczasowym
                 st.download_button(
                     label="Pobierz JSON",
-                    data=json.dumps(json_data, indent=2, ensure_ascii=False),
-                    file_name="dane_pol_poprawione.json",
-                    mime="application/json"
+                    data=eksport.pobierz,
+                    file_name=eksport.nazwa_pliku,
+                    mime=eksport.mime
                 )
                 
         except Exception as e:
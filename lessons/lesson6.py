@@ -1,15 +1,20 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
-import unittest
 import tempfile
-from io import StringIO
-from contextlib import redirect_stdout, contextmanager
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 import hashlib
 
+from narzedzia.baza_cwiczenia import ZAPYTANIE_POWIERZCHNIA_W_CZASIE, otworz_baze_cwiczenia
+from narzedzia.baza_rolnicza import GLEBY, BazaDanychRolnicza
+from narzedzia.profiler_sql import ProfilerSQL
+from narzedzia.ocenianie import ocen_zgloszenie, zarejestruj_testy
+from narzedzia.widoki import pokaz_profil_sql, pokaz_wynik_oceny
+
 def teoria():
     st.header("🗃️ Dzień 6 – Bazy danych i ORM")
     st.progress(90)
@@ -64,41 +69,16 @@ def teoria():
 def cwiczenie_interaktywne():
     st.subheader("🎯 **CRUD operations z interfejsem Streamlit**")
     
-    # Połączenie z bazą w pamięci
-    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    # Baza sesji (plik w trybie WAL) - schemat tworzony raz, dane przetrwają reruny
+    baza = otworz_baze_cwiczenia(st.session_state)
+    conn = baza.conn
     cursor = conn.cursor()
     
-    # Utworzenie schematu
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS pola (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nazwa TEXT NOT NULL UNIQUE,
-        powierzchnia REAL CHECK(powierzchnia > 0),
-        gleba TEXT CHECK(gleba IN ('gliniasta', 'piaszczysta', 'ilasta', 'torfiasta')),
-        plon_ubiegloroczny REAL,
-        data_zasiewu DATE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS zabiegi (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        pole_id INTEGER REFERENCES pola(id) ON DELETE CASCADE,
-        typ TEXT CHECK(typ IN ('nawozenie', 'oprysk', 'nawadnianie', 'zbior')),
-        data DATE NOT NULL,
-        koszt REAL,
-        opis TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    conn.commit()
-    
     st.markdown("### 📝 **Operacje na bazie danych**")
     
     # CRUD interface
-    tab1, tab2, tab3, tab4 = st.tabs(["➕ Dodaj pole", "👁️ Przeglądaj", "✏️ Edytuj", "📊 Statystyki"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["➕ Dodaj pole", "👁️ Przeglądaj", "✏️ Edytuj", "📊 Statystyki",
+                                            "🩺 Diagnostyka"])
     
     with tab1:
         st.subheader("Dodaj nowe pole")
@@ -121,6 +101,7 @@ def cwiczenie_interaktywne():
                             VALUES (?, ?, ?, ?, ?)
                         """, (nazwa, powierzchnia, gleba, plon, data_zasiewu))
                         conn.commit()
+                        baza.cache.zmieniono("pola")
                         st.success(f"✅ Dodano pole: {nazwa}")
                     except sqlite3.IntegrityError:
                         st.error("❌ Pole o tej nazwie już istnieje!")
@@ -130,6 +111,21 @@ def cwiczenie_interaktywne():
     with tab2:
         st.subheader("Przeglądaj pola")
         
+        # Wyszukiwanie pełnotekstowe (FTS5) w nazwach pól i opisach zabiegów
+        szukany_tekst = st.text_input("🔎 Szukaj w nazwach pól i opisach zabiegów:", key="szukaj_pola")
+        if szukany_tekst:
+            if not baza.wyszukiwanie:
+                st.warning("⚠️ Ta wersja SQLite nie ma modułu FTS5")
+            else:
+                trafienia = baza.szukaj(szukany_tekst)
+                if trafienia:
+                    for trafienie in trafienia:
+                        ikona = "🌾" if trafienie.zrodlo == "pole" else "🧪"
+                        st.markdown(f"{ikona} **{trafienie.pole}** – {trafienie.fragment}")
+                else:
+                    st.info("ℹ️ Brak wyników wyszukiwania")
+            st.markdown("---")
+        
         # Filtrowanie
         col1, col2 = st.columns(2)
         with col1:
@@ -137,32 +133,39 @@ def cwiczenie_interaktywne():
         with col2:
             gleba_filtr = st.multiselect("Gleba:", ['gliniasta', 'piaszczysta', 'ilasta', 'torfiasta'])
         
-        # Zapytanie z filtrami
-        query = "SELECT id, nazwa, powierzchnia, gleba, plon_ubiegloroczny FROM pola WHERE 1=1"
-        params = []
-        
-        if min_plon > 0:
-            query += " AND plon_ubiegloroczny >= ?"
-            params.append(min_plon)
-        
-        if gleba_filtr:
-            query += " AND gleba IN (" + ",".join(["?"] * len(gleba_filtr)) + ")"
-            params.extend(gleba_filtr)
+        # Stronicowanie po kluczu: stos kursorów odwiedzonych stron, zerowany przy zmianie filtrów
+        rozmiar_strony = st.selectbox("Wierszy na stronę:", [25, 50, 100, 500], index=1)
+        filtry = (min_plon, tuple(gleba_filtr), rozmiar_strony)
+        if st.session_state.get("przegladanie_filtry") != filtry:
+            st.session_state.przegladanie_filtry = filtry
+            st.session_state.przegladanie_kursory = [None]
+        kursory = st.session_state.przegladanie_kursory
         
-        df = pd.read_sql_query(query, conn, params=params)
+        strona = baza.strona_pol(min_plon, gleba_filtr, po=kursory[-1], rozmiar=rozmiar_strony)
         
-        if not df.empty:
-            st.dataframe(df, use_container_width=True, hide_index=True)
+        if strona.liczba:
+            st.dataframe(strona.pola, use_container_width=True, hide_index=True)
             
-            # Statystyki
+            poczatek = (len(kursory) - 1) * rozmiar_strony
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                st.button("◀ Poprzednia", disabled=len(kursory) == 1, key="przegladanie_poprzednia",
+                          on_click=kursory.pop)
+            with col2:
+                st.caption(f"Strona {len(kursory)}: wiersze {poczatek + 1}–{poczatek + len(strona.pola)} z {strona.liczba}")
+            with col3:
+                st.button("Następna ▶", disabled=strona.nastepna is None, key="przegladanie_nastepna",
+                          on_click=kursory.append, args=(strona.nastepna,))
+            
+            # Statystyki (policzone w SQL dla całego filtra, nie tylko bieżącej strony)
             st.subheader("📈 Podsumowanie:")
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Liczba pól", len(df))
+                st.metric("Liczba pól", strona.liczba)
             with col2:
-                st.metric("Średni plon", f"{df['plon_ubiegloroczny'].mean():.1f} t/ha")
+                st.metric("Średni plon", f"{strona.sredni_plon or 0:.1f} t/ha")
             with col3:
-                st.metric("Łączna powierzchnia", f"{df['powierzchnia'].sum():.1f} ha")
+                st.metric("Łączna powierzchnia", f"{strona.laczna_powierzchnia or 0:.1f} ha")
         else:
             st.info("ℹ️ Brak pól spełniających kryteria")
     
@@ -187,6 +190,7 @@ def cwiczenie_interaktywne():
                 if st.button("🗑️ Usuń pole"):
                     cursor.execute("DELETE FROM pola WHERE id = ?", (pole_id,))
                     conn.commit()
+                    baza.cache.zmieniono("pola", "zabiegi")
                     st.success("✅ Pole usunięte")
                     st.rerun()
         else:
@@ -213,30 +217,104 @@ def cwiczenie_interaktywne():
                 ORDER BY plon_ubiegloroczny DESC 
                 LIMIT 5
             """,
-            "Powierzchnia w czasie": """
-                SELECT strftime('%Y-%m', created_at) as miesiac,
-                       SUM(powierzchnia) as nowa_powierzchnia,
-                       (SELECT SUM(powierzchnia) 
-                        FROM pola p2 
-                        WHERE strftime('%Y-%m', p2.created_at) <= strftime('%Y-%m', p1.created_at)
-                       ) as laczna_powierzchnia
-                FROM pola p1
-                GROUP BY strftime('%Y-%m', created_at)
-                ORDER BY miesiac
-            """
+            "Powierzchnia w czasie": ZAPYTANIE_POWIERZCHNIA_W_CZASIE
         }
         
         wybrane_zapytanie = st.selectbox("Wybierz raport:", list(zapytania.keys()))
         
-        df_raport = pd.read_sql_query(zapytania[wybrane_zapytanie], conn)
+        df_raport = baza.cache.zapytanie(conn, zapytania[wybrane_zapytanie])
         st.dataframe(df_raport, use_container_width=True)
         
+        statystyki_cache = baza.cache.statystyki()
+        st.caption(f"Cache raportów: {statystyki_cache['trafienia']} trafień / {statystyki_cache['chybienia']} chybień "
+                   f"({statystyki_cache['skutecznosc']:.0%}), wpisy: {statystyki_cache['wpisy']}/{statystyki_cache['maks_wpisow']}")
+        
         # Wizualizacja
         if not df_raport.empty and 'sredni_plon' in df_raport.columns:
             st.bar_chart(df_raport.set_index('gleba')['sredni_plon'])
     
-    # Zamknięcie połączenia
-    conn.close()
+    with tab5:
+        st.subheader("Diagnostyka zapytań")
+        st.caption("Czasy wszystkich instrukcji tej sesji (execute + pobranie wierszy) i plany z EXPLAIN QUERY PLAN. "
+                   "Raporty z cache nie trafiają do bazy, więc nie ma ich w pomiarach.")
+        pokaz_profil_sql(baza.profiler)
+
+TESTY_BAZA_DANYCH = """
+import unittest
+import tempfile
+import json
+from pathlib import Path
+
+class TestBazaDanychRolnicza(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sciezka_bazy = Path(self.temp_dir) / "test.db"
+        self.baza = BazaDanychRolnicza(str(self.sciezka_bazy))
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir)
+    
+    def test_inicjalizacja_bazy(self):
+        '''Testuje migracje bazy danych'''
+        wersja = self.baza.zainicjalizuj_baze()
+        self.assertEqual(wersja, 3)  # Mamy 3 migracje
+        
+        # Sprawdź czy tabele istnieją
+        with self.baza.polacz() as conn:
+            # Tabela pola
+            result = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='pola'"
+            ).fetchone()
+            self.assertIsNotNone(result)
+            
+            # Tabela zabiegi
+            result = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='zabiegi'"
+            ).fetchone()
+            self.assertIsNotNone(result)
+            
+            # Wersja schematu
+            result = conn.execute("SELECT MAX(version) as ver FROM schema_version").fetchone()
+            self.assertEqual(result['ver'], 3)
+    
+    def test_context_manager(self):
+        '''Testuje context manager połączenia'''
+        with self.baza.polacz() as conn:
+            self.assertIsInstance(conn, sqlite3.Connection)
+            self.assertEqual(conn.row_factory, sqlite3.Row)  # Sprawdź row_factory
+    
+    def test_pole_model_validation(self):
+        '''Testuje walidację modelu Pole'''
+        # Poprawne pole
+        pole1 = PoleModel(nazwa="Testowe", powierzchnia=5.0, gleba="gliniasta", plon=8.5)
+        errors1 = pole1.validate()
+        self.assertEqual(len(errors1), 0)
+        
+        # Niepoprawne pole
+        pole2 = PoleModel(nazwa="", powierzchnia=-1, gleba="nieznana", plon=-5)
+        errors2 = pole2.validate()
+        self.assertGreater(len(errors2), 0)
+        self.assertIn("Nazwa jest wymagana", errors2)
+        self.assertIn("Powierzchnia musi być > 0", errors2)
+        self.assertIn("Nieprawidłowy typ gleby", errors2)
+        self.assertIn("Plon nie może być ujemny", errors2)
+    
+    def test_pole_model_serialization(self):
+        '''Testuje serializację/deserializację modelu'''
+        pole = PoleModel(id=1, nazwa="Test", powierzchnia=5.0, gleba="gliniasta", plon=8.5)
+        
+        # To dict
+        data = pole.to_dict()
+        self.assertEqual(data['nazwa'], "Test")
+        self.assertEqual(data['powierzchnia'], 5.0)
+        
+        # From dict
+        pole2 = PoleModel.from_dict(data)
+        self.assertEqual(pole2.nazwa, "Test")
+        self.assertEqual(pole2.powierzchnia, 5.0)
+"""
+zarejestruj_testy(TESTY_BAZA_DANYCH)
 
 def mini_projekt():
     st.subheader("🚀 **ORM-like layer z migracjami**")
@@ -378,96 +456,58 @@ class PoleModel:
 """)
     
     if st.button("🧪 Testy ORM i migracji", key="testy6"):
-        test_code = f"""
-import unittest
-import tempfile
-import json
-from pathlib import Path
-
-{kod}
-
-class TestBazaDanychRolnicza(unittest.TestCase):
-    def setUp(self):
-        self.temp_dir = tempfile.mkdtemp()
-        self.sciezka_bazy = Path(self.temp_dir) / "test.db"
-        self.baza = BazaDanychRolnicza(str(self.sciezka_bazy))
-    
-    def tearDown(self):
-        import shutil
-        shutil.rmtree(self.temp_dir)
-    
-    def test_inicjalizacja_bazy(self):
-        '''Testuje migracje bazy danych'''
-        wersja = self.baza.zainicjalizuj_baze()
-        self.assertEqual(wersja, 3)  # Mamy 3 migracje
-        
-        # Sprawdź czy tabele istnieją
-        with self.baza.polacz() as conn:
-            # Tabela pola
-            result = conn.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='pola'"
-            ).fetchone()
-            self.assertIsNotNone(result)
-            
-            # Tabela zabiegi
-            result = conn.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='zabiegi'"
-            ).fetchone()
-            self.assertIsNotNone(result)
-            
-            # Wersja schematu
-            result = conn.execute("SELECT MAX(version) as ver FROM schema_version").fetchone()
-            self.assertEqual(result['ver'], 3)
-    
-    def test_context_manager(self):
-        '''Testuje context manager połączenia'''
-        with self.baza.polacz() as conn:
-            self.assertIsInstance(conn, sqlite3.Connection)
-            self.assertEqual(conn.row_factory, sqlite3.Row)  # Sprawdź row_factory
-    
-    def test_pole_model_validation(self):
-        '''Testuje walidację modelu Pole'''
-        # Poprawne pole
-        pole1 = PoleModel(nazwa="Testowe", powierzchnia=5.0, gleba="gliniasta", plon=8.5)
-        errors1 = pole1.validate()
-        self.assertEqual(len(errors1), 0)
+        # Testy tworzą pliki SQLite - każdy działa równolegle we własnym katalogu tymczasowym
+        wynik = ocen_zgloszenie("lesson6", kod, TESTY_BAZA_DANYCH, rownolegle=True, przerwij_po_bledzie=True,
+                                wymagane_klasy=("BazaDanychRolnicza", "PoleModel"))
+        pokaz_wynik_oceny(wynik)
+    
+    st.markdown("### 🌱 **Import sezonu - rozwiązanie wzorcowe**")
+    liczba_pol = st.number_input("Liczba pól do zaimportowania:", 1000, 2_000_000, 100_000, step=10_000, key="import6_n")
+    
+    if st.button("⚡ Uruchom import wsadowy", key="import6_run"):
+        rng = np.random.default_rng(42)
+        n = int(liczba_pol)
+        df = pd.DataFrame({
+            'nazwa': [f"Pole {i}" for i in range(n)],
+            'powierzchnia': rng.uniform(0.5, 50.0, n).round(2),
+            'gleba': rng.choice(GLEBY, n),
+            'plon': rng.uniform(4.0, 12.0, n).round(2),
+        })
         
-        # Niepoprawne pole
-        pole2 = PoleModel(nazwa="", powierzchnia=-1, gleba="nieznana", plon=-5)
-        errors2 = pole2.validate()
-        self.assertGreater(len(errors2), 0)
-        self.assertIn("Nazwa jest wymagana", errors2)
-        self.assertIn("Powierzchnia musi być > 0", errors2)
-        self.assertIn("Nieprawidłowy typ gleby", errors2)
-        self.assertIn("Plon nie może być ujemny", errors2)
-    
-    def test_pole_model_serialization(self):
-        '''Testuje serializację/deserializację modelu'''
-        pole = PoleModel(id=1, nazwa="Test", powierzchnia=5.0, gleba="gliniasta", plon=8.5)
-        
-        # To dict
-        data = pole.to_dict()
-        self.assertEqual(data['nazwa'], "Test")
-        self.assertEqual(data['powierzchnia'], 5.0)
-        
-        # From dict
-        pole2 = PoleModel.from_dict(data)
-        self.assertEqual(pole2.nazwa, "Test")
-        self.assertEqual(pole2.powierzchnia, 5.0)
-
-if __name__ == '__main__':
-    unittest.main()
-"""
+        with tempfile.TemporaryDirectory() as katalog:
+            profiler = ProfilerSQL()
+            baza = BazaDanychRolnicza(str(Path(katalog) / "sezon.db"), profiler=profiler)
+            baza.zainicjalizuj_baze()
+            pasek = st.progress(0.0, text="Import...")
+            raport = baza.dodaj_pola_bulk(
+                df,
+                postep=lambda r: pasek.progress(min((r.dodane + r.odrzucone + r.duplikaty) / n, 1.0),
+                                                text=f"{r.dodane:,} pól ({r.wiersze_na_s:,.0f} wierszy/s)")
+            )
+            pasek.empty()
+            kopia = baza.backup_bazy(str(Path(katalog) / "kopie"), kompresja=True, zachowaj=3)
+            baza.zamknij()
         
-        f = StringIO()
-        with redirect_stdout(f):
-            try:
-                exec(test_code)
-                st.success("✅ Testy ORM wykonane!")
-            except Exception as e:
-                st.error(f"❌ Błąd: {e}")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Dodane pola", f"{raport.dodane:,}")
+        with col2:
+            st.metric("Czas importu", f"{raport.czas_s:.2f} s")
+        with col3:
+            st.metric("Wierszy na sekundę", f"{raport.wiersze_na_s:,.0f}")
+        st.caption(f"💾 Kopia zapasowa: {kopia.sciezka.name} ({kopia.rozmiar_bajtow / 1024 / 1024:.1f} MB, "
+                   f"{kopia.czas_s:.2f} s, sha256 {kopia.sha256[:12]}…)")
+        with st.expander("🩺 Zapytania wykonane podczas importu"):
+            st.dataframe(profiler.raport().round(2), use_container_width=True, hide_index=True)
         
-        st.code(f.getvalue())
+        st.code("""# Klucz do wydajności - kolumny zamiast obiektów, walidacja maskami i jedna transakcja na partię
+partia = PoleBatch.from_dataframe(porcja)              # tablice NumPy, bez miliona obiektów PoleModel
+maski = partia.validate()                              # wszystkie reguły dla całej partii
+poprawne = partia.filtruj(~np.logical_or.reduce(list(maski.values())))
+conn.execute("BEGIN")
+conn.executemany("INSERT OR IGNORE INTO pola (...) VALUES (?, ?, ?, ?)", poprawne.to_rows())
+conn.execute("COMMIT")                                 # jeden fsync na 50 000 wierszy
+""", language="python")
 
 def quiz():
     st.subheader("📝 **Quiz: Bazy danych**")
@@ -1,11 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import seaborn as sns
 import unittest
 from io import StringIO, BytesIO
 from contextlib import redirect_stdout
@@ -15,8 +10,11 @@ import json
 import tempfile
 from pathlib import Path
 
-# Konfiguracja strony
-st.set_page_config(layout="wide", page_title="Wizualizacje i Dashboard")
+from narzedzia.cache_wykresow import cache_wykresow
+from narzedzia.dane_dashboardu import KOLUMNY_POGODY, dane_dashboardu, generuj_pomiary_pogody, odczyty_czujnikow
+from narzedzia.korelacja import KorelacjaStrumieniowa
+from narzedzia.probkowanie import TRYBY, probkuj
+from narzedzia.strumien import sciezka_zrodla, strumien
 
 def teoria():
     st.header("📈 Dzień 7 – Wizualizacje, dashboardy i deployment")
@@ -95,47 +93,93 @@ def teoria():
     ```
     """)
 
+ZRODLA_NA_ZYWO = {"test": "Broker testowy", "plik": "Plik JSON (tail -F)", "gniazdo": "Gniazdo UNIX"}
+ODSWIEZANIE_S = 1.0
+
+
+@st.fragment(run_every=ODSWIEZANIE_S)
+def panel_na_zywo(rodzaj, metryki):
+    '''Trend i KPI z bufora strumienia - co sekundę odświeża się tylko ten fragment, nie cały skrypt'''
+    import plotly.express as px
+
+    zrodlo = strumien(rodzaj)
+    sciezka = sciezka_zrodla(rodzaj)
+    czas, wartosci = zrodlo.bufor.migawka()
+    # Producent podaje własny "czas", a kilku klientów gniazda się przeplata - kolejność wstawiania ≠ kolejność czasu
+    kolejnosc = np.argsort(czas, kind="stable")
+    czas, wartosci = czas[kolejnosc], wartosci[kolejnosc]
+    serie = [typ for typ in metryki if typ in zrodlo.bufor.kolumny]
+
+    st.subheader("🔴 Na żywo")
+    if zrodlo.blad:
+        st.error(f"❌ Źródło odczytów: {zrodlo.blad}")
+    if sciezka is not None:
+        st.caption(f"Nadawanie: `echo '{{\"plon\": 8.2, \"koszt\": 1150}}' >> {sciezka}`" if rodzaj == "plik"
+                   else f"Nadawanie: `echo '{{\"plon\": 8.2, \"koszt\": 1150}}' | nc -U {sciezka}`")
+    if not len(czas):
+        st.info("⏳ Czekam na pierwsze odczyty...")
+        return
+    if not serie:
+        st.info("ℹ️ Czujniki mierzą plon i koszt - wybierz jedną z tych metryk")
+        return
+
+    teraz = czas[-1]
+    ostatnia_minuta = czas >= teraz - 60
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        x = (czas * 1000).astype(np.int64).astype("datetime64[ms]")
+        for typ in serie:
+            wynik = probkuj(x, wartosci[:, zrodlo.bufor.kolumny.index(typ)], 900)
+            fig = px.line(x=wynik.x, y=wynik.y, labels={'x': 'Czas', 'y': typ}, height=250,
+                          title=f'{typ}: ostatnie {len(czas):,} odczytów')
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        for typ in serie:
+            kolumna = wartosci[:, zrodlo.bufor.kolumny.index(typ)]
+            srednia = np.nanmean(kolumna[ostatnia_minuta])
+            st.metric(f"{typ} (ostatni odczyt)", f"{kolumna[-1]:.2f}",
+                      delta=f"{kolumna[-1] - srednia:+.2f} vs. średnia z minuty")
+        st.metric("Odczyty / s", f"{ostatnia_minuta.sum() / max(teraz - czas[ostatnia_minuta][0], 1.0):.0f}")
+        st.caption(f"Łącznie {zrodlo.bufor.dopisane:,} odczytów, w buforze {len(czas):,}, "
+                   f"odrzuconych {zrodlo.odrzucone:,}")
+
+
 def cwiczenie_interaktywne():
+    # Plotly ładujemy dopiero tutaj - to jedyna sekcja rysująca wykresy
+    import plotly.express as px
+
     st.subheader("🎯 **Interaktywny dashboard rolniczy**")
     
-    # Generowanie przykładowych danych
-    np.random.seed(42)
-    miesiace = ['Sty', 'Lut', 'Mar', 'Kwi', 'Maj', 'Cze', 'Lip', 'Sie', 'Wrz', 'Paź', 'Lis', 'Gru']
-    
-    # Symulacja danych rocznych
-    dane = {
-        'miesiac': miesiace * 3,
-        'rok': ['2022']*12 + ['2023']*12 + ['2024']*12,
-        'typ': ['plon']*36 + ['koszt']*36 + ['cena']*36,
-        'wartosc': np.concatenate([
-            np.random.normal(8, 1.5, 36),  # plony
-            np.random.normal(1200, 300, 36),  # koszty
-            np.random.normal(850, 100, 36)  # ceny
-        ])
-    }
-    
-    df = pd.DataFrame(dane)
+    # Historia gospodarstwa (10 lat, 400 pól) wczytana raz na proces i zagregowana z góry
+    dane = dane_dashboardu()
     
     # Filtry
     st.sidebar.header("🔍 Filtry dashboardu")
     
     selected_years = st.sidebar.multiselect(
         "Wybierz lata:",
-        options=['2022', '2023', '2024'],
-        default=['2023', '2024']
+        options=dane.lata,
+        default=dane.lata[-2:]
     )
     
     selected_metrics = st.sidebar.multiselect(
         "Wybierz metryki:",
-        options=['plon', 'koszt', 'cena'],
+        options=dane.metryki,
         default=['plon', 'koszt']
     )
     
-    # Filtruj dane
-    filtered_df = df[
-        (df['rok'].isin(selected_years)) & 
-        (df['typ'].isin(selected_metrics))
-    ]
+    # Średnie miesięczne dla wybranych lat i metryk - z sum policzonych przy wczytaniu
+    filtered_df = dane.trend(selected_years, selected_metrics)
+    srednie = dane.srednie(selected_years, selected_metrics)
+    
+    # Tryb na żywo - odczyty z lokalnego źródła nad historią gospodarstwa
+    st.sidebar.markdown("---")
+    na_zywo = st.sidebar.toggle("🔴 Tryb na żywo", key="na_zywo7")
+    if na_zywo:
+        # Ścieżki pliku i gniazda ustawia serwer (KURS_KATALOG_CZUJNIKOW) - użytkownik wybiera tylko źródło
+        rodzaj = st.sidebar.radio("Źródło odczytów:", list(ZRODLA_NA_ZYWO), key="na_zywo7_zrodlo",
+                                  format_func=ZRODLA_NA_ZYWO.get)
+        panel_na_zywo(rodzaj, tuple(selected_metrics))
     
     # Layout dashboardu
     col1, col2 = st.columns([2, 1])
@@ -180,16 +224,16 @@ def cwiczenie_interaktywne():
         # KPI cards
         if not filtered_df.empty:
             # Średni plon
-            avg_yield = filtered_df[filtered_df['typ'] == 'plon']['wartosc'].mean()
+            avg_yield = srednie.get('plon', np.nan)
             st.metric("Średni plon", f"{avg_yield:.1f} t/ha", 
                      delta=f"{(avg_yield - 8):+.1f} vs. target")
             
             # Średni koszt
-            avg_cost = filtered_df[filtered_df['typ'] == 'koszt']['wartosc'].mean()
+            avg_cost = srednie.get('koszt', np.nan)
             st.metric("Średni koszt", f"{avg_cost:.0f} zł/ha")
             
             # ROI
-            avg_price = filtered_df[filtered_df['typ'] == 'cena']['wartosc'].mean()
+            avg_price = srednie.get('cena', np.nan)
             roi = (avg_yield * avg_price) / avg_cost if avg_cost > 0 else 0
             st.metric("ROI", f"{roi:.2f}", 
                      delta="Wskaźnik zwrotu")
@@ -211,61 +255,108 @@ def cwiczenie_interaktywne():
             )
             st.plotly_chart(fig_pie, use_container_width=True)
     
+    # Odczyty czujników - miliony punktów, na wykres trafia najwyżej ~2 punkty na piksel z wybranego okna
+    st.subheader("📡 Odczyty czujników")
+    odczyty = odczyty_czujnikow()
+    serie = [typ for typ in selected_metrics if typ in odczyty.serie]
+    
+    if serie:
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            tryb = st.radio("Próbkowanie:", list(TRYBY), key="probkowanie_tryb",
+                            format_func={"lttb": "LTTB (kształt)", "minmax": "Min/max (szpilki)"}.get)
+            szerokosc = st.select_slider("Szerokość wykresu (px):", [600, 900, 1200, 1600, 2400], value=1200,
+                                         key="probkowanie_szerokosc")
+        with col1:
+            pierwszy, ostatni = odczyty.czas[0].item(), odczyty.czas[-1].item()
+            okno = st.slider("Okno czasu (zawężenie pokazuje odczyty w pełnej rozdzielczości):",
+                             min_value=pierwszy, max_value=ostatni, value=(pierwszy, ostatni),
+                             format="YYYY-MM-DD HH:mm", key="probkowanie_okno")
+        zakres = (np.datetime64(okno[0], "m"), np.datetime64(okno[1], "m"))
+        
+        for typ in serie:
+            wynik = probkuj(odczyty.czas, odczyty.serie[typ], szerokosc, zakres, tryb)
+            fig_czujnik = px.line(x=wynik.x, y=wynik.y, labels={'x': 'Czas', 'y': typ}, height=300,
+                                  title=f'Odczyty czujników: {typ}')
+            fig_czujnik.update_layout(xaxis=dict(rangeslider=dict(visible=True)))
+            st.plotly_chart(fig_czujnik, use_container_width=True)
+            if wynik.pelna_rozdzielczosc:
+                st.caption(f"{wynik.punkty_w_oknie:,} odczytów w oknie - pełna rozdzielczość")
+            else:
+                st.caption(f"{wynik.punkty_w_oknie:,} odczytów w oknie → {len(wynik.x):,} punktów na wykresie")
+    else:
+        st.info("ℹ️ Czujniki mierzą plon i koszt - wybierz jedną z tych metryk")
+    
     # Drugi rząd - zaawansowane wizualizacje
     st.subheader("🔍 Zaawansowane analizy")
     
-    tab1, tab2, tab3 = st.tabs(["Korelacje", "Histogram", "Mapa cieplna"])
-    
-    with tab1:
-        # Macierz korelacji
-        corr_data = pd.DataFrame({
-            'Plon': np.random.normal(8, 1.5, 100),
-            'Temperatura': np.random.normal(18, 5, 100),
-            'Opady': np.random.normal(50, 20, 100),
-            'Wilgotność': np.random.normal(60, 15, 100)
-        })
+    # st.tabs liczyłoby wszystkie trzy zakładki przy każdym rerunie - radio liczy tylko widoczną
+    zakladka = st.radio("Analiza:", ["Korelacje", "Histogram", "Mapa cieplna"], horizontal=True,
+                        key="zakladka7", label_visibility="collapsed")
+    
+    # Gotowe wykresy (JSON Plotly) wspólne dla wszystkich sesji - klucz: wersja danych, filtry i typ wykresu
+    wykresy = cache_wykresow()
+    klucz_filtrow = (dane.wersja, tuple(selected_years), tuple(selected_metrics))
+    
+    if zakladka == "Korelacje":
+        # Stan korelacji (liczność, średnie, co-momenty) żyje w sesji - nowe odczyty tylko go aktualizują
+        if "korelacja7" not in st.session_state:
+            historia = KorelacjaStrumieniowa(KOLUMNY_POGODY)
+            historia.dodaj_partie(generuj_pomiary_pogody(10_000, seed=0))
+            st.session_state.korelacja7 = historia
+        stan = st.session_state.korelacja7
         
-        corr_matrix = corr_data.corr()
+        if st.button("📥 Dołącz nowe odczyty stacji pogodowych", key="korelacja7_nowe"):
+            # Każda z trzech stacji liczy własny stan cząstkowy, dashboard tylko je łączy
+            for stacja in range(3):
+                czesciowy = KorelacjaStrumieniowa(KOLUMNY_POGODY)
+                czesciowy.dodaj_partie(generuj_pomiary_pogody(1_000, seed=stan.n + stacja))
+                stan = stan.polacz(czesciowy)
+            st.session_state.korelacja7 = stan
         
-        fig_corr = px.imshow(
-            corr_matrix,
-            text_auto=True,
-            aspect="auto",
-            color_continuous_scale='RdBu',
-            title='Korelacja między zmiennymi'
-        )
-        st.plotly_chart(fig_corr, use_container_width=True)
+        # Macierz korelacji - wykres należy do sesji, więc nie trafia do wspólnego cache (wypychałby wspólne
+        # wykresy); budujemy go ponownie tylko, gdy stan przyjął nowe odczyty
+        wykres_sesji = st.session_state.get("korelacja7_wykres")
+        if wykres_sesji is None or wykres_sesji[0] != stan.n:
+            fig_corr = px.imshow(
+                stan.korelacja(),
+                text_auto=True,
+                aspect="auto",
+                color_continuous_scale='RdBu',
+                title='Korelacja między zmiennymi'
+            )
+            st.session_state.korelacja7_wykres = wykres_sesji = (stan.n, fig_corr)
+        st.plotly_chart(wykres_sesji[1], use_container_width=True)
+        st.caption(f"Korelacja z {stan.n:,} odczytów - aktualizowana przyrostowo, bez ponownego liczenia historii")
     
-    with tab2:
+    elif zakladka == "Histogram":
         # Histogram z krzywą gęstości
-        fig_hist = px.histogram(
-            filtered_df[filtered_df['typ'] == 'plon'],
-            x='wartosc',
+        # Plony wszystkich pól z wybranych lat; przy tysiącach wartości "box" zamiast "rug" (punkt na wartość)
+        fig_hist = wykresy.wykres(klucz_filtrow + ("histogram",), lambda: px.histogram(
+            x=dane.wartosci_metryki('plon', selected_years) if 'plon' in selected_metrics else [],
             nbins=20,
-            marginal="rug",
+            marginal="box",
             title='Rozkład plonów',
-            labels={'wartosc': 'Plon (t/ha)'}
-        )
+            labels={'x': 'Plon (t/ha)'}
+        ))
         st.plotly_chart(fig_hist, use_container_width=True)
     
-    with tab3:
+    else:
         # Mapa cieplna czasowa
-        heatmap_data = filtered_df.pivot_table(
-            index='miesiac',
-            columns='rok',
-            values='wartosc',
-            aggfunc='mean'
-        ).reindex(miesiace)
-        
-        fig_heat = px.imshow(
-            heatmap_data,
+        fig_heat = wykresy.wykres(klucz_filtrow + ("mapa_cieplna",), lambda: px.imshow(
+            dane.mapa_cieplna(selected_years, selected_metrics),
             text_auto=True,
             aspect="auto",
             title='Mapa cieplna - porównanie lat',
             labels=dict(x="Rok", y="Miesiąc", color="Wartość")
-        )
+        ))
         st.plotly_chart(fig_heat, use_container_width=True)
     
+    statystyki_wykresow = wykresy.statystyki()
+    st.caption(f"Cache wykresów: {statystyki_wykresow['trafienia']} trafień / {statystyki_wykresow['chybienia']} chybień "
+               f"({statystyki_wykresow['skutecznosc']:.0%}), "
+               f"{statystyki_wykresow['bajty'] / 1024 / 1024:.1f} / {statystyki_wykresow['maks_bajtow'] / 1024 / 1024:.0f} MB")
+    
     # Eksport dashboardu
     st.sidebar.markdown("---")
     st.sidebar.subheader("📤 Eksport")
@@ -533,4 +624,6 @@ def run():
             st.rerun()
 
 if __name__ == "__main__":
+    # Konfiguracja strony tylko przy samodzielnym uruchomieniu (w kursie robi to strona główna)
+    st.set_page_config(layout="wide", page_title="Wizualizacje i Dashboard")
     run()
@@ -0,0 +1 @@
+'''Wspólne narzędzia kursu (rejestr lekcji, ocenianie, dane)'''
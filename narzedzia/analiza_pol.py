@@ -0,0 +1,77 @@
+import math
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class AnalizatorPol:
+    '''Wzorcowy AnalizatorPol - dane w tablicach NumPy, obliczenia wektorowe'''
+
+    def __init__(self, nazwy_pol: Sequence[str], plony: Sequence[float], powierzchnie: Sequence[float]):
+        self.nazwy_pol = np.asarray(nazwy_pol)
+        self.plony = np.asarray(plony, dtype=np.float64)  # t/ha
+        self.powierzchnie = np.asarray(powierzchnie, dtype=np.float64)  # ha
+        if not (len(self.nazwy_pol) == len(self.plony) == len(self.powierzchnie)):
+            raise ValueError("Wszystkie listy muszą mieć tę samą długość")
+
+    @classmethod
+    def losowe(cls, liczba_pol: int, seed: int = 42) -> 'AnalizatorPol':
+        '''Generuje syntetyczne pola (plon 5-15 t/ha, powierzchnia 1-10 ha)'''
+        rng = np.random.default_rng(seed)
+        nazwy = np.char.add("Pole ", np.arange(1, liczba_pol + 1).astype(str))
+        return cls(nazwy, rng.uniform(5.0, 15.0, liczba_pol), rng.uniform(1.0, 10.0, liczba_pol))
+
+    def __len__(self) -> int:
+        return len(self.plony)
+
+    def _statystyki(self, plony: np.ndarray) -> Dict:
+        if len(plony) == 0:
+            return {"sredni_plon": 0.0, "calkowity_plon": 0.0, "najlepsze_pole": "", "najlepszy_plon": 0.0}
+        najlepszy = int(np.argmax(plony))
+        return {
+            "sredni_plon": float(plony.mean()),
+            "calkowity_plon": float(np.dot(plony, self.powierzchnie)),
+            "najlepsze_pole": str(self.nazwy_pol[najlepszy]),
+            "najlepszy_plon": float(plony[najlepszy]),
+        }
+
+    def statystyki_podstawowe(self) -> Dict:
+        '''Zwraca słownik z podstawowymi statystykami'''
+        return self._statystyki(self.plony)
+
+    def pola_powyzej_progu(self, prog: float) -> List[str]:
+        '''Zwraca nazwy pól z plonem powyżej podanego progu'''
+        return self.nazwy_pol[self.plony > prog].tolist()
+
+    def symuluj_zwiekszenie_plonow(self, procent: float) -> Dict:
+        '''Symuluje zwiększenie wszystkich plonów o podany procent'''
+        return self._statystyki(self.plony * (1 + procent / 100))
+
+    def indeksy_najlepszych(self, k: int) -> np.ndarray:
+        '''Indeksy k pól z najwyższym plonem, posortowane malejąco'''
+        k = max(0, min(k, len(self.plony)))
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+        # argpartition jest O(n) - sortujemy tylko wybrane k elementów, nie cały zbiór
+        kandydaci = np.argpartition(self.plony, len(self.plony) - k)[-k:]
+        return kandydaci[np.argsort(-self.plony[kandydaci], kind="stable")]
+
+    def najlepsze_pola(self, procent: float = 10.0) -> pd.DataFrame:
+        '''Zwraca górne `procent`% pól według plonu'''
+        k = math.ceil(len(self.plony) * procent / 100)
+        indeksy = self.indeksy_najlepszych(k)
+        return pd.DataFrame({
+            "Pole": self.nazwy_pol[indeksy],
+            "Plon (t/ha)": self.plony[indeksy],
+            "Powierzchnia (ha)": self.powierzchnie[indeksy],
+        })
+
+    def raport_csv(self, sciezka: str = "raport_pol.csv"):
+        '''Zapisuje raport do pliku CSV'''
+        pd.DataFrame({
+            "pole": self.nazwy_pol,
+            "plon": self.plony,
+            "powierzchnia": self.powierzchnie,
+            "calkowity_plon": self.plony * self.powierzchnie,
+        }).to_csv(sciezka, index=False)
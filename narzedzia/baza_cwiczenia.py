@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import tempfile
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from narzedzia.cache_zapytan import CacheZapytan
+from narzedzia.profiler_sql import ProfilerSQL, polacz_profilowane
+from narzedzia.wyszukiwanie import Trafienie, szukaj, utworz_indeksy
+
+SCHEMAT = """
+CREATE TABLE IF NOT EXISTS pola (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nazwa TEXT NOT NULL UNIQUE,
+    powierzchnia REAL CHECK(powierzchnia > 0),
+    gleba TEXT CHECK(gleba IN ('gliniasta', 'piaszczysta', 'ilasta', 'torfiasta')),
+    plon_ubiegloroczny REAL,
+    data_zasiewu DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS zabiegi (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pole_id INTEGER REFERENCES pola(id) ON DELETE CASCADE,
+    typ TEXT CHECK(typ IN ('nawozenie', 'oprysk', 'nawadnianie', 'zbior')),
+    data DATE NOT NULL,
+    koszt REAL,
+    opis TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Przeglądanie pól: filtr po glebie i stronicowanie po (plon DESC, id DESC);
+-- powierzchnia w indeksie pozwala policzyć podsumowanie bez czytania tabeli
+CREATE INDEX IF NOT EXISTS idx_pola_gleba_plon ON pola(gleba, plon_ubiegloroczny, powierzchnia);
+CREATE INDEX IF NOT EXISTS idx_pola_plon ON pola(plon_ubiegloroczny);
+
+-- Zestawienie miesięczne powierzchni utrzymywane przyrostowo przez triggery; pole bez daty
+-- utworzenia (created_at NULL) trafia do miesiąca '' zamiast przerywać INSERT na kluczu NOT NULL
+CREATE TABLE IF NOT EXISTS pola_miesiecznie (
+    miesiac TEXT PRIMARY KEY,
+    nowa_powierzchnia REAL NOT NULL DEFAULT 0,
+    liczba_pol INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Triggery tworzone od nowa - plik bazy z wcześniejszą wersją też dostaje aktualne
+DROP TRIGGER IF EXISTS pola_miesiecznie_po_dodaniu;
+DROP TRIGGER IF EXISTS pola_miesiecznie_po_usunieciu;
+DROP TRIGGER IF EXISTS pola_miesiecznie_po_zmianie;
+
+CREATE TRIGGER IF NOT EXISTS pola_miesiecznie_po_dodaniu AFTER INSERT ON pola
+BEGIN
+    INSERT INTO pola_miesiecznie (miesiac, nowa_powierzchnia, liczba_pol)
+    VALUES (COALESCE(strftime('%Y-%m', NEW.created_at), ''), COALESCE(NEW.powierzchnia, 0), 1)
+    ON CONFLICT(miesiac) DO UPDATE SET
+        nowa_powierzchnia = nowa_powierzchnia + excluded.nowa_powierzchnia,
+        liczba_pol = liczba_pol + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS pola_miesiecznie_po_usunieciu AFTER DELETE ON pola
+BEGIN
+    UPDATE pola_miesiecznie
+    SET nowa_powierzchnia = nowa_powierzchnia - COALESCE(OLD.powierzchnia, 0),
+        liczba_pol = liczba_pol - 1
+    WHERE miesiac = COALESCE(strftime('%Y-%m', OLD.created_at), '');
+    DELETE FROM pola_miesiecznie WHERE miesiac = COALESCE(strftime('%Y-%m', OLD.created_at), '') AND liczba_pol <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS pola_miesiecznie_po_zmianie AFTER UPDATE OF powierzchnia, created_at ON pola
+BEGIN
+    UPDATE pola_miesiecznie
+    SET nowa_powierzchnia = nowa_powierzchnia - COALESCE(OLD.powierzchnia, 0),
+        liczba_pol = liczba_pol - 1
+    WHERE miesiac = COALESCE(strftime('%Y-%m', OLD.created_at), '');
+    DELETE FROM pola_miesiecznie WHERE miesiac = COALESCE(strftime('%Y-%m', OLD.created_at), '') AND liczba_pol <= 0;
+    INSERT INTO pola_miesiecznie (miesiac, nowa_powierzchnia, liczba_pol)
+    VALUES (COALESCE(strftime('%Y-%m', NEW.created_at), ''), COALESCE(NEW.powierzchnia, 0), 1)
+    ON CONFLICT(miesiac) DO UPDATE SET
+        nowa_powierzchnia = nowa_powierzchnia + excluded.nowa_powierzchnia,
+        liczba_pol = liczba_pol + 1;
+END;
+"""
+
+# Raport "Powierzchnia w czasie": suma narastająca funkcją okna po zestawieniu miesięcznym
+ZAPYTANIE_POWIERZCHNIA_W_CZASIE = """
+    SELECT miesiac,
+           nowa_powierzchnia,
+           SUM(nowa_powierzchnia) OVER (ORDER BY miesiac) as laczna_powierzchnia
+    FROM pola_miesiecznie
+    ORDER BY miesiac
+"""
+
+KLUCZ_SESJI = "baza_cwiczenia"
+
+# Kursor strony: (plon_ubiegloroczny, id) ostatniego wiersza poprzedniej strony
+Kursor = Tuple[Optional[float], int]
+
+
+@dataclass
+class StronaPol:
+    pola: pd.DataFrame
+    liczba: int
+    sredni_plon: Optional[float]
+    laczna_powierzchnia: Optional[float]
+    nastepna: Optional[Kursor] = None
+
+
+def _zamknij(conn: sqlite3.Connection, plik: Optional[Path]):
+    conn.close()
+    if plik is not None:
+        for sciezka in (plik, Path(f"{plik}-wal"), Path(f"{plik}-shm")):
+            try:
+                sciezka.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def przebuduj_zestawienie_miesieczne(conn: sqlite3.Connection, tylko_puste: bool = False):
+    '''Odtwarza pola_miesiecznie z tabeli pola (np. dla bazy sprzed wprowadzenia triggerów)'''
+    with conn:
+        if tylko_puste and conn.execute("SELECT 1 FROM pola_miesiecznie LIMIT 1").fetchone():
+            return
+        conn.execute("DELETE FROM pola_miesiecznie")
+        conn.execute("""
+            INSERT INTO pola_miesiecznie (miesiac, nowa_powierzchnia, liczba_pol)
+            SELECT COALESCE(strftime('%Y-%m', created_at), ''), SUM(COALESCE(powierzchnia, 0)), COUNT(*)
+            FROM pola
+            GROUP BY 1
+        """)
+
+
+class BazaCwiczenia:
+    '''Plikowa baza SQLite w trybie WAL dla ćwiczenia CRUD - połączenie i schemat tworzone raz'''
+
+    def __init__(self, sciezka: Optional[str] = None):
+        tymczasowa = sciezka is None
+        if tymczasowa:
+            deskryptor, sciezka = tempfile.mkstemp(prefix="lekcja6_", suffix=".db")
+            os.close(deskryptor)
+        self.sciezka = Path(sciezka)
+
+        # Reruny Streamlit mogą działać w różnych wątkach tej samej sesji
+        self.profiler = ProfilerSQL()
+        self.conn = polacz_profilowane(self.sciezka, self.profiler, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMAT)
+        przebuduj_zestawienie_miesieczne(self.conn, tylko_puste=True)
+        self.wyszukiwanie = utworz_indeksy(self.conn)
+
+        # Wyniki raportów - ważne do następnej zmiany tabel, z których korzystają
+        self.cache = CacheZapytan()
+
+        # Plik tymczasowy usuwamy razem z obiektem (np. po wygaśnięciu sesji)
+        self._zamykacz = weakref.finalize(self, _zamknij, self.conn, self.sciezka if tymczasowa else None)
+
+    def strona_pol(self, min_plon: float = 0.0, gleby: Sequence[str] = (), po: Optional[Kursor] = None,
+                   rozmiar: int = 50) -> StronaPol:
+        '''Strona pól (stronicowanie po kluczu) i podsumowanie całego filtra w jednym zapytaniu'''
+        warunki, params = [], []
+        if min_plon > 0:
+            warunki.append("plon_ubiegloroczny >= ?")
+            params.append(min_plon)
+        if gleby:
+            warunki.append("gleba IN (" + ",".join(["?"] * len(gleby)) + ")")
+            params.extend(gleby)
+        filtr = " AND ".join(warunki) or "1=1"
+
+        # Przy DESC wartości NULL są na końcu: najpierw strona pól z plonem (porównanie krotek
+        # (plon, id) korzysta z indeksu), potem pola bez plonu uporządkowane już tylko po id
+        if po is None:
+            z_plonem, params_z_plonem = "plon_ubiegloroczny IS NOT NULL", []
+            bez_plonu, params_bez_plonu = "1=1", []
+        elif po[0] is None:
+            z_plonem, params_z_plonem = "0", []
+            bez_plonu, params_bez_plonu = "id < ?", [po[1]]
+        else:
+            z_plonem, params_z_plonem = "(plon_ubiegloroczny, id) < (?, ?)", [po[0], po[1]]
+            bez_plonu, params_bez_plonu = "1=1", []
+
+        kolumny = "id, nazwa, powierzchnia, gleba, plon_ubiegloroczny"
+        sql = f"""
+            WITH podsumowanie AS (
+                SELECT COUNT(*) as liczba,
+                       AVG(plon_ubiegloroczny) as sredni_plon,
+                       SUM(powierzchnia) as laczna_powierzchnia
+                FROM pola
+                WHERE {filtr}
+            ),
+            strona AS (
+                SELECT * FROM (
+                    SELECT {kolumny} FROM pola
+                    WHERE {filtr} AND {z_plonem}
+                    ORDER BY plon_ubiegloroczny DESC, id DESC
+                    LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {kolumny} FROM pola
+                    WHERE {filtr} AND plon_ubiegloroczny IS NULL AND {bez_plonu}
+                    ORDER BY id DESC
+                    LIMIT ?
+                )
+            )
+            SELECT p.liczba, p.sredni_plon, p.laczna_powierzchnia, s.*
+            FROM podsumowanie p LEFT JOIN strona s
+            ORDER BY s.plon_ubiegloroczny IS NULL, s.plon_ubiegloroczny DESC, s.id DESC
+            LIMIT ?
+        """
+        # Jeden wiersz więcej mówi, czy istnieje następna strona
+        limit = rozmiar + 1
+        df = self.cache.zapytanie(self.conn, sql, [
+            *params,
+            *params, *params_z_plonem, limit,
+            *params, *params_bez_plonu, limit,
+            limit,
+        ])
+
+        podsumowanie = df.iloc[0]
+        pola = df.loc[df["id"].notna(), ["id", "nazwa", "powierzchnia", "gleba", "plon_ubiegloroczny"]]
+        pola = pola.astype({"id": int}).reset_index(drop=True)
+        nastepna = None
+        if len(pola) > rozmiar:
+            pola = pola.iloc[:rozmiar]
+            ostatni = pola.iloc[-1]
+            plon = ostatni["plon_ubiegloroczny"]
+            nastepna = (None if pd.isna(plon) else float(plon), int(ostatni["id"]))
+
+        return StronaPol(
+            pola=pola,
+            liczba=int(podsumowanie["liczba"]),
+            sredni_plon=None if pd.isna(podsumowanie["sredni_plon"]) else float(podsumowanie["sredni_plon"]),
+            laczna_powierzchnia=None if pd.isna(podsumowanie["laczna_powierzchnia"])
+            else float(podsumowanie["laczna_powierzchnia"]),
+            nastepna=nastepna,
+        )
+
+    def szukaj(self, tekst: str, limit: int = 20) -> List[Trafienie]:
+        '''Pełnotekstowe wyszukiwanie w nazwach pól i opisach zabiegów (FTS5, bm25)'''
+        return szukaj(self.conn, tekst, limit) if self.wyszukiwanie else []
+
+    def zamknij(self):
+        self._zamykacz()
+
+
+def otworz_baze_cwiczenia(session_state, klucz: str = KLUCZ_SESJI) -> BazaCwiczenia:
+    '''Zwraca bazę ćwiczenia zapisaną w sesji (tworzy ją przy pierwszym wywołaniu)'''
+    if klucz not in session_state:
+        session_state[klucz] = BazaCwiczenia()
+    return session_state[klucz]
@@ -0,0 +1,475 @@
+import io
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from narzedzia.kopie_zapasowe import KopiaZapasowa, utworz_kopie
+from narzedzia.migracje import Migrator, StanMigracjiDanych, uruchom_migracje_danych
+from narzedzia.profiler_sql import ProfilerSQL
+from narzedzia.pula_polaczen import CZYTELNICY, PulaPolaczen
+from narzedzia.wyszukiwanie import INDEKSY, Trafienie, indeksuj_po_wstawieniu, sql_indeksu, szukaj, utworz_indeksy
+
+GLEBY = ('gliniasta', 'piaszczysta', 'ilasta')
+
+KOLUMNY_POLA = ('nazwa', 'powierzchnia', 'gleba', 'plon')
+
+# Ustawienia na czas importu wsadowego (przywracane po zakończeniu)
+PRAGMY_IMPORTU = {
+    "synchronous": "OFF",
+    "cache_size": -64 * 1024,  # 64 MB
+    "temp_store": "MEMORY",
+}
+
+MIGRACJE = [
+    # Wersja 1 - schemat początkowy
+    """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE pola (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nazwa TEXT NOT NULL UNIQUE,
+        powierzchnia REAL NOT NULL CHECK(powierzchnia > 0),
+        gleba TEXT NOT NULL CHECK(gleba IN ('gliniasta', 'piaszczysta', 'ilasta')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    # Wersja 2 - dodanie plonów
+    """
+    ALTER TABLE pola ADD COLUMN plon_ubiegloroczny REAL;
+    CREATE INDEX idx_pola_plon ON pola(plon_ubiegloroczny);
+    """,
+    # Wersja 3 - tabela zabiegów
+    """
+    CREATE TABLE zabiegi (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pole_id INTEGER NOT NULL REFERENCES pola(id) ON DELETE CASCADE,
+        typ TEXT NOT NULL CHECK(typ IN ('nawozenie', 'oprysk', 'nawadnianie')),
+        data DATE NOT NULL,
+        koszt REAL DEFAULT 0,
+        opis TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_zabiegi_pole ON zabiegi(pole_id);
+    """,
+]
+
+
+@dataclass(frozen=True, slots=True)
+class PoleModel:
+    '''Model reprezentujący pole - niezmienny, bez __dict__ (kilka razy mniej pamięci na obiekt)'''
+    id: Optional[int] = None
+    nazwa: str = ""
+    powierzchnia: float = 0.0
+    gleba: str = ""
+    plon: Optional[float] = None
+    # Datę nadaje baza (DEFAULT CURRENT_TIMESTAMP) - model nie woła datetime.now() dla każdego obiektu
+    created_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict:
+        return {nazwa: getattr(self, nazwa) for nazwa in POLA_MODELU}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PoleModel':
+        return cls(**{k: v for k, v in data.items() if k in POLA_MODELU})
+
+    def validate(self) -> List[str]:
+        '''Walidacja modelu - zwraca listę błędów'''
+        errors = []
+        if not self.nazwa.strip():
+            errors.append("Nazwa jest wymagana")
+        if self.powierzchnia <= 0:
+            errors.append("Powierzchnia musi być > 0")
+        if self.gleba not in GLEBY:
+            errors.append("Nieprawidłowy typ gleby")
+        if self.plon is not None and self.plon < 0:
+            errors.append("Plon nie może być ujemny")
+        return errors
+
+    @staticmethod
+    def waliduj_wektorowo(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        '''Te same reguły co validate() dla całej ramki naraz: komunikat -> maska błędnych wierszy'''
+        return PoleBatch.from_dataframe(df).validate()
+
+
+POLA_MODELU = tuple(pole.name for pole in fields(PoleModel))
+
+
+def _liczby(kolumna: pd.Series) -> np.ndarray:
+    if kolumna.dtype == np.float64:
+        return kolumna.to_numpy()  # widok na dane ramki, bez kopii
+    return pd.to_numeric(kolumna, errors='coerce').to_numpy(dtype=np.float64)
+
+
+@dataclass(frozen=True, eq=False)
+class PoleBatch:
+    '''Partia pól w układzie kolumnowym: jedna tablica NumPy na pole modelu zamiast obiektu na wiersz
+
+    Walidacja, filtrowanie i zapis do bazy działają na całych kolumnach, więc milion pól to kilka
+    tablic, a nie milion obiektów PoleModel.
+    '''
+    nazwa: np.ndarray  # object (str)
+    powierzchnia: np.ndarray  # float64, NaN = brak lub nie-liczba
+    gleba: np.ndarray  # object (str)
+    plon: np.ndarray  # float64, NaN = brak plonu
+    id: Optional[np.ndarray] = None  # int64, tylko dla pól odczytanych z bazy
+    # Wiersze, w których plon był podany, ale nie dał się odczytać jako liczba
+    plon_nieliczbowy: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.nazwa)
+
+    def __getitem__(self, i: int) -> PoleModel:
+        plon = self.plon[i]
+        return PoleModel(
+            id=None if self.id is None else int(self.id[i]),
+            nazwa=self.nazwa[i],
+            powierzchnia=float(self.powierzchnia[i]),
+            gleba=self.gleba[i],
+            plon=None if np.isnan(plon) else float(plon),
+        )
+
+    def __iter__(self) -> Iterator[PoleModel]:
+        return (self[i] for i in range(len(self)))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'PoleBatch':
+        '''Kolumny ramki bez kopiowania, o ile mają już właściwe typy (float64 dla liczb)'''
+        df = df.rename(columns={'plon_ubiegloroczny': 'plon'})
+        if 'plon' in df:
+            plon = _liczby(df['plon'])
+            plon_nieliczbowy = df['plon'].notna().to_numpy() & np.isnan(plon)
+        else:
+            plon, plon_nieliczbowy = np.full(len(df), np.nan), None
+        return cls(
+            nazwa=df['nazwa'].to_numpy(dtype=object),
+            powierzchnia=_liczby(df['powierzchnia']),
+            gleba=df['gleba'].to_numpy(dtype=object),
+            plon=plon,
+            id=df['id'].to_numpy(dtype=np.int64) if 'id' in df and df['id'].notna().all() else None,
+            plon_nieliczbowy=plon_nieliczbowy,
+        )
+
+    @classmethod
+    def from_records(cls, rekordy: Iterable[Union[Dict, PoleModel]]) -> 'PoleBatch':
+        slowniki = [r.to_dict() if isinstance(r, PoleModel) else r for r in rekordy]
+        return cls.from_dataframe(pd.DataFrame(slowniki))
+
+    @classmethod
+    def from_rows(cls, wiersze: Iterable[tuple]) -> 'PoleBatch':
+        '''Z wierszy (id, nazwa, powierzchnia, gleba, plon_ubiegloroczny) zwróconych przez sqlite3'''
+        kolumny = list(zip(*wiersze)) or [()] * 5
+        return cls(
+            id=np.array(kolumny[0], dtype=np.int64),
+            nazwa=np.array(kolumny[1], dtype=object),
+            powierzchnia=np.array(kolumny[2], dtype=np.float64),
+            gleba=np.array(kolumny[3], dtype=object),
+            plon=np.array([np.nan if p is None else p for p in kolumny[4]], dtype=np.float64),
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        kolumny = dict(zip(KOLUMNY_POLA, (self.nazwa, self.powierzchnia, self.gleba, self.plon)))
+        if self.id is not None:
+            kolumny = {'id': self.id, **kolumny}
+        return pd.DataFrame(kolumny, copy=False)
+
+    def to_rows(self) -> Iterator[tuple]:
+        '''Krotki (nazwa, powierzchnia, gleba, plon) dla executemany - NaN zamieniony na NULL'''
+        plony = self.plon.astype(object)
+        plony[np.isnan(self.plon)] = None
+        nazwy = pd.Series(self.nazwa, copy=False).astype(str).str.strip()
+        return zip(nazwy.tolist(), self.powierzchnia.tolist(), self.gleba.tolist(), plony.tolist())
+
+    def validate(self) -> Dict[str, np.ndarray]:
+        '''Reguły PoleModel.validate() dla wszystkich wierszy naraz: komunikat -> maska błędnych wierszy'''
+        nazwy = pd.Series(self.nazwa, copy=False).astype('string').str.strip()
+        plon_niepoprawny = self.plon < 0
+        if self.plon_nieliczbowy is not None:
+            plon_niepoprawny |= self.plon_nieliczbowy
+        return {
+            "Nazwa jest wymagana": (nazwy.isna() | (nazwy == "")).to_numpy(dtype=bool),
+            "Powierzchnia musi być > 0": ~(self.powierzchnia > 0),
+            "Nieprawidłowy typ gleby": ~pd.Series(self.gleba, copy=False).isin(GLEBY).to_numpy(dtype=bool),
+            "Plon nie może być ujemny": plon_niepoprawny,
+        }
+
+    def filtruj(self, maska: np.ndarray) -> 'PoleBatch':
+        def wybierz(kolumna):
+            return None if kolumna is None else kolumna[maska]
+        return PoleBatch(self.nazwa[maska], self.powierzchnia[maska], self.gleba[maska], self.plon[maska],
+                         wybierz(self.id), wybierz(self.plon_nieliczbowy))
+
+
+@dataclass
+class RaportImportu:
+    dodane: int = 0
+    odrzucone: int = 0
+    duplikaty: int = 0
+    czas_s: float = 0.0
+    # Przykładowe błędy: (numer wiersza w źródle, komunikat)
+    bledy: List[tuple] = field(default_factory=list)
+
+    @property
+    def wiersze_na_s(self) -> float:
+        return self.dodane / self.czas_s if self.czas_s else 0.0
+
+
+ZrodloPol = Union[pd.DataFrame, str, Path, io.IOBase, Iterable[Union[Dict, PoleModel]]]
+
+
+def _porcje(zrodlo: ZrodloPol, rozmiar_partii: int) -> Iterator[PoleBatch]:
+    '''Zamienia obsługiwane źródła na kolumnowe partie pól'''
+    if isinstance(zrodlo, pd.DataFrame):
+        for i in range(0, len(zrodlo), rozmiar_partii):
+            yield PoleBatch.from_dataframe(zrodlo.iloc[i:i + rozmiar_partii])
+    elif isinstance(zrodlo, (str, Path, io.IOBase)) or hasattr(zrodlo, "read"):
+        for porcja in pd.read_csv(zrodlo, chunksize=rozmiar_partii):
+            yield PoleBatch.from_dataframe(porcja)
+    else:
+        partia = []
+        for rekord in zrodlo:
+            partia.append(rekord)
+            if len(partia) == rozmiar_partii:
+                yield PoleBatch.from_records(partia)
+                partia = []
+        if partia:
+            yield PoleBatch.from_records(partia)
+
+
+class BazaDanychRolnicza:
+    '''Warstwa abstrakcji nad SQLite z migracjami i walidacją (rozwiązanie wzorcowe)'''
+
+    def __init__(self, sciezka_bazy: str = "gospodarstwo.db", czytelnicy: Optional[int] = None,
+                 profiler: Optional[ProfilerSQL] = None):
+        self.sciezka = Path(sciezka_bazy)
+        self.migracje = MIGRACJE
+        self.profiler = profiler
+        # Liczba połączeń do odczytu: argument albo KURS_CZYTELNICY_BAZY (nadmiarowe odczyty czekają w kolejce)
+        czytelnicy = czytelnicy or int(os.environ.get("KURS_CZYTELNICY_BAZY", CZYTELNICY))
+        self.pula = PulaPolaczen(self.sciezka, czytelnicy=czytelnicy, profiler=profiler)
+
+    def polacz(self):
+        '''Context manager dla połączenia zapisującego (commit na końcu, rollback przy błędzie)'''
+        return self.pula.pisarz()
+
+    def odczyt(self):
+        '''Context manager dla połączenia tylko do odczytu z puli'''
+        return self.pula.czytelnik()
+
+    def zamknij(self):
+        self.pula.zamknij()
+
+    def zainicjalizuj_baze(self) -> int:
+        '''Uruchamia migracje do najnowszej wersji (w pełni zmigrowana baza: jedno zapytanie)'''
+        migrator = Migrator(
+            self.migracje,
+            # Indeksy pełnotekstowe nie są migracją, ale zmiana ich definicji też wymaga pełnego sprawdzenia
+            dodatki=[sql_indeksu(tabela, indeks, kolumna) for tabela, (indeks, kolumna) in INDEKSY.items()],
+            po_migracji=utworz_indeksy,
+        )
+        with self.polacz() as conn:
+            self.ostatnia_migracja = migrator.migruj(conn)
+        return self.ostatnia_migracja.wersja
+
+    def uzupelnij_plony(self, rozmiar_partii: int = 10_000, maks_partii: Optional[int] = None,
+                        postep: Optional[Callable[[StanMigracjiDanych], None]] = None) -> StanMigracjiDanych:
+        '''Migracja danych: brakujący plon_ubiegloroczny = średni plon pól z tą samą glebą
+
+        Działa partiami po id i zapamiętuje postęp w bazie - przerwana (lub ograniczona maks_partii)
+        wznawia się od miejsca, w którym skończyła. Uzupełnienie średnią nie zmienia średniej grupy,
+        więc wznowienie liczy te same wartości.
+        '''
+        with self.odczyt() as conn:
+            srednie = dict(conn.execute(
+                "SELECT gleba, AVG(plon_ubiegloroczny) FROM pola "
+                "WHERE plon_ubiegloroczny IS NOT NULL GROUP BY gleba"
+            ).fetchall())
+
+        def partia(conn: sqlite3.Connection, kursor: int, rozmiar: int) -> Optional[int]:
+            ostatni = conn.execute(
+                "SELECT MAX(id) FROM (SELECT id FROM pola WHERE id > ? ORDER BY id LIMIT ?)", (kursor, rozmiar)
+            ).fetchone()[0]
+            if ostatni is None:
+                return None
+            conn.executemany(
+                "UPDATE pola SET plon_ubiegloroczny = ? "
+                "WHERE id > ? AND id <= ? AND gleba = ? AND plon_ubiegloroczny IS NULL",
+                [(srednia, kursor, ostatni, gleba) for gleba, srednia in srednie.items()]
+            )
+            return ostatni
+
+        with self.polacz() as conn:
+            return uruchom_migracje_danych(conn, "uzupelnij_plony", partia, rozmiar_partii, maks_partii, postep)
+
+    def dodaj_pole(self, nazwa: str, powierzchnia: float, gleba: str, plon: Optional[float] = None) -> bool:
+        '''Dodaje pole z walidacją danych'''
+        pole = PoleModel(nazwa=nazwa, powierzchnia=powierzchnia, gleba=gleba, plon=plon)
+        if pole.validate():
+            return False
+        try:
+            with self.polacz() as conn:
+                conn.execute(
+                    "INSERT INTO pola (nazwa, powierzchnia, gleba, plon_ubiegloroczny) VALUES (?, ?, ?, ?)",
+                    (pole.nazwa.strip(), pole.powierzchnia, pole.gleba, pole.plon)
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    @contextmanager
+    def _tryb_importu(self, conn: sqlite3.Connection):
+        '''WAL i szybsze pragmy na czas importu; poprzednie wartości wracają po zakończeniu'''
+        conn.execute("PRAGMA journal_mode = WAL")
+        poprzednie = {nazwa: conn.execute(f"PRAGMA {nazwa}").fetchone()[0] for nazwa in PRAGMY_IMPORTU}
+        for nazwa, wartosc in PRAGMY_IMPORTU.items():
+            conn.execute(f"PRAGMA {nazwa} = {wartosc}")
+        try:
+            yield
+        finally:
+            for nazwa, wartosc in poprzednie.items():
+                conn.execute(f"PRAGMA {nazwa} = {wartosc}")
+
+    def _importuj_partie(self, conn: sqlite3.Connection, porcja: PoleBatch, przesuniecie: int,
+                         raport: RaportImportu, maks_bledow: int):
+        maski = porcja.validate()
+        bledne = np.logical_or.reduce(list(maski.values()))
+
+        if bledne.any() and len(raport.bledy) < maks_bledow:
+            for komunikat, maska in maski.items():
+                for wiersz in np.flatnonzero(maska)[:maks_bledow - len(raport.bledy)]:
+                    raport.bledy.append((przesuniecie + int(wiersz), komunikat))
+
+        wiersze = list(porcja.filtruj(~bledne).to_rows())
+
+        conn.execute("BEGIN")
+        try:
+            # Indeks FTS uzupełniany raz na partię jest kilka razy szybszy niż trigger na każdy wiersz
+            with indeksuj_po_wstawieniu(conn, "pola"):
+                dodane = conn.executemany(
+                    "INSERT OR IGNORE INTO pola (nazwa, powierzchnia, gleba, plon_ubiegloroczny) VALUES (?, ?, ?, ?)",
+                    wiersze
+                ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        raport.dodane += dodane
+        raport.duplikaty += len(wiersze) - dodane
+        raport.odrzucone += int(bledne.sum())
+
+    def dodaj_pola_bulk(self, zrodlo: ZrodloPol, rozmiar_partii: int = 50_000,
+                        postep: Optional[Callable[[RaportImportu], None]] = None,
+                        maks_bledow: int = 100) -> RaportImportu:
+        '''Import wielu pól: walidacja maskami dla całej partii, executemany i jedna transakcja na partię
+
+        Źródłem może być DataFrame, ścieżka lub plik CSV albo iterowalna kolekcja słowników/PoleModel.
+        Błędne wiersze są pomijane (pierwsze maks_bledow trafia do raportu), a nazwy już istniejące
+        w bazie liczone jako duplikaty.
+        '''
+        raport = RaportImportu()
+        start = time.perf_counter()
+        przesuniecie = 0
+
+        with self.polacz() as conn:
+            # Transakcje partii prowadzimy ręcznie (BEGIN/COMMIT), bez niejawnych transakcji sqlite3
+            poprzednia_izolacja, conn.isolation_level = conn.isolation_level, None
+            try:
+                with self._tryb_importu(conn):
+                    for porcja in _porcje(zrodlo, rozmiar_partii):
+                        self._importuj_partie(conn, porcja, przesuniecie, raport, maks_bledow)
+                        przesuniecie += len(porcja)
+                        raport.czas_s = time.perf_counter() - start
+                        if postep is not None:
+                            postep(raport)
+            finally:
+                conn.isolation_level = poprzednia_izolacja
+
+        raport.czas_s = time.perf_counter() - start
+        return raport
+
+    @staticmethod
+    def _warunki_filtra(filtr: Optional[Dict]):
+        filtr = filtr or {}
+        warunki, params = [], []
+        if filtr.get('gleba'):
+            warunki.append("gleba = ?")
+            params.append(filtr['gleba'])
+        if filtr.get('min_plon') is not None:
+            warunki.append("plon_ubiegloroczny >= ?")
+            params.append(filtr['min_plon'])
+        if filtr.get('max_plon') is not None:
+            warunki.append("plon_ubiegloroczny <= ?")
+            params.append(filtr['max_plon'])
+        if filtr.get('nazwa'):
+            # Prefiks jako zakres - w przeciwieństwie do LIKE korzysta z indeksu UNIQUE(nazwa)
+            prefiks = filtr['nazwa']
+            warunki.append("nazwa >= ? AND nazwa < ?")
+            params.extend([prefiks, prefiks[:-1] + chr(ord(prefiks[-1]) + 1)])
+        return (" WHERE " + " AND ".join(warunki) if warunki else ""), params
+
+    def znajdz_pola(self, filtr: Optional[Dict] = None) -> List[Dict]:
+        '''Znajduje pola według filtrów (gleba, min_plon, max_plon, nazwa - prefiks)'''
+        warunki, params = self._warunki_filtra(filtr)
+        sql = ("SELECT id, nazwa, powierzchnia, gleba, plon_ubiegloroczny AS plon, created_at FROM pola"
+               + warunki + " ORDER BY nazwa")
+        with self.odczyt() as conn:
+            return [dict(wiersz) for wiersz in conn.execute(sql, params)]
+
+    def znajdz_pola_kolumnowo(self, filtr: Optional[Dict] = None) -> PoleBatch:
+        '''Jak znajdz_pola, ale wynik jako PoleBatch - bez słownika na każdy wiersz'''
+        warunki, params = self._warunki_filtra(filtr)
+        sql = "SELECT id, nazwa, powierzchnia, gleba, plon_ubiegloroczny FROM pola" + warunki + " ORDER BY nazwa"
+        with self.odczyt() as conn:
+            kursor = conn.cursor()
+            kursor.row_factory = None  # zwykłe krotki zamiast sqlite3.Row
+            return PoleBatch.from_rows(kursor.execute(sql, params).fetchall())
+
+    def szukaj(self, tekst: str, limit: int = 20) -> List[Trafienie]:
+        '''Wyszukiwanie pełnotekstowe w nazwach pól i opisach zabiegów, od najlepszego dopasowania (bm25)'''
+        with self.odczyt() as conn:
+            return szukaj(conn, tekst, limit)
+
+    def raport_miesieczny(self, rok: int, miesiac: int) -> Dict:
+        '''Generuje raport miesięczny: nowe pola i zabiegi (liczba, koszt) w danym miesiącu'''
+        poczatek = f"{rok:04d}-{miesiac:02d}-01"
+        koniec = f"{rok + miesiac // 12:04d}-{miesiac % 12 + 1:02d}-01"
+        with self.odczyt() as conn:
+            pola = conn.execute(
+                "SELECT COUNT(*) AS liczba, COALESCE(SUM(powierzchnia), 0) AS powierzchnia "
+                "FROM pola WHERE created_at >= ? AND created_at < ?",
+                (poczatek, koniec)
+            ).fetchone()
+            zabiegi = conn.execute(
+                "SELECT typ, COUNT(*) AS liczba, COALESCE(SUM(koszt), 0) AS koszt "
+                "FROM zabiegi WHERE data >= ? AND data < ? GROUP BY typ ORDER BY typ",
+                (poczatek, koniec)
+            ).fetchall()
+        return {
+            "rok": rok,
+            "miesiac": miesiac,
+            "nowe_pola": pola['liczba'],
+            "nowa_powierzchnia": pola['powierzchnia'],
+            "zabiegi": {z['typ']: {"liczba": z['liczba'], "koszt": z['koszt']} for z in zabiegi},
+            "koszt_zabiegow": sum(z['koszt'] for z in zabiegi),
+        }
+
+    def backup_bazy(self, sciezka_backupu: str, kompresja: bool = False, zachowaj: Optional[int] = None,
+                    strony_na_krok: int = 1024, pauza_s: float = 0.0) -> KopiaZapasowa:
+        '''Tworzy backup bazy z weryfikacją (backup online krokami, integrity_check, SHA-256)
+
+        Z `zachowaj=N` sciezka_backupu jest katalogiem rotowanych migawek (N najnowszych).
+        '''
+        with self.odczyt() as zrodlo:
+            return utworz_kopie(zrodlo, sciezka_backupu, kompresja=kompresja, zachowaj=zachowaj,
+                                strony_na_krok=strony_na_krok, pauza_s=pauza_s)
@@ -0,0 +1,127 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import tokenize
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from narzedzia.wyniki import WynikOceny
+
+# Wyniki zależne od obciążenia serwera (limit czasu, awaria procesu) nie trafiają do cache
+STATUSY_DETERMINISTYCZNE = ("ok", "blad")
+
+
+# Tokeny, których treść może przechodzić przez koniec linii (f-stringi od Pythona 3.12 mają własne)
+TOKENY_NAPISOW = {tokenize.STRING, getattr(tokenize, "FSTRING_MIDDLE", tokenize.STRING)}
+
+
+def _linie_w_napisach(kod: str) -> Set[int]:
+    '''Numery linii (od 1), których koniec leży wewnątrz wielolinijkowego napisu'''
+    chronione: Set[int] = set()
+    for token in tokenize.generate_tokens(io.StringIO(kod).readline):
+        if token.type in TOKENY_NAPISOW and token.end[0] > token.start[0]:
+            chronione.update(range(token.start[0], token.end[0]))
+    return chronione
+
+
+def normalizuj_kod(kod: str) -> str:
+    '''Usuwa różnice bez znaczenia: końce linii, spacje na końcach linii (poza napisami), puste linie na końcu'''
+    kod = kod.replace("\r\n", "\n").replace("\r", "\n")
+    try:
+        chronione = _linie_w_napisach(kod)
+    except (tokenize.TokenError, SyntaxError):
+        # Kodu, którego nie da się podzielić na tokeny, nie ruszamy poza końcami linii
+        return kod.strip("\n")
+    linie = kod.split("\n")
+    return "\n".join(linia if numer in chronione else linia.rstrip()
+                     for numer, linia in enumerate(linie, start=1)).strip("\n")
+
+
+class CacheOcen:
+    '''Cache wyników oceniania adresowany skrótem (zgłoszenie, testy, lekcja) z wymianą LRU'''
+
+    def __init__(self, maks_wpisow: int = 1024, katalog: Optional[Path] = None):
+        self.maks_wpisow = maks_wpisow
+        self.katalog = Path(katalog) if katalog else None
+        if self.katalog:
+            self.katalog.mkdir(parents=True, exist_ok=True)
+        self._wpisy: "OrderedDict[str, WynikOceny]" = OrderedDict()
+        self._blokada = threading.Lock()
+        self.trafienia = 0
+        self.chybienia = 0
+
+    @staticmethod
+    def klucz(lekcja_id: str, kod: str, testy: str, *opcje: str) -> str:
+        skrot = hashlib.sha256()
+        for czesc in (lekcja_id, normalizuj_kod(kod), testy, *opcje):
+            skrot.update(czesc.encode("utf-8"))
+            skrot.update(b"\0")
+        return skrot.hexdigest()
+
+    def _sciezka(self, klucz: str) -> Path:
+        return self.katalog / klucz[:2] / f"{klucz}.json"
+
+    def _wstaw(self, klucz: str, wynik: WynikOceny):
+        self._wpisy[klucz] = wynik
+        self._wpisy.move_to_end(klucz)
+        while len(self._wpisy) > self.maks_wpisow:
+            self._wpisy.popitem(last=False)
+
+    def pobierz(self, klucz: str) -> Optional[WynikOceny]:
+        with self._blokada:
+            wynik = self._wpisy.get(klucz)
+            if wynik is not None:
+                self._wpisy.move_to_end(klucz)
+                self.trafienia += 1
+                return wynik
+
+        if self.katalog:
+            try:
+                wynik = WynikOceny.from_dict(json.loads(self._sciezka(klucz).read_text(encoding="utf-8")))
+            except (OSError, ValueError, TypeError):
+                wynik = None
+            if wynik is not None:
+                with self._blokada:
+                    self._wstaw(klucz, wynik)
+                    self.trafienia += 1
+                return wynik
+
+        with self._blokada:
+            self.chybienia += 1
+        return None
+
+    def zapisz(self, klucz: str, wynik: WynikOceny):
+        if wynik.status not in STATUSY_DETERMINISTYCZNE:
+            return
+        with self._blokada:
+            self._wstaw(klucz, wynik)
+
+        if self.katalog:
+            sciezka = self._sciezka(klucz)
+            sciezka.parent.mkdir(exist_ok=True)
+            # Zapis atomowy - równoległe sesje nie zobaczą połowy pliku
+            fd, tymczasowy = tempfile.mkstemp(dir=sciezka.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(wynik.to_json())
+            os.replace(tymczasowy, sciezka)
+
+    def wyczysc(self):
+        with self._blokada:
+            self._wpisy.clear()
+            self.trafienia = 0
+            self.chybienia = 0
+
+    def statystyki(self) -> Dict[str, Any]:
+        with self._blokada:
+            zapytania = self.trafienia + self.chybienia
+            return {
+                "wpisy": len(self._wpisy),
+                "maks_wpisow": self.maks_wpisow,
+                "trafienia": self.trafienia,
+                "chybienia": self.chybienia,
+                "skutecznosc": self.trafienia / zapytania if zapytania else 0.0,
+            }
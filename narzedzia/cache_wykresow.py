@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Domyślny limit pamięci cache (MB) - nadpisywany zmienną KURS_CACHE_WYKRESOW_MB
+MAKS_MB = 64
+
+
+class CacheWykresow:
+    '''Wykresy Plotly przechowywane jako JSON; klucz np. (wersja danych, filtry, typ wykresu), limit w bajtach, wymiana LRU'''
+
+    def __init__(self, maks_bajtow: int = MAKS_MB * 1024 * 1024):
+        self.maks_bajtow = maks_bajtow
+        self.bajty = 0
+        self._wpisy: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._blokada = threading.Lock()
+        self.trafienia = 0
+        self.chybienia = 0
+        self.wywlaszczenia = 0
+
+    def wykres(self, klucz: Hashable, utworz: Callable[[], "go.Figure"]) -> "go.Figure":
+        '''Wykres spod klucza; przy chybieniu budowany przez utworz() i zapamiętywany'''
+        # Plotly ładujemy dopiero przy pierwszym wykresie (jak lekcja 7)
+        import plotly.graph_objects as go
+
+        with self._blokada:
+            spec = self._wpisy.get(klucz)
+            if spec is not None:
+                self._wpisy.move_to_end(klucz)
+                self.trafienia += 1
+            else:
+                self.chybienia += 1
+
+        if spec is None:
+            fig = utworz()
+            spec = fig.to_json().encode("utf-8")
+            self._zapisz(klucz, spec)
+            return fig
+        # JSON pochodzi z Plotly, więc walidacja (dziesiątki ms przy każdym odczycie) jest zbędna
+        return go.Figure(json.loads(spec), _validate=False)
+
+    def _zapisz(self, klucz: Hashable, spec: bytes):
+        rozmiar = len(spec)
+        if rozmiar > self.maks_bajtow:
+            return  # pojedynczy wykres większy niż cały cache - nie wypychamy dla niego wszystkiego
+        with self._blokada:
+            poprzedni = self._wpisy.pop(klucz, None)
+            if poprzedni is not None:
+                self.bajty -= len(poprzedni)
+            self._wpisy[klucz] = spec
+            self.bajty += rozmiar
+            while self.bajty > self.maks_bajtow:
+                _, usuniety = self._wpisy.popitem(last=False)
+                self.bajty -= len(usuniety)
+                self.wywlaszczenia += 1
+
+    def wyczysc(self):
+        with self._blokada:
+            self._wpisy.clear()
+            self.bajty = 0
+
+    def statystyki(self) -> Dict:
+        with self._blokada:
+            zapytania = self.trafienia + self.chybienia
+            return {
+                "wpisy": len(self._wpisy),
+                "bajty": self.bajty,
+                "maks_bajtow": self.maks_bajtow,
+                "trafienia": self.trafienia,
+                "chybienia": self.chybienia,
+                "wywlaszczenia": self.wywlaszczenia,
+                "skutecznosc": self.trafienia / zapytania if zapytania else 0.0,
+            }
+
+
+_cache: Optional[CacheWykresow] = None
+_blokada = threading.Lock()
+
+
+def cache_wykresow() -> CacheWykresow:
+    '''Współdzielony cache wykresów (jeden na proces serwera - dane dashboardu też są wspólne)'''
+    global _cache
+    if _cache is None:
+        with _blokada:
+            if _cache is None:
+                maks_mb = float(os.environ.get("KURS_CACHE_WYKRESOW_MB", MAKS_MB))
+                _cache = CacheWykresow(maks_bajtow=int(maks_mb * 1024 * 1024))
+    return _cache
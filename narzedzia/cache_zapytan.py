@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+import pandas as pd
+
+
+class CacheZapytan:
+    '''Cache wyników zapytań SQL (klucz: SQL i parametry) unieważniany licznikami wersji tabel, z wymianą LRU'''
+
+    def __init__(self, maks_wpisow: int = 64):
+        self.maks_wpisow = maks_wpisow
+        self.wersje: Dict[str, int] = {}
+        self._wpisy: "OrderedDict[Tuple[str, Tuple], Tuple[Tuple[Tuple[str, int], ...], pd.DataFrame]]" = OrderedDict()
+        self._blokada = threading.Lock()
+        self.trafienia = 0
+        self.chybienia = 0
+        self.uniewaznienia = 0
+        self.wywlaszczenia = 0
+
+    def zmieniono(self, *tabele: str):
+        '''Podbija wersję tabel po INSERT/UPDATE/DELETE - zależne wpisy przestają być aktualne'''
+        with self._blokada:
+            for tabela in tabele:
+                self.wersje[tabela] = self.wersje.get(tabela, 0) + 1
+
+    def _wersje(self, tabele: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+        return tuple((tabela, self.wersje.get(tabela, 0)) for tabela in sorted(tabele))
+
+    def zapytanie(self, conn: sqlite3.Connection, sql: str, params: Sequence[Any] = (),
+                  tabele: Iterable[str] = ("pola",)) -> pd.DataFrame:
+        '''Wynik zapytania jako DataFrame (współdzielony między wywołaniami - nie modyfikować)'''
+        klucz = (sql, tuple(params))
+        with self._blokada:
+            wersje = self._wersje(tabele)
+            wpis = self._wpisy.get(klucz)
+            if wpis is not None:
+                if wpis[0] == wersje:
+                    self._wpisy.move_to_end(klucz)
+                    self.trafienia += 1
+                    return wpis[1]
+                del self._wpisy[klucz]
+                self.uniewaznienia += 1
+            self.chybienia += 1
+
+        df = pd.read_sql_query(sql, conn, params=list(params))
+
+        with self._blokada:
+            self._wpisy[klucz] = (wersje, df)
+            self._wpisy.move_to_end(klucz)
+            while len(self._wpisy) > self.maks_wpisow:
+                self._wpisy.popitem(last=False)
+                self.wywlaszczenia += 1
+        return df
+
+    def wyczysc(self):
+        with self._blokada:
+            self._wpisy.clear()
+            self.trafienia = 0
+            self.chybienia = 0
+            self.uniewaznienia = 0
+            self.wywlaszczenia = 0
+
+    def statystyki(self) -> Dict[str, Any]:
+        with self._blokada:
+            zapytania = self.trafienia + self.chybienia
+            return {
+                "wpisy": len(self._wpisy),
+                "maks_wpisow": self.maks_wpisow,
+                "trafienia": self.trafienia,
+                "chybienia": self.chybienia,
+                "uniewaznienia": self.uniewaznienia,
+                "wywlaszczenia": self.wywlaszczenia,
+                "skutecznosc": self.trafienia / zapytania if zapytania else 0.0,
+            }
@@ -0,0 +1,181 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MIESIACE = ['Sty', 'Lut', 'Mar', 'Kwi', 'Maj', 'Cze', 'Lip', 'Sie', 'Wrz', 'Paź', 'Lis', 'Gru']
+METRYKI = ['plon', 'koszt', 'cena']
+
+# Średnia i odchylenie przykładowych danych dla każdej metryki
+ROZKLADY = {'plon': (8, 1.5), 'koszt': (1200, 300), 'cena': (850, 100)}
+
+# Po tylu sekundach dane są wczytywane ponownie przy następnym odświeżeniu dashboardu
+TTL_S = 600.0
+
+
+def generuj_historie(lata: Sequence[int] = range(2015, 2025), liczba_pol: int = 400, seed: int = 42) -> pd.DataFrame:
+    '''Przykładowa historia gospodarstwa: każda metryka dla każdego pola, miesiąca i roku (format długi)'''
+    rng = np.random.default_rng(seed)
+    ksztalt = (len(lata), len(METRYKI), len(MIESIACE), liczba_pol)
+    srednie = np.array([ROZKLADY[typ][0] for typ in METRYKI])[None, :, None, None]
+    odchylenia = np.array([ROZKLADY[typ][1] for typ in METRYKI])[None, :, None, None]
+    wartosci = rng.normal(srednie, odchylenia, ksztalt)
+
+    rok, typ, miesiac, pole = np.indices(ksztalt).reshape(4, -1)
+    return pd.DataFrame({
+        'rok': pd.Categorical.from_codes(rok, [str(r) for r in lata], ordered=True),
+        'typ': pd.Categorical.from_codes(typ, METRYKI),
+        'miesiac': pd.Categorical.from_codes(miesiac, MIESIACE, ordered=True),
+        'pole': pole.astype(np.int32),
+        'wartosc': wartosci.reshape(-1),
+    })
+
+
+class DaneDashboardu:
+    '''Dane dashboardu wczytane raz: ramka indeksowana (rok, typ, miesiac) i sumy dla każdej takiej trójki
+
+    Średnie, trend i mapa cieplna dla dowolnego wyboru lat i metryk liczą się z tablic
+    sum i liczności o rozmiarze lata x metryki x miesiące - bez filtrowania surowych wierszy.
+    '''
+
+    def __init__(self, df: pd.DataFrame, wersja: int = 0):
+        self.wersja = wersja
+        kolumny = {nazwa: df[nazwa].astype('category') for nazwa in ('rok', 'typ', 'miesiac')}
+        self.lata: List[str] = [str(r) for r in kolumny['rok'].cat.categories]
+        self.metryki: List[str] = list(kolumny['typ'].cat.categories)
+        self.miesiace: List[str] = list(kolumny['miesiac'].cat.categories)
+        ksztalt = (len(self.lata), len(self.metryki), len(self.miesiace))
+        liczba_grup = int(np.prod(ksztalt))
+
+        # Numer grupy (rok, typ, miesiąc); po stabilnym sortowaniu każda grupa to ciągły wycinek
+        grupy = np.ravel_multi_index([kolumny[n].cat.codes.to_numpy() for n in ('rok', 'typ', 'miesiac')], ksztalt)
+        kolejnosc = np.argsort(grupy, kind='stable')
+        self.ramka = df.assign(**kolumny).iloc[kolejnosc].set_index(['rok', 'typ', 'miesiac'])
+        self.wartosci = self.ramka['wartosc'].to_numpy(dtype=np.float64)
+
+        grupy = grupy[kolejnosc]
+        self.granice = np.searchsorted(grupy, np.arange(liczba_grup + 1))
+        self.sumy = np.bincount(grupy, weights=self.wartosci, minlength=liczba_grup).reshape(ksztalt)
+        self.liczby = np.bincount(grupy, minlength=liczba_grup).reshape(ksztalt)
+
+    def _pozycje(self, lata: Sequence[str], metryki: Sequence[str]):
+        return ([self.lata.index(r) for r in lata if r in self.lata],
+                [self.metryki.index(t) for t in metryki if t in self.metryki])
+
+    def srednie(self, lata: Sequence[str], metryki: Sequence[str]) -> Dict[str, float]:
+        '''Średnia każdej wybranej metryki w wybranych latach (NaN gdy brak danych)'''
+        pozycje_lat, _ = self._pozycje(lata, metryki)
+        wynik = {}
+        for typ in metryki:
+            if typ not in self.metryki:
+                continue
+            t = self.metryki.index(typ)
+            liczba = self.liczby[pozycje_lat, t].sum()
+            wynik[typ] = self.sumy[pozycje_lat, t].sum() / liczba if liczba else np.nan
+        return wynik
+
+    def trend(self, lata: Sequence[str], metryki: Sequence[str]) -> pd.DataFrame:
+        '''Średnia miesięczna każdej metryki w każdym roku - po jednym punkcie na (rok, typ, miesiąc)'''
+        pozycje_lat, pozycje_metryk = self._pozycje(lata, metryki)
+        sumy = self.sumy[np.ix_(pozycje_lat, pozycje_metryk)]
+        liczby = self.liczby[np.ix_(pozycje_lat, pozycje_metryk)]
+        indeks = pd.MultiIndex.from_product(
+            [[self.lata[i] for i in pozycje_lat], [self.metryki[i] for i in pozycje_metryk], self.miesiace],
+            names=['rok', 'typ', 'miesiac']
+        )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            srednie = (sumy / liczby).reshape(-1)
+        return pd.DataFrame({'wartosc': srednie}, index=indeks).reset_index()
+
+    def mapa_cieplna(self, lata: Sequence[str], metryki: Sequence[str]) -> pd.DataFrame:
+        '''Średnia wybranych metryk: wiersze - miesiące, kolumny - lata'''
+        pozycje_lat, pozycje_metryk = self._pozycje(lata, metryki)
+        sumy = self.sumy[np.ix_(pozycje_lat, pozycje_metryk)].sum(axis=1)
+        liczby = self.liczby[np.ix_(pozycje_lat, pozycje_metryk)].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            srednie = sumy / liczby
+        return pd.DataFrame(srednie.T, index=pd.Index(self.miesiace, name='miesiac'),
+                            columns=pd.Index([self.lata[i] for i in pozycje_lat], name='rok'))
+
+    def wartosci_metryki(self, typ: str, lata: Sequence[str]) -> np.ndarray:
+        '''Surowe wartości metryki z wybranych lat (np. do histogramu) - wycinki bez maski logicznej'''
+        if typ not in self.metryki:
+            return np.empty(0)
+        pozycje_lat, _ = self._pozycje(lata, [])
+        t, liczba_miesiecy = self.metryki.index(typ), len(self.miesiace)
+        wycinki = []
+        for r in pozycje_lat:
+            pierwsza = (r * len(self.metryki) + t) * liczba_miesiecy
+            wycinki.append(self.wartosci[self.granice[pierwsza]:self.granice[pierwsza + liczba_miesiecy]])
+        return np.concatenate(wycinki) if wycinki else np.empty(0)
+
+
+@dataclass
+class OdczytyCzujnikow:
+    '''Serie z czujników w pełnej rozdzielczości, posortowane po czasie'''
+    czas: np.ndarray  # datetime64[m]
+    serie: Dict[str, np.ndarray]
+    wersja: int = 0
+
+
+def generuj_odczyty(liczba: int = 2_000_000, poczatek: str = "2021-01-01", seed: int = 42) -> OdczytyCzujnikow:
+    '''Przykładowe odczyty co minutę: plon i koszt jako błądzenie losowe wokół cyklu rocznego'''
+    rng = np.random.default_rng(seed)
+    czas = np.datetime64(poczatek, "m") + np.arange(liczba).astype("timedelta64[m]")
+    dzien_roku = (czas - czas.astype("datetime64[Y]")).astype("timedelta64[D]").astype(np.float64)
+    sezon = np.sin(2 * np.pi * (dzien_roku - 80) / 365.25)
+    serie = {}
+    for typ in ('plon', 'koszt'):
+        srednia, odchylenie = ROZKLADY[typ]
+        bladzenie = np.cumsum(rng.normal(0, odchylenie / 300, liczba))
+        serie[typ] = srednia + odchylenie * sezon + bladzenie - np.linspace(0, bladzenie[-1], liczba)
+    return OdczytyCzujnikow(czas, serie)
+
+
+KOLUMNY_POGODY = ['Plon', 'Temperatura', 'Opady', 'Wilgotność']
+
+
+def generuj_pomiary_pogody(liczba: int, seed: int = 0) -> pd.DataFrame:
+    '''Przykładowe odczyty stacji pogodowej powiązane z plonem (opady i wilgotność podnoszą plon, upał obniża)'''
+    rng = np.random.default_rng(seed)
+    temperatura = rng.normal(18, 5, liczba)
+    opady = np.clip(rng.normal(50, 20, liczba), 0, None)
+    wilgotnosc = np.clip(40 + 0.4 * opady + rng.normal(0, 10, liczba), 0, 100)
+    plon = 8 + 0.03 * (opady - 50) - 0.08 * (temperatura - 18) + 0.01 * (wilgotnosc - 60) + rng.normal(0, 1, liczba)
+    return pd.DataFrame(dict(zip(KOLUMNY_POGODY, (plon, temperatura, opady, wilgotnosc))))
+
+
+_wspoldzielone: Dict[str, Tuple[float, object]] = {}
+_blokada = threading.Lock()
+
+
+def _wspoldzielony(klucz: str, ttl_s: float, utworz: Callable[[int], object]):
+    '''Obiekt jeden na proces serwera, tworzony ponownie (z nową wersją) po ttl_s sekundach'''
+    wpis = _wspoldzielone.get(klucz)
+    if wpis is None or time.monotonic() - wpis[0] > ttl_s:
+        with _blokada:
+            wpis = _wspoldzielone.get(klucz)
+            if wpis is None or time.monotonic() - wpis[0] > ttl_s:
+                wersja = wpis[1].wersja + 1 if wpis is not None else 1
+                wpis = (time.monotonic(), utworz(wersja))
+                _wspoldzielone[klucz] = wpis
+    return wpis[1]
+
+
+def dane_dashboardu(ttl_s: float = TTL_S,
+                    wczytaj: Callable[[], pd.DataFrame] = generuj_historie) -> DaneDashboardu:
+    '''Współdzielone dane dashboardu (jedne na proces serwera), wczytywane ponownie po ttl_s sekundach'''
+    return _wspoldzielony("dane", ttl_s, lambda wersja: DaneDashboardu(wczytaj(), wersja))
+
+
+def odczyty_czujnikow(ttl_s: float = TTL_S,
+                      wczytaj: Callable[[], OdczytyCzujnikow] = generuj_odczyty) -> OdczytyCzujnikow:
+    '''Współdzielone odczyty czujników w pełnej rozdzielczości (na wykres trafiają po próbkowaniu)'''
+    def utworz(wersja: int) -> OdczytyCzujnikow:
+        odczyty = wczytaj()
+        odczyty.wersja = wersja
+        return odczyty
+    return _wspoldzielony("odczyty", ttl_s, utworz)
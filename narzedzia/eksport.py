@@ -0,0 +1,86 @@
+import gzip
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import Callable, IO, Iterable, Optional
+
+import pandas as pd
+
+FORMATY = ("ndjson", "json")
+
+# Powyżej tego rozmiaru plik tymczasowy przenosi się z pamięci na dysk
+MAKS_PAMIECI_EKSPORTU = 8 * 1024 * 1024
+
+
+@dataclass
+class WynikEksportu:
+    plik: IO[bytes]
+    liczba_wierszy: int
+    rozmiar_bajtow: int
+    nazwa_pliku: str
+    mime: str
+
+    def odczytaj(self) -> bytes:
+        '''Zwraca zawartość pliku i zamyka go - cały eksport naraz w pamięci, tylko dla małych plików'''
+        with self.plik:
+            self.plik.seek(0)
+            return self.plik.read()
+
+    def pobierz(self) -> IO[bytes]:
+        '''Plik od początku - do st.download_button(data=wynik.pobierz) wywoływanego dopiero przy kliknięciu
+
+        Do kliknięcia eksport leży w pliku tymczasowym (powyżej maks_pamieci na dysku). Streamlit i tak
+        wczytuje pobierany plik do pamięci w całości, więc szczyt zużycia to jedna kopia eksportu.
+        '''
+        self.plik.seek(0)
+        return self.plik
+
+
+def _porcja_json(porcja: pd.DataFrame, format: str) -> str:
+    if format == "ndjson":
+        tekst = porcja.to_json(orient='records', lines=True, force_ascii=False)
+        return tekst if tekst.endswith("\n") else tekst + "\n"
+    # Tablica JSON porcji bez nawiasów - porcje sklejamy przecinkami
+    return porcja.to_json(orient='records', force_ascii=False)[1:-1]
+
+
+def eksportuj_json(porcje: Iterable[pd.DataFrame], format: str = "ndjson", kompresja: bool = False,
+                   nazwa: str = "dane", maks_pamieci: int = MAKS_PAMIECI_EKSPORTU,
+                   postep: Optional[Callable[[int], None]] = None) -> WynikEksportu:
+    '''Zapisuje porcje DataFrame jako NDJSON lub zwartą tablicę JSON do pliku tymczasowego (opcjonalnie gzip)'''
+    if format not in FORMATY:
+        raise ValueError(f"Nieznany format eksportu: {format} (dostępne: {', '.join(FORMATY)})")
+
+    plik = SpooledTemporaryFile(max_size=maks_pamieci)
+    wyjscie = gzip.GzipFile(fileobj=plik, mode='wb') if kompresja else plik
+    liczba_wierszy = 0
+    try:
+        if format == "json":
+            wyjscie.write(b"[")
+        for porcja in porcje:
+            if porcja.empty:
+                continue
+            if format == "json" and liczba_wierszy:
+                wyjscie.write(b",")
+            wyjscie.write(_porcja_json(porcja, format).encode("utf-8"))
+            liczba_wierszy += len(porcja)
+            if postep is not None:
+                postep(liczba_wierszy)
+        if format == "json":
+            wyjscie.write(b"]")
+        if kompresja:
+            wyjscie.close()
+    except BaseException:
+        plik.close()
+        raise
+
+    rozmiar = plik.tell()
+    plik.seek(0)
+    rozszerzenie = "json" if format == "json" else "ndjson"
+    return WynikEksportu(
+        plik=plik,
+        liczba_wierszy=liczba_wierszy,
+        rozmiar_bajtow=rozmiar,
+        nazwa_pliku=f"{nazwa}.{rozszerzenie}" + (".gz" if kompresja else ""),
+        mime="application/gzip" if kompresja else
+             ("application/json" if format == "json" else "application/x-ndjson"),
+    )
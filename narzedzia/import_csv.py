@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+WYMAGANE_KOLUMNY = {'pole', 'plon', 'powierzchnia'}
+
+# Kolumny liczbowe, które muszą być dodatnie
+KOLUMNY_DODATNIE = ('plon', 'powierzchnia')
+
+
+class ZakresyBledow:
+    '''Numery błędnych wierszy zapisane jako zakresy (run-length) z limitem przechowywanych zakresów'''
+
+    def __init__(self, maks_zakresow: int = 20):
+        self.maks_zakresow = maks_zakresow
+        self.liczba = 0
+        self.zakresy: List[List[int]] = []
+        self.pominiete_zakresy = 0
+
+    def dodaj(self, wiersze: np.ndarray):
+        '''Dodaje posortowane rosnąco numery wierszy (kolejne porcje muszą być coraz dalej w pliku)'''
+        if len(wiersze) == 0:
+            return
+        self.liczba += len(wiersze)
+
+        przerwy = np.flatnonzero(np.diff(wiersze) != 1)
+        poczatki = np.concatenate(([wiersze[0]], wiersze[przerwy + 1]))
+        konce = np.concatenate((wiersze[przerwy], [wiersze[-1]]))
+
+        # Zakres ciągnący się z poprzedniej porcji
+        start = 0
+        if self.zakresy and self.zakresy[-1][1] + 1 == poczatki[0]:
+            self.zakresy[-1][1] = int(konce[0])
+            start = 1
+
+        wolne = max(0, self.maks_zakresow - len(self.zakresy))
+        for poczatek, koniec in zip(poczatki[start:start + wolne], konce[start:start + wolne]):
+            self.zakresy.append([int(poczatek), int(koniec)])
+        self.pominiete_zakresy += max(0, len(poczatki) - start - wolne)
+
+    def __bool__(self) -> bool:
+        return self.liczba > 0
+
+    def __str__(self) -> str:
+        opis = ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in self.zakresy)
+        if self.pominiete_zakresy:
+            opis += f" … (+{self.pominiete_zakresy} zakresów)"
+        return opis
+
+
+@dataclass
+class RaportWalidacji:
+    liczba_wierszy: int = 0
+    brakujace_kolumny: Set[str] = field(default_factory=set)
+    bledy: Dict[str, ZakresyBledow] = field(default_factory=dict)
+    podglad: Optional[pd.DataFrame] = None
+
+
+def waliduj_csv_strumieniowo(zrodlo, rozmiar_porcji: int = 100_000, rozmiar_bajtow: Optional[int] = None,
+                             postep: Optional[Callable[[float, int], None]] = None,
+                             wiersze_podgladu: int = 100) -> RaportWalidacji:
+    '''Czyta CSV porcjami stałej wielkości i waliduje każdą porcję maskami wektorowymi'''
+    raport = RaportWalidacji(bledy={kolumna: ZakresyBledow() for kolumna in KOLUMNY_DODATNIE})
+
+    for porcja in pd.read_csv(zrodlo, chunksize=rozmiar_porcji):
+        if raport.podglad is None:
+            raport.podglad = porcja.head(wiersze_podgladu)
+            raport.brakujace_kolumny = WYMAGANE_KOLUMNY - set(porcja.columns)
+
+        przesuniecie = raport.liczba_wierszy
+        for kolumna in KOLUMNY_DODATNIE:
+            if kolumna in porcja.columns:
+                wartosci = pd.to_numeric(porcja[kolumna], errors='coerce').to_numpy(dtype=np.float64)
+                # NaN po konwersji przy niepustej wartości w pliku to tekst zamiast liczby - też błąd
+                nieliczbowe = np.isnan(wartosci) & porcja[kolumna].notna().to_numpy()
+                raport.bledy[kolumna].dodaj(np.flatnonzero((wartosci <= 0) | nieliczbowe) + przesuniecie)
+        raport.liczba_wierszy += len(porcja)
+
+        if postep is not None:
+            ulamek = min(zrodlo.tell() / rozmiar_bajtow, 1.0) if rozmiar_bajtow else 0.0
+            postep(ulamek, raport.liczba_wierszy)
+
+    return raport
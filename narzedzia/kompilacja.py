@@ -0,0 +1,50 @@
+import ast
+from functools import lru_cache
+from types import CodeType
+from typing import FrozenSet, Tuple
+
+# Moduły, których kod studenta nie potrzebuje w żadnej lekcji
+ZABRONIONE_IMPORTY: FrozenSet[str] = frozenset({
+    "ctypes", "multiprocessing", "resource", "signal", "socket", "subprocess",
+})
+
+
+@lru_cache(maxsize=512)
+def skompiluj(zrodlo: str, nazwa_pliku: str) -> CodeType:
+    '''Kompiluje kod raz na proces - kolejne wywołania z tym samym źródłem trafiają w cache'''
+    return compile(zrodlo, nazwa_pliku, "exec")
+
+
+def _importowane_moduly(drzewo: ast.AST):
+    for wezel in ast.walk(drzewo):
+        if isinstance(wezel, ast.Import):
+            for alias in wezel.names:
+                yield wezel.lineno, alias.name.split(".")[0]
+        elif isinstance(wezel, ast.ImportFrom) and wezel.module and not wezel.level:
+            yield wezel.lineno, wezel.module.split(".")[0]
+        elif (isinstance(wezel, ast.Call) and isinstance(wezel.func, ast.Name)
+              and wezel.func.id == "__import__" and wezel.args
+              and isinstance(wezel.args[0], ast.Constant) and isinstance(wezel.args[0].value, str)):
+            yield wezel.lineno, wezel.args[0].value.split(".")[0]
+
+
+@lru_cache(maxsize=1024)
+def sprawdz_zgloszenie(kod: str, wymagane_klasy: Tuple[str, ...] = (),
+                       zabronione_importy: FrozenSet[str] = ZABRONIONE_IMPORTY) -> Tuple[str, ...]:
+    '''Szybka kontrola na poziomie AST przed uruchomieniem piaskownicy - zwraca listę problemów'''
+    try:
+        drzewo = ast.parse(kod, "<zgloszenie>")
+    except SyntaxError as e:
+        return (f"Błąd składni w linii {e.lineno}: {e.msg}",)
+
+    problemy = []
+    for linia, modul in _importowane_moduly(drzewo):
+        if modul in zabronione_importy:
+            problemy.append(f"Niedozwolony import modułu `{modul}` (linia {linia})")
+
+    zdefiniowane = {w.name for w in drzewo.body if isinstance(w, ast.ClassDef)}
+    for klasa in wymagane_klasy:
+        if klasa not in zdefiniowane:
+            problemy.append(f"Brak wymaganej klasy `{klasa}`")
+
+    return tuple(problemy)
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+ROZMIAR_BLOKU = 1024 * 1024
+ROZSZERZENIE_SUMY = ".sha256"
+
+
+class BladKopiiZapasowej(Exception):
+    pass
+
+
+@dataclass
+class KopiaZapasowa:
+    sciezka: Path
+    sha256: str
+    rozmiar_bajtow: int
+    strony: int
+    czas_s: float
+
+
+def sha256_pliku(sciezka: Union[str, Path]) -> str:
+    skrot = hashlib.sha256()
+    with open(sciezka, "rb") as plik:
+        for blok in iter(lambda: plik.read(ROZMIAR_BLOKU), b""):
+            skrot.update(blok)
+    return skrot.hexdigest()
+
+
+def _sciezka_sumy(sciezka: Path) -> Path:
+    return sciezka.with_name(sciezka.name + ROZSZERZENIE_SUMY)
+
+
+def zweryfikuj_kopie(sciezka: Union[str, Path]) -> bool:
+    '''Porównuje plik kopii z sumą zapisaną obok (format zgodny z sha256sum -c)'''
+    sciezka = Path(sciezka)
+    try:
+        zapisana = _sciezka_sumy(sciezka).read_text(encoding="utf-8").split()[0]
+    except (OSError, IndexError):
+        return False
+    return sha256_pliku(sciezka) == zapisana
+
+
+def _kopiuj_online(zrodlo: sqlite3.Connection, cel: Path, strony_na_krok: int, pauza_s: float,
+                   postep: Optional[Callable[[int, int], None]]) -> int:
+    '''Kopiuje bazę API backupu SQLite bez zatrzymywania aplikacji
+
+    W trybie dziennika rollback kopiujemy po strony_na_krok stron z pauzą - między krokami inni
+    mogą pisać. W trybie WAL zapis innego połączenia między krokami restartuje kopię od początku
+    (przy ciągłych zapisach nie skończyłaby się nigdy), a czytanie migawki WAL i tak nie blokuje
+    pisarzy - dlatego kopiujemy w jednym kroku.
+    '''
+    if zrodlo.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+        strony_na_krok = -1
+    przebieg = {"strony": 0}
+
+    def raportuj(status, pozostalo, wszystkie):
+        przebieg["strony"] = wszystkie
+        if postep is not None:
+            postep(wszystkie - pozostalo, wszystkie)
+
+    polaczenie_celu = sqlite3.connect(cel)
+    try:
+        zrodlo.backup(polaczenie_celu, pages=strony_na_krok, progress=raportuj, sleep=pauza_s)
+        wynik = polaczenie_celu.execute("PRAGMA integrity_check").fetchall()
+        if wynik != [("ok",)]:
+            raise BladKopiiZapasowej(f"Kopia nie przeszła integrity_check: {wynik[:5]}")
+        # Kopia ma być pojedynczym plikiem, niezależnie od trybu dziennika źródła
+        polaczenie_celu.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        polaczenie_celu.close()
+    return przebieg["strony"]
+
+
+def _rotuj(katalog: Path, prefiks: str, zachowaj: int) -> List[Path]:
+    kopie = sorted(p for p in katalog.glob(f"{prefiks}-*") if not p.name.endswith(ROZSZERZENIE_SUMY))
+    usuniete = kopie[:-zachowaj] if zachowaj > 0 else kopie
+    for sciezka in usuniete:
+        sciezka.unlink(missing_ok=True)
+        _sciezka_sumy(sciezka).unlink(missing_ok=True)
+    return usuniete
+
+
+def utworz_kopie(zrodlo: sqlite3.Connection, sciezka: Union[str, Path], kompresja: bool = False,
+                 zachowaj: Optional[int] = None, strony_na_krok: int = 1024, pauza_s: float = 0.0,
+                 postep: Optional[Callable[[int, int], None]] = None) -> KopiaZapasowa:
+    '''Kopia bazy: backup online krokami, integrity_check, opcjonalnie gzip, suma SHA-256 obok pliku
+
+    Bez `zachowaj` kopia trafia dokładnie do `sciezka`. Z `zachowaj=N` `sciezka` jest katalogiem
+    migawek: plik dostaje znacznik czasu, a starsze migawki ponad N najnowszych są usuwane.
+    '''
+    start = time.perf_counter()
+    sciezka = Path(sciezka)
+    if zachowaj is not None:
+        katalog = sciezka
+        prefiks = Path(zrodlo.execute("PRAGMA database_list").fetchone()[2] or "baza").stem
+        nazwa = f"{prefiks}-{datetime.now():%Y%m%d-%H%M%S-%f}.db"
+        sciezka = katalog / (nazwa + (".gz" if kompresja else ""))
+    katalog_docelowy = sciezka.parent
+    katalog_docelowy.mkdir(parents=True, exist_ok=True)
+
+    # Wszystko powstaje w plikach tymczasowych i dopiero zweryfikowane zastępuje cel
+    tymczasowa = katalog_docelowy / f".{sciezka.name}.kopia"
+    tymczasowy_wynik = katalog_docelowy / f".{sciezka.name}.tmp"
+    try:
+        strony = _kopiuj_online(zrodlo, tymczasowa, strony_na_krok, pauza_s, postep)
+        if kompresja:
+            with open(tymczasowa, "rb") as wejscie, gzip.open(tymczasowy_wynik, "wb", compresslevel=6) as wyjscie:
+                shutil.copyfileobj(wejscie, wyjscie, ROZMIAR_BLOKU)
+            tymczasowa.unlink()
+        else:
+            os.replace(tymczasowa, tymczasowy_wynik)
+
+        suma = sha256_pliku(tymczasowy_wynik)
+        os.replace(tymczasowy_wynik, sciezka)
+        _sciezka_sumy(sciezka).write_text(f"{suma}  {sciezka.name}\n", encoding="utf-8")
+        if not zweryfikuj_kopie(sciezka):
+            raise BladKopiiZapasowej(f"Suma kontrolna kopii {sciezka} nie zgadza się po zapisie")
+    finally:
+        tymczasowa.unlink(missing_ok=True)
+        tymczasowy_wynik.unlink(missing_ok=True)
+
+    if zachowaj is not None:
+        _rotuj(katalog, prefiks, zachowaj)
+
+    return KopiaZapasowa(
+        sciezka=sciezka,
+        sha256=suma,
+        rozmiar_bajtow=sciezka.stat().st_size,
+        strony=strony,
+        czas_s=time.perf_counter() - start,
+    )
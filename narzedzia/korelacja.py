@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class KorelacjaStrumieniowa:
+    '''Korelacja liczona przyrostowo: liczność, średnie i co-momenty (Welford, łączenie partii wg Chana)
+
+    Nowe odczyty aktualizują stan w O(partia x kolumny²) - historia nie jest przeglądana ponownie.
+    Stany policzone osobno (np. przez różne stacje albo procesy) łączy polacz().
+    '''
+    kolumny: Sequence[str]
+    n: int = 0
+    srednie: Optional[np.ndarray] = None
+    # Suma iloczynów odchyleń od średniej dla każdej pary kolumn
+    komomenty: Optional[np.ndarray] = None
+    odrzucone: int = 0
+
+    def __post_init__(self):
+        self.kolumny = tuple(self.kolumny)
+        k = len(self.kolumny)
+        if self.srednie is None:
+            self.srednie = np.zeros(k)
+        if self.komomenty is None:
+            self.komomenty = np.zeros((k, k))
+
+    def _polacz_stan(self, n: int, srednie: np.ndarray, komomenty: np.ndarray):
+        if n == 0:
+            return
+        razem = self.n + n
+        delta = srednie - self.srednie
+        self.komomenty = self.komomenty + komomenty + np.outer(delta, delta) * (self.n * n / razem)
+        self.srednie = self.srednie + delta * (n / razem)
+        self.n = razem
+
+    def dodaj(self, wiersz: Sequence[float]):
+        '''Jeden odczyt (kolejność wartości jak w kolumny) - klasyczny krok Welforda'''
+        x = np.asarray(wiersz, dtype=np.float64)
+        if np.isnan(x).any():
+            self.odrzucone += 1
+            return
+        self.n += 1
+        delta = x - self.srednie
+        self.srednie = self.srednie + delta / self.n
+        self.komomenty = self.komomenty + np.outer(delta, x - self.srednie)
+
+    def dodaj_partie(self, dane: Union[pd.DataFrame, np.ndarray]):
+        '''Partia odczytów; wiersze z brakującą wartością są pomijane (i liczone w odrzucone)'''
+        if isinstance(dane, pd.DataFrame):
+            dane = dane[list(self.kolumny)].to_numpy(dtype=np.float64)
+        x = np.asarray(dane, dtype=np.float64)
+        kompletne = ~np.isnan(x).any(axis=1)
+        self.odrzucone += int((~kompletne).sum())
+        x = x[kompletne]
+        if not len(x):
+            return
+        # Co-momenty partii liczone względem jej własnej średniej - bez utraty precyzji na dużych sumach
+        srednie = x.mean(axis=0)
+        odchylenia = x - srednie
+        self._polacz_stan(len(x), srednie, odchylenia.T @ odchylenia)
+
+    def polacz(self, inna: 'KorelacjaStrumieniowa') -> 'KorelacjaStrumieniowa':
+        '''Nowy stan równy policzeniu obu źródeł razem (kolumny muszą się zgadzać)'''
+        if tuple(inna.kolumny) != self.kolumny:
+            raise ValueError(f"Różne kolumny: {self.kolumny} i {tuple(inna.kolumny)}")
+        wynik = KorelacjaStrumieniowa(self.kolumny, self.n, self.srednie.copy(), self.komomenty.copy(),
+                                      self.odrzucone + inna.odrzucone)
+        wynik._polacz_stan(inna.n, inna.srednie, inna.komomenty)
+        return wynik
+
+    def kowariancja(self, ddof: int = 1) -> pd.DataFrame:
+        macierz = self.komomenty / (self.n - ddof) if self.n > ddof else np.full_like(self.komomenty, np.nan)
+        return pd.DataFrame(macierz, index=self.kolumny, columns=self.kolumny)
+
+    def korelacja(self) -> pd.DataFrame:
+        '''Macierz korelacji Pearsona - jak DataFrame.corr() na wszystkich dotychczasowych odczytach'''
+        odchylenia = np.sqrt(np.diag(self.komomenty))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            macierz = self.komomenty / np.outer(odchylenia, odchylenia)
+        return pd.DataFrame(np.clip(macierz, -1.0, 1.0), index=self.kolumny, columns=self.kolumny)
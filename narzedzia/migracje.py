@@ -0,0 +1,176 @@
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+KLUCZ_SKROTU = "skrot_migracji"
+
+
+@dataclass
+class KrokMigracji:
+    wersja: int
+    instrukcje: int
+    czas_s: float
+
+
+@dataclass
+class RaportMigracji:
+    wersja: int
+    szybka_sciezka: bool = False
+    kroki: List[KrokMigracji] = field(default_factory=list)
+    czas_s: float = 0.0
+
+
+def skrot_migracji(migracje: Sequence[str], dodatki: Sequence[str] = ()) -> str:
+    '''Skrót listy migracji (i innych definicji schematu) - zmienia się przy każdej zmianie SQL'''
+    skrot = hashlib.sha256()
+    for sql in (*migracje, "--", *dodatki):
+        skrot.update(sql.strip().encode("utf-8"))
+        skrot.update(b"\0")
+    return skrot.hexdigest()
+
+
+def podziel_sql(skrypt: str) -> List[str]:
+    '''Dzieli skrypt na pojedyncze instrukcje (średniki w triggerach i napisach nie dzielą)'''
+    instrukcje, biezaca = [], ""
+    for fragment in skrypt.split(";"):
+        biezaca += fragment + ";"
+        if sqlite3.complete_statement(biezaca):
+            if biezaca.strip(" \t\r\n;"):
+                instrukcje.append(biezaca.strip())
+            biezaca = ""
+    if biezaca.strip(" \t\r\n;"):
+        instrukcje.append(biezaca.strip())
+    return instrukcje
+
+
+@contextmanager
+def transakcja(conn: sqlite3.Connection):
+    '''BEGIN IMMEDIATE ... COMMIT z ręcznym sterowaniem (bez niejawnych transakcji sqlite3)'''
+    poprzednia_izolacja, conn.isolation_level = conn.isolation_level, None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = poprzednia_izolacja
+
+
+class Migrator:
+    '''Migracje schematu: szybka ścieżka po skrócie, każda wersja w osobnej transakcji z pomiarem czasu'''
+
+    def __init__(self, migracje: Sequence[str], dodatki: Sequence[str] = (),
+                 po_migracji: Optional[Callable[[sqlite3.Connection], object]] = None):
+        self.migracje = list(migracje)
+        self.po_migracji = po_migracji
+        self.skrot = skrot_migracji(self.migracje, dodatki)
+
+    def aktualna(self, conn: sqlite3.Connection) -> bool:
+        '''Jedno zapytanie: czy baza ma zastosowany dokładnie ten zestaw migracji'''
+        try:
+            wiersz = conn.execute("SELECT wartosc FROM schema_meta WHERE klucz = ?", (KLUCZ_SKROTU,)).fetchone()
+        except sqlite3.OperationalError:
+            return False  # brak tabeli - baza sprzed migratora albo pusta
+        return wiersz is not None and wiersz[0] == self.skrot
+
+    def migruj(self, conn: sqlite3.Connection) -> RaportMigracji:
+        start = time.perf_counter()
+        if self.aktualna(conn):
+            return RaportMigracji(len(self.migracje), szybka_sciezka=True, czas_s=time.perf_counter() - start)
+
+        raport = RaportMigracji(0)
+        with transakcja(conn):
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (klucz TEXT PRIMARY KEY, wartosc TEXT)")
+
+        for wersja, sql in enumerate(self.migracje, start=1):
+            start_kroku = time.perf_counter()
+            with transakcja(conn):
+                # Sprawdzamy wersję pod blokadą zapisu - równoległy proces mógł ją właśnie zastosować
+                aktualna = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+                if aktualna >= wersja:
+                    continue
+                instrukcje = podziel_sql(sql)
+                for instrukcja in instrukcje:
+                    conn.execute(instrukcja)
+                conn.execute("INSERT INTO schema_version (version) VALUES (?)", (wersja,))
+            raport.kroki.append(KrokMigracji(wersja, len(instrukcje), time.perf_counter() - start_kroku))
+
+        if self.po_migracji is not None:
+            self.po_migracji(conn)
+        with transakcja(conn):
+            conn.execute(
+                "INSERT INTO schema_meta (klucz, wartosc) VALUES (?, ?) "
+                "ON CONFLICT(klucz) DO UPDATE SET wartosc = excluded.wartosc",
+                (KLUCZ_SKROTU, self.skrot)
+            )
+
+        raport.wersja = len(self.migracje)
+        raport.czas_s = time.perf_counter() - start
+        return raport
+
+
+@dataclass
+class StanMigracjiDanych:
+    nazwa: str
+    kursor: int = 0
+    zakonczona: bool = False
+    partie: int = 0
+    czas_s: float = 0.0
+
+
+# Jedna partia migracji danych: (połączenie, kursor, rozmiar) -> nowy kursor albo None, gdy nie ma już danych
+PartiaMigracji = Callable[[sqlite3.Connection, int, int], Optional[int]]
+
+
+def uruchom_migracje_danych(conn: sqlite3.Connection, nazwa: str, partia: PartiaMigracji,
+                            rozmiar_partii: int = 10_000, maks_partii: Optional[int] = None,
+                            postep: Optional[Callable[[StanMigracjiDanych], None]] = None) -> StanMigracjiDanych:
+    '''Migracja danych partiami; kursor zapisywany w tej samej transakcji co partia, więc można ją wznowić
+
+    maks_partii ogranicza pracę jednego wywołania (np. przy starcie aplikacji) - reszta przy następnym.
+    '''
+    start = time.perf_counter()
+    with transakcja(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS migracje_danych (
+                nazwa TEXT PRIMARY KEY,
+                kursor INTEGER NOT NULL DEFAULT 0,
+                zakonczona INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT OR IGNORE INTO migracje_danych (nazwa) VALUES (?)", (nazwa,))
+        kursor, zakonczona = conn.execute(
+            "SELECT kursor, zakonczona FROM migracje_danych WHERE nazwa = ?", (nazwa,)
+        ).fetchone()
+
+    stan = StanMigracjiDanych(nazwa, kursor, bool(zakonczona))
+    while not stan.zakonczona and (maks_partii is None or stan.partie < maks_partii):
+        with transakcja(conn):
+            nowy_kursor = partia(conn, stan.kursor, rozmiar_partii)
+            stan.zakonczona = nowy_kursor is None
+            if nowy_kursor is not None:
+                stan.kursor = nowy_kursor
+            conn.execute(
+                "UPDATE migracje_danych SET kursor = ?, zakonczona = ?, updated_at = CURRENT_TIMESTAMP WHERE nazwa = ?",
+                (stan.kursor, int(stan.zakonczona), nazwa)
+            )
+        stan.partie += 1
+        stan.czas_s = time.perf_counter() - start
+        if postep is not None:
+            postep(stan)
+
+    stan.czas_s = time.perf_counter() - start
+    return stan
@@ -0,0 +1,75 @@
+import atexit
+import os
+import threading
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+from narzedzia.cache_ocen import CacheOcen
+from narzedzia.kompilacja import sprawdz_zgloszenie
+from narzedzia.piaskownica import Limity, PulaOceniania
+from narzedzia.wyniki import WynikOceny
+
+_pula: Optional[PulaOceniania] = None
+_cache: Optional[CacheOcen] = None
+_testy_wstepne: List[str] = []
+_blokada = threading.Lock()
+
+
+def pula() -> PulaOceniania:
+    '''Współdzielona pula oceniania (jedna na proces serwera, tworzona przy pierwszym użyciu)'''
+    global _pula
+    if _pula is None:
+        with _blokada:
+            if _pula is None:
+                liczba = int(os.environ.get("KURS_PRACOWNICY_OCENIANIA", "0")) or None
+                _pula = PulaOceniania(liczba_pracownikow=liczba, testy_wstepne=tuple(_testy_wstepne))
+                atexit.register(_pula.zamknij)
+    return _pula
+
+
+def zarejestruj_testy(testy: str):
+    '''Rejestruje stały zestaw testów lekcji, kompilowany raz przy starcie procesów oceniających'''
+    with _blokada:
+        if testy not in _testy_wstepne:
+            _testy_wstepne.append(testy)
+        if _pula is not None:
+            _pula.dodaj_testy_wstepne(testy)
+
+
+def cache_ocen() -> CacheOcen:
+    '''Współdzielony cache wyników (KURS_CACHE_OCEN_KATALOG włącza zapis na dysk)'''
+    global _cache
+    if _cache is None:
+        with _blokada:
+            if _cache is None:
+                maks_wpisow = int(os.environ.get("KURS_CACHE_OCEN_WPISY", "1024"))
+                katalog = os.environ.get("KURS_CACHE_OCEN_KATALOG") or None
+                _cache = CacheOcen(maks_wpisow=maks_wpisow, katalog=katalog)
+    return _cache
+
+
+def ocen_zgloszenie(lekcja_id: str, kod: str, testy: str, limity: Optional[Limity] = None,
+                    rownolegle: bool = False, przerwij_po_bledzie: bool = False,
+                    wymagane_klasy: Tuple[str, ...] = ()) -> WynikOceny:
+    '''Ocenia kod studenta zestawem testów danej lekcji w piaskownicy'''
+    cache = cache_ocen()
+    # Wynik z przerwaniem po błędzie różni się od pełnego (pominięte testy), a równoległy od sekwencyjnego
+    klucz = cache.klucz(lekcja_id, kod, testy, f"przerwij_po_bledzie={przerwij_po_bledzie}",
+                        f"rownolegle={rownolegle}")
+    wynik = cache.pobierz(klucz)
+    if wynik is not None:
+        return replace(wynik, z_cache=True)
+
+    # Błędy składni, zakazane importy i brakujące klasy odrzucamy bez uruchamiania procesu
+    problemy = sprawdz_zgloszenie(kod, wymagane_klasy)
+    if problemy:
+        return WynikOceny("odrzucone", komunikat="\n".join(problemy))
+
+    if rownolegle:
+        wynik = pula().ocen_rownolegle(kod, testy, limity, przerwij_po_bledzie)
+    else:
+        wynik = pula().ocen(kod, testy, limity, przerwij_po_bledzie)
+    # Które testy zdążyły się wykonać przed przerwaniem, zależy od kolejności kończenia procesów
+    if not (przerwij_po_bledzie and not wynik.sukces):
+        cache.zapisz(klucz, wynik)
+    return wynik
@@ -0,0 +1,438 @@
+import importlib
+import math
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import select
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, replace
+from io import StringIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from narzedzia.kompilacja import skompiluj
+from narzedzia.wyniki import (BLAD, OK, POMINIETY, PORAZKA, WynikOceny, WynikTestu,
+                              ZbieraczWynikow, id_testu, opis_bledu)
+
+try:
+    import resource
+except ImportError:  # Windows - brak limitów CPU/pamięci na poziomie procesu
+    resource = None
+
+# Moduły importowane raz przy starcie procesu oceniającego
+MODULY_WSTEPNE = ("sqlite3", "numpy", "pandas")
+
+# Maksymalna długość przechwyconego stdout kodu studenta w wyniku
+MAKS_WYJSCIE = 20_000
+
+# Każde zadanie działa w potomku rozgałęzionym z rozgrzanego pracownika (wzorzec zygoty), więc zmiany
+# stanu interpretera przez kod studenta (podmiana metod unittest, os.chdir) giną razem z potomkiem.
+# Bez fork (Windows) pracownik jest wymieniany po każdym zadaniu.
+ZYGOTA = hasattr(os, "fork")
+
+# Serwer czeka tyle dłużej niż limit czasu, zanim uzna, że zawiódł sam pracownik
+ZAPAS_CZASU_S = 2.0
+
+
+@dataclass(frozen=True)
+class Limity:
+    '''Limity pojedynczego zadania oceniania'''
+    cpu_s: float = 5.0
+    czas_s: float = 15.0
+    pamiec_mb: int = 512
+
+
+@dataclass(frozen=True)
+class Zadanie:
+    '''Zadanie dla procesu oceniającego'''
+    zgloszenie: str
+    testy: str
+    limity: Limity
+    wybrane_testy: Optional[Tuple[str, ...]] = None
+    przerwij_po_bledzie: bool = False
+    tylko_lista: bool = False
+
+
+class PrzekroczonyLimitCPU(BaseException):
+    '''Zgłaszany w procesie oceniającym po sygnale SIGXCPU (BaseException - `except Exception` studenta go nie złapie)'''
+
+
+# Wyjątki kończące całe zadanie - unittest nie może ich zapisać jako błędu pojedynczego testu
+LIMITY_ZADANIA = (PrzekroczonyLimitCPU, MemoryError)
+
+
+# ========== STRONA PROCESU OCENIAJĄCEGO ==========
+def _obsluz_sigxcpu(signum, frame):
+    raise PrzekroczonyLimitCPU("Przekroczono limit czasu procesora")
+
+
+def _przygotuj_pracownika(testy_wstepne: Tuple[str, ...]):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if ZYGOTA:
+        # Własna grupa procesów - zabicie pracownika zabija też jego potomka z zadaniem
+        os.setpgid(0, 0)
+    for nazwa in MODULY_WSTEPNE:
+        try:
+            importlib.import_module(nazwa)
+        except ImportError:
+            pass
+    # Stałe zestawy testów lekcji kompilujemy od razu przy starcie procesu
+    for testy in testy_wstepne:
+        skompiluj(testy, "<testy>")
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _obsluz_sigxcpu)
+
+
+def _zuzyty_cpu_s() -> float:
+    zuzycie = resource.getrusage(resource.RUSAGE_SELF)
+    return zuzycie.ru_utime + zuzycie.ru_stime
+
+
+def _pamiec_wirtualna_b() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _ustaw_limity(limity: Limity):
+    '''Ustawia miękkie limity dla zadania, zwraca poprzednie wartości do przywrócenia'''
+    if resource is None:
+        return None
+
+    poprzednie = {}
+    # RLIMIT_CPU liczy czas całego procesu, więc limit jest względny do dotychczasowego zużycia
+    cpu_miekki, cpu_twardy = resource.getrlimit(resource.RLIMIT_CPU)
+    nowy_cpu = math.ceil(_zuzyty_cpu_s() + limity.cpu_s)
+    if cpu_twardy == resource.RLIM_INFINITY or nowy_cpu < cpu_twardy:
+        resource.setrlimit(resource.RLIMIT_CPU, (nowy_cpu, cpu_twardy))
+        poprzednie[resource.RLIMIT_CPU] = (cpu_miekki, cpu_twardy)
+
+    obecna_pamiec = _pamiec_wirtualna_b()
+    if obecna_pamiec is not None:
+        as_miekki, as_twardy = resource.getrlimit(resource.RLIMIT_AS)
+        nowy_as = obecna_pamiec + limity.pamiec_mb * 1024 * 1024
+        if as_twardy == resource.RLIM_INFINITY or nowy_as < as_twardy:
+            resource.setrlimit(resource.RLIMIT_AS, (nowy_as, as_twardy))
+            poprzednie[resource.RLIMIT_AS] = (as_miekki, as_twardy)
+
+    return poprzednie
+
+
+def _przywroc_limity(poprzednie):
+    for rodzaj, wartosci in (poprzednie or {}).items():
+        resource.setrlimit(rodzaj, wartosci)
+
+
+def _zbierz_testy(przestrzen: Dict[str, Any],
+                  wybrane: Optional[Tuple[str, ...]] = None) -> unittest.TestSuite:
+    loader = unittest.TestLoader()
+    zestaw = unittest.TestSuite()
+    for obiekt in list(przestrzen.values()):
+        if (isinstance(obiekt, type) and issubclass(obiekt, unittest.TestCase)
+                and obiekt is not unittest.TestCase):
+            for test in loader.loadTestsFromTestCase(obiekt):
+                if wybrane is None or id_testu(test) in wybrane:
+                    zestaw.addTest(test)
+    return zestaw
+
+
+def _zrodla(zadanie: "Zadanie") -> Dict[str, str]:
+    return {"<zgloszenie>": zadanie.zgloszenie, "<testy>": zadanie.testy}
+
+
+class _IzolowanyZbieracz(ZbieraczWynikow):
+    '''Każdy test (razem z setUp/tearDown) działa we własnym katalogu tymczasowym'''
+
+    def startTest(self, test):
+        self._katalog = tempfile.mkdtemp(prefix="test_")
+        self._poprzedni_cwd = os.getcwd()
+        self._poprzedni_tempdir = tempfile.tempdir
+        tempfile.tempdir = self._katalog
+        os.chdir(self._katalog)
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        os.chdir(self._poprzedni_cwd)
+        tempfile.tempdir = self._poprzedni_tempdir
+        shutil.rmtree(self._katalog, ignore_errors=True)
+
+    # TestCase.run łapie wszystko gołym `except:` - limity przekazujemy dalej z metod zapisujących wynik
+    def addError(self, test, err):
+        if issubclass(err[0], LIMITY_ZADANIA):
+            raise err[1]
+        super().addError(test, err)
+
+    def addSubTest(self, test, subtest, err):
+        if err is not None and issubclass(err[0], LIMITY_ZADANIA):
+            raise err[1]
+        super().addSubTest(test, subtest, err)
+
+    def addExpectedFailure(self, test, err):
+        if issubclass(err[0], LIMITY_ZADANIA):
+            raise err[1]
+        super().addExpectedFailure(test, err)
+
+
+def _wykonaj_zadanie(zadanie: "Zadanie") -> WynikOceny:
+    # Świeża przestrzeń nazw - kod studenta nie widzi globals() serwera
+    przestrzen: Dict[str, Any] = {"__name__": "zgloszenie"}
+    zbieracz = _IzolowanyZbieracz(_zrodla(zadanie))
+    zbieracz.failfast = zadanie.przerwij_po_bledzie
+    strumien = StringIO()
+    with redirect_stdout(strumien), redirect_stderr(strumien):
+        exec(skompiluj(zadanie.zgloszenie, "<zgloszenie>"), przestrzen)
+        exec(skompiluj(zadanie.testy, "<testy>"), przestrzen)
+        zestaw = _zbierz_testy(przestrzen, zadanie.wybrane_testy)
+        if zadanie.tylko_lista:
+            # Tryb planowania: zwracamy listę testów bez ich uruchamiania
+            return WynikOceny("ok", testy=[WynikTestu.dla_testu(t, POMINIETY) for t in zestaw],
+                              wyjscie=strumien.getvalue()[:MAKS_WYJSCIE])
+        zestaw.run(zbieracz)
+
+    return WynikOceny("ok", testy=zbieracz.wyniki, wyjscie=strumien.getvalue()[:MAKS_WYJSCIE])
+
+
+def _wykonaj_z_limitami(zadanie: "Zadanie") -> WynikOceny:
+    limity = zadanie.limity
+    start = time.perf_counter()
+    poprzednie = _ustaw_limity(limity)
+    try:
+        wynik = _wykonaj_zadanie(zadanie)
+    except PrzekroczonyLimitCPU:
+        wynik = WynikOceny("limit_cpu", komunikat=f"Przekroczono limit CPU ({limity.cpu_s} s)")
+    except MemoryError:
+        wynik = WynikOceny("limit_pamieci", komunikat=f"Przekroczono limit pamięci ({limity.pamiec_mb} MB)")
+    except SystemExit as e:
+        wynik = WynikOceny("blad", komunikat=f"Kod wywołał sys.exit({e.code})")
+    except Exception as e:
+        wynik = WynikOceny("blad", komunikat=opis_bledu(e, _zrodla(zadanie)))
+    finally:
+        _przywroc_limity(poprzednie)
+    wynik.czas_s = time.perf_counter() - start
+    return wynik
+
+
+def _wykonaj_w_potomku(zadanie: "Zadanie") -> WynikOceny:
+    '''Zadanie w świeżej kopii pracownika (fork); wynik wraca przez potok jako pickle'''
+    odczyt, zapis = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(odczyt)
+        kod = 1
+        try:
+            dane = pickle.dumps(_wykonaj_z_limitami(zadanie))
+            with os.fdopen(zapis, "wb") as f:
+                f.write(dane)
+            kod = 0
+        finally:
+            os._exit(kod)
+
+    os.close(zapis)
+    limit_s = zadanie.limity.czas_s
+    termin = time.monotonic() + limit_s
+    fragmenty: List[bytes] = []
+    try:
+        while True:
+            zostalo = termin - time.monotonic()
+            if zostalo <= 0 or not select.select([odczyt], [], [], zostalo)[0]:
+                # Np. nieskończona pętla - zabijamy tylko potomka, pracownik zostaje rozgrzany
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return WynikOceny("limit_czasu", komunikat=f"Przekroczono limit czasu ({limit_s} s)",
+                                  czas_s=limit_s)
+            fragment = os.read(odczyt, 1 << 16)
+            if not fragment:
+                break
+            fragmenty.append(fragment)
+    finally:
+        os.close(odczyt)
+    os.waitpid(pid, 0)
+    if not fragmenty:
+        # Potomek padł (np. os._exit albo OOM killer)
+        return WynikOceny("awaria", komunikat="Proces oceniający zakończył się nieoczekiwanie")
+    return pickle.loads(b"".join(fragmenty))
+
+
+def _petla_pracownika(polaczenie, testy_wstepne: Tuple[str, ...] = ()):
+    '''Główna pętla procesu oceniającego: odbiera zadania aż do sygnału zakończenia'''
+    _przygotuj_pracownika(testy_wstepne)
+    wykonaj = _wykonaj_w_potomku if ZYGOTA else _wykonaj_z_limitami
+    while True:
+        try:
+            zadanie = polaczenie.recv()
+        except (EOFError, OSError):
+            break
+        if zadanie is None:
+            break
+        polaczenie.send(wykonaj(zadanie))
+
+
+# ========== STRONA SERWERA ==========
+class _Pracownik:
+    def __init__(self, kontekst, testy_wstepne: Tuple[str, ...]):
+        self.polaczenie, drugi_koniec = kontekst.Pipe()
+        self.proces = kontekst.Process(target=_petla_pracownika, args=(drugi_koniec, testy_wstepne),
+                                       daemon=True)
+        self.proces.start()
+        drugi_koniec.close()
+        self.wykonane_zadania = 0
+
+    def zakoncz(self, natychmiast: bool = False):
+        if not natychmiast:
+            try:
+                self.polaczenie.send(None)
+            except (OSError, ValueError):
+                pass
+            self.proces.join(timeout=1)
+        if ZYGOTA and natychmiast:
+            try:
+                os.killpg(self.proces.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        if self.proces.is_alive():
+            self.proces.kill()
+            self.proces.join(timeout=1)
+        self.polaczenie.close()
+
+
+class PulaOceniania:
+    '''Pula stale uruchomionych procesów oceniających kod studentów'''
+
+    def __init__(self, liczba_pracownikow: Optional[int] = None,
+                 limity: Limity = Limity(), zadania_na_pracownika: int = 200,
+                 testy_wstepne: Tuple[str, ...] = ()):
+        metody = mp.get_all_start_methods()
+        self._kontekst = mp.get_context("forkserver" if "forkserver" in metody else "spawn")
+        if self._kontekst.get_start_method() == "forkserver":
+            # Serwer forków importuje ciężkie moduły raz, kolejne procesy je dziedziczą
+            self._kontekst.set_forkserver_preload(list(MODULY_WSTEPNE))
+
+        self.limity = limity
+        self.testy_wstepne = tuple(testy_wstepne)
+        # Bez fork stan interpretera po zadaniu nie znika, więc proces nie może obsłużyć kolejnego
+        self.zadania_na_pracownika = zadania_na_pracownika if ZYGOTA else 1
+        self.liczba_pracownikow = liczba_pracownikow or os.cpu_count() or 2
+        self._wolni: "queue.Queue[_Pracownik]" = queue.Queue()
+        self._wszyscy = set()
+        self._blokada = threading.Lock()
+        self._zamknieta = False
+        for _ in range(self.liczba_pracownikow):
+            self._wolni.put(self._nowy_pracownik())
+
+    def _nowy_pracownik(self) -> _Pracownik:
+        pracownik = _Pracownik(self._kontekst, self.testy_wstepne)
+        with self._blokada:
+            self._wszyscy.add(pracownik)
+        return pracownik
+
+    def _wymien(self, pracownik: _Pracownik, natychmiast: bool) -> _Pracownik:
+        with self._blokada:
+            self._wszyscy.discard(pracownik)
+        pracownik.zakoncz(natychmiast=natychmiast)
+        return self._nowy_pracownik()
+
+    def dodaj_testy_wstepne(self, testy: str):
+        '''Zestaw testów kompilowany przy starcie każdego nowego procesu'''
+        if testy not in self.testy_wstepne:
+            self.testy_wstepne += (testy,)
+
+    def _wykonaj(self, zadanie: Zadanie) -> WynikOceny:
+        if self._zamknieta:
+            raise RuntimeError("Pula oceniania została zamknięta")
+        limity = zadanie.limity
+        pracownik = self._wolni.get()
+        try:
+            pracownik.polaczenie.send(zadanie)
+            if pracownik.polaczenie.poll(limity.czas_s + (ZAPAS_CZASU_S if ZYGOTA else 0)):
+                wynik = pracownik.polaczenie.recv()
+                pracownik.wykonane_zadania += 1
+                if pracownik.wykonane_zadania >= self.zadania_na_pracownika:
+                    pracownik = self._wymien(pracownik, natychmiast=False)
+            else:
+                # Np. nieskończona pętla - zabijamy tylko ten proces
+                pracownik = self._wymien(pracownik, natychmiast=True)
+                wynik = WynikOceny("limit_czasu", komunikat=f"Przekroczono limit czasu ({limity.czas_s} s)",
+                                   czas_s=limity.czas_s)
+        except (EOFError, OSError):
+            # Proces padł (np. os._exit albo OOM killer)
+            pracownik = self._wymien(pracownik, natychmiast=True)
+            wynik = WynikOceny("awaria", komunikat="Proces oceniający zakończył się nieoczekiwanie")
+        finally:
+            self._wolni.put(pracownik)
+        return wynik
+
+    def ocen(self, zgloszenie: str, testy: str, limity: Optional[Limity] = None,
+             przerwij_po_bledzie: bool = False) -> WynikOceny:
+        '''Uruchamia testy dla zgłoszenia w wolnym procesie (czeka, jeśli wszystkie są zajęte)'''
+        return self._wykonaj(Zadanie(zgloszenie, testy, limity or self.limity,
+                                     przerwij_po_bledzie=przerwij_po_bledzie))
+
+    def ocen_rownolegle(self, zgloszenie: str, testy: str, limity: Optional[Limity] = None,
+                        przerwij_po_bledzie: bool = False) -> WynikOceny:
+        '''Rozdziela metody testowe między procesy; limity dotyczą pojedynczego testu'''
+        limity = limity or self.limity
+        start = time.perf_counter()
+        plan = self._wykonaj(Zadanie(zgloszenie, testy, limity, tylko_lista=True))
+        if plan.status != OK or len(plan.testy) <= 1:
+            return plan if plan.status != OK else self.ocen(zgloszenie, testy, limity, przerwij_po_bledzie)
+
+        identyfikatory = [t.id for t in plan.testy]
+        planowane = {t.id: t for t in plan.testy}
+        # Wyniki każdego zadania pod id zaplanowanego testu - także jego podtesty ("T.test_a (i=0)")
+        wyniki: Dict[str, List[WynikTestu]] = {}
+        # Kod modułu wykonuje się przy planowaniu i w każdym zadaniu - jego wyjście zostawiamy raz
+        wyjscia: List[str] = [plan.wyjscie]
+        # Pierwszy limit/awaria staje się statusem całości - taki wynik nie trafia do cache
+        przerwany: Optional[WynikOceny] = None
+        liczba_watkow = min(len(identyfikatory), self.liczba_pracownikow)
+        with ThreadPoolExecutor(max_workers=liczba_watkow) as wykonawca:
+            przyszle = {
+                wykonawca.submit(self._wykonaj, Zadanie(zgloszenie, testy, limity, wybrane_testy=(id_,))): id_
+                for id_ in identyfikatory
+            }
+            for przyszly in as_completed(przyszle):
+                id_ = przyszle[przyszly]
+                if przyszly.cancelled():
+                    continue
+                wynik = przyszly.result()
+                if wynik.status == OK:
+                    wyniki[id_] = wynik.testy
+                    wyjscia.append(wynik.wyjscie[len(plan.wyjscie):] if wynik.wyjscie.startswith(plan.wyjscie)
+                                   else wynik.wyjscie)
+                else:
+                    # Limit lub awaria w jednym teście nie przekreśla pozostałych
+                    wyniki[id_] = [replace(planowane[id_], status=BLAD, czas_s=wynik.czas_s,
+                                           komunikat=wynik.komunikat)]
+                    przerwany = przerwany or wynik
+
+                if przerwij_po_bledzie and any(t.status in (PORAZKA, BLAD) for t in wyniki[id_]):
+                    for inny in przyszle:
+                        inny.cancel()
+
+        testy_wynik = [
+            test
+            for id_ in identyfikatory
+            for test in wyniki.get(id_) or [replace(planowane[id_], komunikat="Przerwano po pierwszym błędzie")]
+        ]
+        return WynikOceny(przerwany.status if przerwany else OK, testy=testy_wynik,
+                          wyjscie="".join(wyjscia)[:MAKS_WYJSCIE],
+                          komunikat=przerwany.komunikat if przerwany else "",
+                          czas_s=time.perf_counter() - start)
+
+    def zamknij(self):
+        self._zamknieta = True
+        with self._blokada:
+            pracownicy = list(self._wszyscy)
+            self._wszyscy.clear()
+        for pracownik in pracownicy:
+            pracownik.zakoncz()
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# Ile punktów na piksel szerokości wykresu - więcej i tak nie da się narysować
+PUNKTY_NA_PIKSEL = 2
+
+
+def _liczby(x: np.ndarray) -> np.ndarray:
+    '''Oś x jako float64 (datetime64 przez liczbę jednostek od epoki)'''
+    if np.issubdtype(x.dtype, np.datetime64) or np.issubdtype(x.dtype, np.timedelta64):
+        return x.view(np.int64).astype(np.float64)
+    return x.astype(np.float64, copy=False)
+
+
+def _kubelki(n: int, liczba: int) -> Tuple[np.ndarray, int]:
+    '''Wypełnienie do kubełków po k punktów: (kubełki jako macierz indeksów, k)'''
+    k = -(-n // liczba)
+    indeksy = np.arange(liczba * k)
+    return np.minimum(indeksy, n - 1).reshape(liczba, k), k
+
+
+def min_max(x: np.ndarray, y: np.ndarray, liczba_punktow: int) -> np.ndarray:
+    '''Indeksy punktów minimum i maksimum z każdego kubełka - zachowuje wszystkie szpilki serii'''
+    n = len(y)
+    if n <= liczba_punktow:
+        return np.arange(n)
+    liczba_kubelkow = max(liczba_punktow // 2, 1)
+    kubelki, _ = _kubelki(n, liczba_kubelkow)
+    # Kubełki wypełnione powtórzeniem ostatniego punktu - nie zmienia to minimum ani maksimum
+    wartosci = y[kubelki]
+    wiersze = np.arange(liczba_kubelkow)
+    wybrane = np.concatenate([
+        kubelki[wiersze, np.argmin(wartosci, axis=1)],
+        kubelki[wiersze, np.argmax(wartosci, axis=1)],
+        [0, n - 1],
+    ])
+    return np.unique(wybrane)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, liczba_punktow: int) -> np.ndarray:
+    '''Largest-Triangle-Three-Buckets: z każdego kubełka punkt tworzący największy trójkąt z sąsiadami
+
+    Średnie kubełków liczone są naraz dla całej serii; pętla po kubełkach (wybór zależy od punktu
+    wybranego w poprzednim) wykonuje na każdym kubełku jedną operację wektorową.
+    '''
+    n = len(y)
+    if n <= liczba_punktow or liczba_punktow < 3:
+        return np.arange(n) if n <= liczba_punktow else np.array([0, n - 1])
+    xf, yf = _liczby(x), y.astype(np.float64, copy=False)
+
+    # Pierwszy i ostatni punkt zawsze, reszta w liczba_punktow - 2 kubełkach
+    granice = np.linspace(1, n - 1, liczba_punktow - 1).astype(np.int64)
+    sr_x = np.add.reduceat(xf[1:n - 1], granice[:-1] - 1) / np.diff(granice)
+    sr_y = np.add.reduceat(yf[1:n - 1], granice[:-1] - 1) / np.diff(granice)
+    # Dla ostatniego kubełka "następnym" jest ostatni punkt serii
+    nast_x = np.append(sr_x[1:], xf[-1])
+    nast_y = np.append(sr_y[1:], yf[-1])
+
+    wybrane = np.empty(liczba_punktow, dtype=np.int64)
+    wybrane[0], wybrane[-1] = 0, n - 1
+    a = 0
+    for i in range(liczba_punktow - 2):
+        poczatek, koniec = granice[i], granice[i + 1]
+        bx, by = xf[poczatek:koniec], yf[poczatek:koniec]
+        pola = np.abs((xf[a] - nast_x[i]) * (by - yf[a]) - (xf[a] - bx) * (nast_y[i] - yf[a]))
+        a = poczatek + int(np.argmax(pola))
+        wybrane[i + 1] = a
+    return wybrane
+
+
+TRYBY: Dict[str, Callable[[np.ndarray, np.ndarray, int], np.ndarray]] = {
+    "lttb": lttb,
+    "minmax": min_max,
+}
+
+
+@dataclass
+class WynikProbkowania:
+    x: np.ndarray
+    y: np.ndarray
+    punkty_w_oknie: int
+    pelna_rozdzielczosc: bool
+
+
+def probkuj(x: np.ndarray, y: np.ndarray, szerokosc_px: int, zakres: Optional[Tuple] = None,
+            tryb: str = "lttb", punkty_na_piksel: int = PUNKTY_NA_PIKSEL) -> WynikProbkowania:
+    '''Wycina okno zakres z serii posortowanej po x i redukuje je do rozdzielczości wykresu
+
+    Gdy okno ma mniej punktów niż wykres pikseli (po przybliżeniu), wraca w pełnej rozdzielczości.
+    '''
+    if zakres is not None:
+        poczatek, koniec = np.searchsorted(x, zakres[0], "left"), np.searchsorted(x, zakres[1], "right")
+        x, y = x[poczatek:koniec], y[poczatek:koniec]
+    # Luki w danych (NaN) nie mogą wygrać w argmin/argmax ani w polu trójkąta
+    if np.issubdtype(y.dtype, np.floating):
+        poprawne = ~np.isnan(y)
+        if not poprawne.all():
+            x, y = x[poprawne], y[poprawne]
+
+    budzet = max(int(szerokosc_px * punkty_na_piksel), 3)
+    if len(y) <= budzet:
+        return WynikProbkowania(x, y, len(y), True)
+    wybrane = TRYBY[tryb](x, y, budzet)
+    return WynikProbkowania(x[wybrane], y[wybrane], len(y), False)
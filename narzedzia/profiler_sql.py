@@ -0,0 +1,248 @@
+import bisect
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+# Górne granice kubełków histogramu czasu (ms); ostatni kubełek zbiera wszystko powyżej
+GRANICE_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Tylko te instrukcje mają sensowny plan zapytania (INSERT ... VALUES i PRAGMA nie skanują tabel)
+PLANOWANE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# Starsze SQLite (< 3.36) piszą "SCAN TABLE pola"
+_SKAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+
+
+def normalizuj_sql(sql: str) -> str:
+    '''Klucz statystyk: ta sama instrukcja niezależnie od wcięć i łamania linii'''
+    return " ".join(sql.split())
+
+
+def pelne_skany(plan: List[str], tabele: set) -> List[str]:
+    '''Tabele czytane w całości wg EXPLAIN QUERY PLAN ("SCAN pola" bez indeksu)
+
+    "SCAN pola USING [COVERING] INDEX" przechodzi indeks zamiast tabeli, a skany CTE, podzapytań
+    i tabel wirtualnych (FTS5) nie są tabelami z sqlite_master - tych nie zgłaszamy.
+    '''
+    skany = []
+    for krok in plan:
+        dopasowanie = _SKAN.match(krok.strip())
+        if dopasowanie and dopasowanie.group(1) in tabele and "USING" not in dopasowanie.group(2):
+            skany.append(dopasowanie.group(1))
+    return skany
+
+
+@dataclass
+class StatystykaZapytania:
+    sql: str
+    liczba: int = 0
+    suma_s: float = 0.0
+    maks_s: float = 0.0
+    kubelki: List[int] = field(default_factory=lambda: [0] * (len(GRANICE_MS) + 1))
+    plan: Optional[List[str]] = None
+    pelne_skany: List[str] = field(default_factory=list)
+
+    def dodaj(self, czas_s: float):
+        self.liczba += 1
+        self.suma_s += czas_s
+        self.maks_s = max(self.maks_s, czas_s)
+        self.kubelki[bisect.bisect_left(GRANICE_MS, czas_s * 1000)] += 1
+
+    def percentyl_ms(self, p: float) -> float:
+        '''Górna granica kubełka, w którym wypada percentyl p (0-100)'''
+        if not self.liczba:
+            return 0.0
+        prog, narastajaco = self.liczba * p / 100, 0
+        for i, ile in enumerate(self.kubelki):
+            narastajaco += ile
+            if narastajaco >= prog:
+                return min(GRANICE_MS[i], self.maks_s * 1000) if i < len(GRANICE_MS) else self.maks_s * 1000
+        return self.maks_s * 1000
+
+
+@dataclass
+class WolneZapytanie:
+    kiedy: datetime
+    sql: str
+    parametry: Any
+    czas_s: float
+
+
+class ProfilerSQL:
+    '''Zbiera czasy instrukcji z połączeń ProfilowanePolaczenie: histogramy, plany i log wolnych zapytań'''
+
+    def __init__(self, prog_wolnych_ms: float = 50.0, maks_wolnych: int = 100, plany: bool = True):
+        self.prog_wolnych_ms = prog_wolnych_ms
+        self.plany = plany
+        self.statystyki: Dict[str, StatystykaZapytania] = {}
+        self.wolne: Deque[WolneZapytanie] = deque(maxlen=maks_wolnych)
+        self._blokada = threading.Lock()
+
+    def potrzebny_plan(self, klucz: str) -> bool:
+        if not self.plany or not klucz.upper().startswith(PLANOWANE):
+            return False
+        statystyka = self.statystyki.get(klucz)
+        return statystyka is None or statystyka.plan is None
+
+    def zapisz_plan(self, klucz: str, plan: List[str], tabele: set):
+        with self._blokada:
+            statystyka = self.statystyki.setdefault(klucz, StatystykaZapytania(klucz))
+            statystyka.plan = plan
+            statystyka.pelne_skany = pelne_skany(plan, tabele)
+
+    def zapisz(self, sql: str, parametry: Any, czas_s: float):
+        klucz = normalizuj_sql(sql)
+        with self._blokada:
+            self.statystyki.setdefault(klucz, StatystykaZapytania(klucz)).dodaj(czas_s)
+            if czas_s * 1000 >= self.prog_wolnych_ms:
+                self.wolne.append(WolneZapytanie(datetime.now(), klucz, parametry, czas_s))
+
+    def wyczysc(self):
+        with self._blokada:
+            self.statystyki.clear()
+            self.wolne.clear()
+
+    def raport(self) -> pd.DataFrame:
+        '''Instrukcje od najbardziej kosztownej łącznie; kolumna pelne_skany wskazuje brakujące indeksy'''
+        with self._blokada:
+            statystyki = list(self.statystyki.values())
+        wiersze = [{
+            "zapytanie": s.sql,
+            "wywolania": s.liczba,
+            "suma_ms": s.suma_s * 1000,
+            "sredni_ms": s.suma_s * 1000 / s.liczba,
+            "p95_ms": s.percentyl_ms(95),
+            "maks_ms": s.maks_s * 1000,
+            "pelne_skany": ", ".join(s.pelne_skany),
+        } for s in statystyki if s.liczba]
+        kolumny = ["zapytanie", "wywolania", "suma_ms", "sredni_ms", "p95_ms", "maks_ms", "pelne_skany"]
+        return pd.DataFrame(wiersze, columns=kolumny).sort_values("suma_ms", ascending=False, ignore_index=True)
+
+    def histogram(self, sql: str) -> pd.DataFrame:
+        statystyka = self.statystyki.get(normalizuj_sql(sql))
+        etykiety = [f"≤{granica} ms" for granica in GRANICE_MS] + [f">{GRANICE_MS[-1]} ms"]
+        kubelki = statystyka.kubelki if statystyka else [0] * len(etykiety)
+        return pd.DataFrame({"czas": etykiety, "wywolania": kubelki})
+
+    def dziennik_wolnych(self) -> pd.DataFrame:
+        with self._blokada:
+            wolne = list(self.wolne)
+        return pd.DataFrame([{
+            "kiedy": w.kiedy, "czas_ms": w.czas_s * 1000, "zapytanie": w.sql, "parametry": repr(w.parametry),
+        } for w in reversed(wolne)], columns=["kiedy", "czas_ms", "zapytanie", "parametry"])
+
+
+class ProfilowanyKursor(sqlite3.Cursor):
+    '''Kursor mierzący execute razem z pobieraniem wierszy - SQLite wykonuje SELECT dopiero przy fetch*'''
+
+    _otwarte: Optional[Tuple[str, Any, float]] = None
+
+    def _zacznij(self, sql: str, parametry: Any, czas_s: float):
+        self._otwarte = (sql, parametry, czas_s)
+        if self.description is None:  # instrukcja bez wyniku - już wykonana w całości
+            self._zakoncz()
+
+    def _dolicz(self, czas_s: float, koniec: bool):
+        if self._otwarte is not None:
+            sql, parametry, dotychczas = self._otwarte
+            self._otwarte = (sql, parametry, dotychczas + czas_s)
+            if koniec:
+                self._zakoncz()
+
+    def _zakoncz(self):
+        otwarte, self._otwarte = self._otwarte, None
+        profiler = getattr(self.connection, "profiler", None)
+        if otwarte is not None and profiler is not None:
+            profiler.zapisz(*otwarte)
+
+    def execute(self, sql: str, parameters: Union[tuple, dict] = ()):
+        self._zakoncz()
+        self.connection._zaplanuj(sql, parameters)
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._zacznij(sql, parameters, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._zakoncz()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._zacznij(sql, "executemany", time.perf_counter() - start)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        wiersz = super().fetchone()
+        self._dolicz(time.perf_counter() - start, wiersz is None)
+        return wiersz
+
+    def fetchmany(self, size: Optional[int] = None):
+        rozmiar = self.arraysize if size is None else size
+        start = time.perf_counter()
+        wiersze = super().fetchmany(rozmiar)
+        self._dolicz(time.perf_counter() - start, len(wiersze) < rozmiar)
+        return wiersze
+
+    def fetchall(self):
+        start = time.perf_counter()
+        wiersze = super().fetchall()
+        self._dolicz(time.perf_counter() - start, True)
+        return wiersze
+
+    def __next__(self):
+        wiersz = self.fetchone()
+        if wiersz is None:
+            raise StopIteration
+        return wiersz
+
+    def close(self):
+        self._zakoncz()
+        super().close()
+
+    def __del__(self):
+        self._zakoncz()
+
+
+class ProfilowanePolaczenie(sqlite3.Connection):
+    '''Połączenie (factory= dla sqlite3.connect), którego kursory raportują do atrybutu profiler'''
+
+    profiler: Optional[ProfilerSQL] = None
+
+    def cursor(self, factory=ProfilowanyKursor):
+        return super().cursor(factory)
+
+    # Connection.execute z C wywołuje wykonanie kursora z pominięciem metod Pythona
+    def execute(self, sql: str, parameters: Union[tuple, dict] = ()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def _zaplanuj(self, sql: str, parametry: Any):
+        '''EXPLAIN QUERY PLAN przy pierwszym wykonaniu instrukcji (zwykłym kursorem - bez pomiaru)'''
+        if self.profiler is None:
+            return
+        klucz = normalizuj_sql(sql)
+        if not self.profiler.potrzebny_plan(klucz):
+            return
+        try:
+            kursor = sqlite3.Cursor(self)
+            plan = [wiersz[3] for wiersz in kursor.execute("EXPLAIN QUERY PLAN " + sql, parametry)]
+            tabele = {wiersz[0] for wiersz in kursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            kursor.close()
+        except sqlite3.Error:
+            return  # błąd zgłosi właściwe wykonanie instrukcji
+        self.profiler.zapisz_plan(klucz, plan, tabele)
+
+
+def polacz_profilowane(sciezka, profiler: Optional[ProfilerSQL], **kwargs) -> ProfilowanePolaczenie:
+    conn = sqlite3.connect(sciezka, factory=ProfilowanePolaczenie, **kwargs)
+    conn.profiler = profiler
+    return conn
@@ -0,0 +1,123 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+from narzedzia.profiler_sql import ProfilerSQL, polacz_profilowane
+
+# Przygotowane zapytania trzymane przez każde połączenie (domyślnie sqlite3 trzyma 128)
+ZAPYTANIA_W_CACHE = 256
+
+# Domyślna liczba połączeń do odczytu
+CZYTELNICY = 4
+
+
+class PulaPolaczen:
+    '''Pula połączeń SQLite w trybie WAL: wielu czytelników naraz i jeden pisarz
+
+    Połączenia są otwierane leniwie i żyją tak długo jak pula, więc kolejne wywołania nie płacą
+    za otwarcie pliku ani wczytanie schematu, a przygotowane zapytania zostają w cache połączenia.
+    Gdy wszyscy czytelnicy są zajęci, kolejni czekają (w kolejności przyjścia) na zwolnione połączenie -
+    odczyt jest wtedy wolniejszy, ale nie kończy się błędem.
+    '''
+
+    def __init__(self, sciezka: Union[str, Path], czytelnicy: int = CZYTELNICY,
+                 zapytania_w_cache: int = ZAPYTANIA_W_CACHE, limit_oczekiwania_s: float = 5.0,
+                 profiler: Optional[ProfilerSQL] = None):
+        self.sciezka = Path(sciezka)
+        self.czytelnicy = czytelnicy
+        self.zapytania_w_cache = zapytania_w_cache
+        self.limit_oczekiwania_s = limit_oczekiwania_s
+        self.profiler = profiler
+
+        self._wolni: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._wszyscy: List[sqlite3.Connection] = []
+        self._otwarte = 0  # otwarci i właśnie otwierani czytelnicy
+        self._blokada = threading.Lock()
+        self._blokada_pisarza = threading.RLock()
+        self._pisarz = None
+
+    def _otworz(self, tylko_odczyt: bool) -> sqlite3.Connection:
+        # Połączenia przechodzą między wątkami sesji Streamlit - dostęp pilnuje sama pula
+        if self.profiler is None:
+            conn = sqlite3.connect(self.sciezka, timeout=self.limit_oczekiwania_s, check_same_thread=False,
+                                   cached_statements=self.zapytania_w_cache)
+        else:
+            conn = polacz_profilowane(self.sciezka, self.profiler, timeout=self.limit_oczekiwania_s,
+                                      check_same_thread=False, cached_statements=self.zapytania_w_cache)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        if tylko_odczyt:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _pobierz_pisarza(self) -> sqlite3.Connection:
+        if self._pisarz is None:
+            conn = self._otworz(tylko_odczyt=False)
+            # WAL jest zapisywany w pliku bazy - czytelnicy nie blokują pisarza i odwrotnie
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._pisarz = conn
+        return self._pisarz
+
+    def _wypozycz(self) -> sqlite3.Connection:
+        try:
+            return self._wolni.get_nowait()
+        except queue.Empty:
+            pass
+        with self._blokada:
+            nowy = self._otwarte < self.czytelnicy
+            if nowy:
+                self._otwarte += 1
+        if not nowy:
+            # Komplet czytelników otwarty - czekamy na pierwszy zwolniony
+            return self._wolni.get()
+        try:
+            # Pierwszy czytelnik musi zobaczyć bazę już w trybie WAL
+            with self._blokada_pisarza:
+                self._pobierz_pisarza()
+            conn = self._otworz(tylko_odczyt=True)
+        except BaseException:
+            with self._blokada:
+                self._otwarte -= 1
+            raise
+        with self._blokada:
+            self._wszyscy.append(conn)
+        return conn
+
+    @contextmanager
+    def czytelnik(self) -> Iterator[sqlite3.Connection]:
+        '''Połączenie tylko do odczytu wypożyczone z puli na czas bloku with (czeka, gdy wszystkie są zajęte)'''
+        conn = self._wypozycz()
+        try:
+            yield conn
+        finally:
+            # Kończy ewentualną transakcję odczytu, żeby nie trzymać starej migawki WAL
+            if conn.in_transaction:
+                conn.rollback()
+            self._wolni.put(conn)
+
+    @contextmanager
+    def pisarz(self) -> Iterator[sqlite3.Connection]:
+        '''Jedyne połączenie zapisujące: commit po udanym bloku, rollback po wyjątku'''
+        with self._blokada_pisarza:
+            conn = self._pobierz_pisarza()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def zamknij(self):
+        with self._blokada_pisarza, self._blokada:
+            for conn in self._wszyscy:
+                conn.close()
+            self._wszyscy.clear()
+            self._otwarte = 0
+            self._wolni = queue.LifoQueue()
+            if self._pisarz is not None:
+                self._pisarz.close()
+                self._pisarz = None
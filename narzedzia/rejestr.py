@@ -0,0 +1,117 @@
+import importlib.util
+import json
+import sys
+import threading
+from dataclasses import dataclass, fields
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+KATALOG_KURSU = Path(__file__).resolve().parent.parent
+SCIEZKA_MANIFESTU = KATALOG_KURSU / "course_manifest.json"
+KATALOG_LEKCJI = KATALOG_KURSU / "lessons"
+
+
+@dataclass(frozen=True)
+class Lekcja:
+    '''Wpis lekcji z course_manifest.json'''
+    id: str
+    title: str
+    file: str
+    level: str = ""
+    duration_min: int = 0
+    quiz_count: int = 0
+    exercises_count: int = 0
+
+    @classmethod
+    def z_manifestu(cls, dane: Dict) -> 'Lekcja':
+        znane = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in dane.items() if k in znane})
+
+
+class RejestrLekcji:
+    '''Leniwy rejestr lekcji - moduł lekcji jest importowany dopiero przy pierwszym uruchomieniu'''
+
+    def __init__(self, sciezka_manifestu: Path = SCIEZKA_MANIFESTU,
+                 katalog_lekcji: Path = KATALOG_LEKCJI):
+        self.katalog_lekcji = Path(katalog_lekcji)
+        manifest = json.loads(Path(sciezka_manifestu).read_text(encoding="utf-8"))
+        self.kurs = manifest.get("course_name", "")
+        self._lekcje: Dict[str, Lekcja] = {}
+        for wpis in manifest.get("lessons", []):
+            lekcja = Lekcja.z_manifestu(wpis)
+            self._lekcje[lekcja.id] = lekcja
+        self._moduly: Dict[str, ModuleType] = {}
+        self._blokada = threading.Lock()
+
+    def lekcje(self) -> List[Lekcja]:
+        return list(self._lekcje.values())
+
+    def pobierz(self, lekcja_id: str) -> Optional[Lekcja]:
+        return self._lekcje.get(lekcja_id)
+
+    def czy_zaladowana(self, lekcja_id: str) -> bool:
+        return lekcja_id in self._moduly
+
+    def modul(self, lekcja_id: str) -> ModuleType:
+        '''Importuje moduł lekcji (tylko raz na proces)'''
+        if lekcja_id in self._moduly:
+            return self._moduly[lekcja_id]
+
+        lekcja = self._lekcje.get(lekcja_id)
+        if lekcja is None:
+            raise KeyError(f"Nieznana lekcja: {lekcja_id}")
+
+        with self._blokada:
+            if lekcja_id in self._moduly:
+                return self._moduly[lekcja_id]
+
+            nazwa_modulu = f"lessons.{Path(lekcja.file).stem}"
+            modul = sys.modules.get(nazwa_modulu)
+            if modul is None:
+                sciezka = self.katalog_lekcji / lekcja.file
+                spec = importlib.util.spec_from_file_location(nazwa_modulu, sciezka)
+                if spec is None or spec.loader is None:
+                    raise ImportError(f"Nie można załadować lekcji z pliku {sciezka}")
+                modul = importlib.util.module_from_spec(spec)
+                sys.modules[nazwa_modulu] = modul
+                try:
+                    spec.loader.exec_module(modul)
+                except Exception:
+                    del sys.modules[nazwa_modulu]
+                    raise
+
+            self._moduly[lekcja_id] = modul
+            return modul
+
+    def run(self, lekcja_id: str) -> Callable[[], None]:
+        '''Zwraca funkcję run() wybranej lekcji'''
+        return self.modul(lekcja_id).run
+
+    def uruchom_wybrana(self, session_state) -> bool:
+        '''Uruchamia lekcję wskazaną przez session_state.selected_lesson (jeśli istnieje)'''
+        wybrana = session_state.get("selected_lesson")
+        if wybrana not in self._lekcje:
+            return False
+        self.run(wybrana)()
+        return True
+
+
+_rejestr: Optional[RejestrLekcji] = None
+_blokada_rejestru = threading.Lock()
+
+
+def rejestr() -> RejestrLekcji:
+    '''Współdzielony rejestr lekcji (jeden na proces serwera)'''
+    global _rejestr
+    if _rejestr is None:
+        with _blokada_rejestru:
+            if _rejestr is None:
+                _rejestr = RejestrLekcji()
+    return _rejestr
+
+
+def uruchom_wybrana_lekcje() -> bool:
+    '''Punkt wejścia dla strony głównej: uruchamia tylko wybraną lekcję'''
+    import streamlit as st
+    return rejestr().uruchom_wybrana(st.session_state)
@@ -0,0 +1,290 @@
+import asyncio
+import atexit
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+KOLUMNY_STRUMIENIA = ('plon', 'koszt')
+POJEMNOSC = 100_000
+
+# Plik i gniazdo czujników leżą w katalogu ustawionym na serwerze (KURS_KATALOG_CZUJNIKOW) pod stałymi
+# nazwami - ścieżka nigdy nie pochodzi z przeglądarki
+PLIK_CZUJNIKOW = "czujniki.jsonl"
+GNIAZDO_CZUJNIKOW = "czujniki.sock"
+
+# Rekord z czujnika: linia JSON {"czas": ..., "plon": ..., "koszt": ...} albo gotowy słownik
+Rekord = Union[str, bytes, Dict]
+Zrodlo = Callable[[], AsyncIterator[List[Rekord]]]
+
+
+class BuforPierscieniowy:
+    '''Ostatnie `pojemnosc` odczytów w tablicach NumPy stałego rozmiaru - dopisywanie bez realokacji'''
+
+    def __init__(self, pojemnosc: int = POJEMNOSC, kolumny: Sequence[str] = KOLUMNY_STRUMIENIA):
+        self.pojemnosc = pojemnosc
+        self.kolumny = tuple(kolumny)
+        self.czas = np.full(pojemnosc, np.nan)  # sekundy od epoki
+        self.wartosci = np.full((pojemnosc, len(self.kolumny)), np.nan)
+        self.dopisane = 0  # wszystkie odczyty od początku, także już nadpisane
+        self._blokada = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.dopisane, self.pojemnosc)
+
+    def dopisz(self, czas: np.ndarray, wartosci: np.ndarray):
+        '''Dopisuje partię odczytów (najstarsze nadpisywane, gdy bufor jest pełny)'''
+        n = len(czas)
+        with self._blokada:
+            if n >= self.pojemnosc:
+                # Z partii większej niż bufor zostaje tylko jej koniec
+                self.dopisane += n - self.pojemnosc
+                czas, wartosci, n = czas[-self.pojemnosc:], wartosci[-self.pojemnosc:], self.pojemnosc
+            poczatek = self.dopisane % self.pojemnosc
+            pierwsza = min(n, self.pojemnosc - poczatek)
+            self.czas[poczatek:poczatek + pierwsza] = czas[:pierwsza]
+            self.wartosci[poczatek:poczatek + pierwsza] = wartosci[:pierwsza]
+            self.czas[:n - pierwsza] = czas[pierwsza:]
+            self.wartosci[:n - pierwsza] = wartosci[pierwsza:]
+            self.dopisane += n
+
+    def migawka(self, ostatnie: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''Kopia odczytów od najstarszego do najnowszego: (czas, wartości [odczyt x kolumna])'''
+        with self._blokada:
+            liczba = len(self) if ostatnie is None else min(ostatnie, len(self))
+            koniec = self.dopisane % self.pojemnosc
+            indeksy = (np.arange(koniec - liczba, koniec)) % self.pojemnosc
+            return self.czas[indeksy], self.wartosci[indeksy]
+
+
+def _czas(wartosc) -> float:
+    if wartosc is None:
+        return time.time()
+    if isinstance(wartosc, str):
+        return datetime.fromisoformat(wartosc).timestamp()
+    return float(wartosc)
+
+
+def parsuj_rekordy(partia: List[Rekord], kolumny: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+    '''Partia rekordów jako tablice (czas, wartości) i liczba odrzuconych; brak kolumny = NaN'''
+    czasy, wiersze, odrzucone = [], [], 0
+    for rekord in partia:
+        try:
+            if not isinstance(rekord, dict):
+                rekord = json.loads(rekord)
+            wiersz = [float(rekord[k]) if rekord.get(k) is not None else np.nan for k in kolumny]
+            czasy.append(_czas(rekord.get("czas")))
+            wiersze.append(wiersz)
+        except (ValueError, TypeError, AttributeError):
+            odrzucone += 1
+    wartosci = np.array(wiersze, dtype=np.float64).reshape(len(wiersze), len(kolumny))
+    return np.array(czasy, dtype=np.float64), wartosci, odrzucone
+
+
+async def zrodlo_testowe(odczyty_na_s: float = 200.0, okres_s: float = 0.2,
+                         seed: int = 0) -> AsyncIterator[List[Rekord]]:
+    '''Lokalny broker testowy: co okres_s partia odczytów (błądzenie losowe wokół typowych wartości)'''
+    rng = np.random.default_rng(seed)
+    plon, koszt = 8.0, 1200.0
+    ostatni = time.time()
+    while True:
+        await asyncio.sleep(okres_s)
+        teraz = time.time()
+        n = max(int((teraz - ostatni) * odczyty_na_s), 1)
+        czasy = np.linspace(ostatni, teraz, n, endpoint=False)
+        plony = plon + np.cumsum(rng.normal(0, 0.02, n)) - 0.001 * (plon - 8.0) * np.arange(1, n + 1)
+        koszty = koszt + np.cumsum(rng.normal(0, 2.0, n)) - 0.001 * (koszt - 1200.0) * np.arange(1, n + 1)
+        plon, koszt, ostatni = plony[-1], koszty[-1], teraz
+        yield [{"czas": c, "plon": p, "koszt": k} for c, p, k in zip(czasy.tolist(), plony.tolist(), koszty.tolist())]
+
+
+async def zrodlo_plik(sciezka: Union[str, Path], okres_s: float = 0.2,
+                      od_poczatku: bool = False) -> AsyncIterator[List[Rekord]]:
+    '''Jak `tail -F`: nowe linie JSON dopisywane do pliku; czeka na plik i wraca na początek po jego obcięciu'''
+    sciezka = Path(sciezka)
+    plik, pozycja = None, 0
+    try:
+        while True:
+            if plik is None:
+                if not sciezka.exists():
+                    od_poczatku = True  # plik, który pojawi się później, czytamy w całości
+                    await asyncio.sleep(okres_s)
+                    continue
+                plik = open(sciezka, "rb")
+                if not od_poczatku:
+                    plik.seek(0, os.SEEK_END)
+                pozycja = plik.tell()
+            try:
+                stan = sciezka.stat()
+            except FileNotFoundError:
+                stan = None
+            if stan is not None and stan.st_ino != os.fstat(plik.fileno()).st_ino:
+                # Plik podmieniony (rotacja logów) - dokańczamy stary i przechodzimy na nowy od początku
+                linie = plik.readlines()
+                plik.close()
+                plik, od_poczatku = None, True
+                if linie:
+                    yield [linia for linia in linie if linia.strip()]
+                continue
+            if stan is not None and stan.st_size < pozycja:
+                plik.seek(0)  # plik obcięty
+            linie = plik.readlines()
+            # Niedokończona ostatnia linia wraca do pliku - doczytamy ją w całości następnym razem
+            if linie and not linie[-1].endswith(b"\n"):
+                plik.seek(-len(linie[-1]), os.SEEK_CUR)
+                linie.pop()
+            pozycja = plik.tell()
+            if linie:
+                yield [linia for linia in linie if linia.strip()]
+            else:
+                await asyncio.sleep(okres_s)
+    finally:
+        if plik is not None:
+            plik.close()
+
+
+def _usun_gniazdo(sciezka: Path):
+    '''Usuwa plik tylko, jeśli jest gniazdem - zwykłego pliku pod tą ścieżką nie ruszamy'''
+    try:
+        if stat.S_ISSOCK(os.lstat(sciezka).st_mode):
+            sciezka.unlink()
+    except FileNotFoundError:
+        pass
+
+
+async def zrodlo_gniazdo(sciezka: Union[str, Path], okres_s: float = 0.2) -> AsyncIterator[List[Rekord]]:
+    '''Serwer na gnieździe UNIX: dowolna liczba nadajników wysyła linie JSON, odbieramy je partiami'''
+    sciezka = Path(sciezka)
+    kolejka: "asyncio.Queue[bytes]" = asyncio.Queue()
+
+    async def obsluz(czytnik: asyncio.StreamReader, pisarz: asyncio.StreamWriter):
+        try:
+            async for linia in czytnik:
+                if linia.strip():
+                    kolejka.put_nowait(linia)
+        finally:
+            pisarz.close()
+
+    _usun_gniazdo(sciezka)  # gniazdo po poprzednim uruchomieniu; inny plik da błąd bind
+    serwer = await asyncio.start_unix_server(obsluz, path=str(sciezka))
+    try:
+        while True:
+            partia = [await kolejka.get()]
+            while not kolejka.empty():
+                partia.append(kolejka.get_nowait())
+            yield partia
+            await asyncio.sleep(okres_s)  # kolejne linie zbieramy w jedną partię
+    finally:
+        serwer.close()
+        _usun_gniazdo(sciezka)
+
+
+class StrumienCzujnikow:
+    '''Zadanie asyncio w wątku w tle: czyta źródło i dopisuje odczyty do bufora pierścieniowego'''
+
+    def __init__(self, zrodlo: Zrodlo, pojemnosc: int = POJEMNOSC, kolumny: Sequence[str] = KOLUMNY_STRUMIENIA):
+        self.zrodlo = zrodlo
+        self.bufor = BuforPierscieniowy(pojemnosc, kolumny)
+        self.odrzucone = 0
+        self.blad: Optional[str] = None
+        self._petla: Optional[asyncio.AbstractEventLoop] = None
+        self._zadanie: Optional[asyncio.Task] = None
+        self._watek: Optional[threading.Thread] = None
+        self._gotowy = threading.Event()
+
+    @property
+    def dziala(self) -> bool:
+        return self._watek is not None and self._watek.is_alive()
+
+    async def _czytaj(self):
+        self._petla = asyncio.get_running_loop()
+        self._zadanie = asyncio.current_task()
+        self._gotowy.set()
+        async for partia in self.zrodlo():
+            czas, wartosci, odrzucone = parsuj_rekordy(partia, self.bufor.kolumny)
+            self.odrzucone += odrzucone
+            if len(czas):
+                self.bufor.dopisz(czas, wartosci)
+
+    def _uruchom_petle(self):
+        try:
+            asyncio.run(self._czytaj())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.blad = f"{type(e).__name__}: {e}"
+        finally:
+            self._gotowy.set()
+
+    def uruchom(self) -> 'StrumienCzujnikow':
+        if not self.dziala:
+            self.blad = None
+            self._gotowy.clear()
+            self._watek = threading.Thread(target=self._uruchom_petle, name="strumien-czujnikow", daemon=True)
+            self._watek.start()
+            self._gotowy.wait(timeout=5.0)
+        return self
+
+    def zatrzymaj(self, limit_s: float = 5.0):
+        if self.dziala and self._petla is not None and self._zadanie is not None:
+            self._petla.call_soon_threadsafe(self._zadanie.cancel)
+            self._watek.join(timeout=limit_s)
+
+
+def katalog_czujnikow() -> Path:
+    '''Katalog pliku i gniazda czujników (KURS_KATALOG_CZUJNIKOW, domyślnie prywatny katalog w /tmp)'''
+    katalog = os.environ.get("KURS_KATALOG_CZUJNIKOW")
+    if katalog:
+        katalog = Path(katalog)
+        katalog.mkdir(parents=True, exist_ok=True)
+        return katalog
+    # Osobny katalog dla każdego użytkownika systemu; cudzego (podstawionego w /tmp) nie używamy
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    katalog = Path(tempfile.gettempdir()) / f"kurs_czujniki_{uid if uid is not None else os.getpid()}"
+    katalog.mkdir(mode=0o700, exist_ok=True)
+    if uid is not None and katalog.lstat().st_uid != uid:
+        raise PermissionError(f"Katalog {katalog} należy do innego użytkownika")
+    return katalog
+
+
+def sciezka_zrodla(rodzaj: str) -> Optional[Path]:
+    '''Stała ścieżka źródła ("plik", "gniazdo"); None dla brokera testowego'''
+    nazwa = {"plik": PLIK_CZUJNIKOW, "gniazdo": GNIAZDO_CZUJNIKOW}.get(rodzaj)
+    return katalog_czujnikow() / nazwa if nazwa else None
+
+
+# Tylko skonfigurowane źródła - rejestr strumieni ma najwyżej tyle wpisów, ile jest tu rodzajów
+ZRODLA: Dict[str, Zrodlo] = {
+    "test": zrodlo_testowe,
+    "plik": lambda: zrodlo_plik(sciezka_zrodla("plik")),
+    "gniazdo": lambda: zrodlo_gniazdo(sciezka_zrodla("gniazdo")),
+}
+
+_strumienie: Dict[str, StrumienCzujnikow] = {}
+_blokada = threading.Lock()
+
+
+def strumien(rodzaj: str = "test") -> StrumienCzujnikow:
+    '''Działający strumień dla źródła - jeden na proces serwera, wspólny dla wszystkich sesji'''
+    if rodzaj not in ZRODLA:
+        raise ValueError(f"Nieznane źródło odczytów: {rodzaj}")
+    with _blokada:
+        wynik = _strumienie.get(rodzaj)
+        if wynik is None:
+            wynik = _strumienie[rodzaj] = StrumienCzujnikow(ZRODLA[rodzaj])
+        # Źródło, które padło (np. zajęte gniazdo), uruchamiamy ponownie przy kolejnym użyciu
+        return wynik.uruchom()
+
+
+@atexit.register
+def zatrzymaj_strumienie():
+    with _blokada:
+        for wynik in _strumienie.values():
+            wynik.zatrzymaj(limit_s=1.0)
@@ -0,0 +1,93 @@
+import pandas as pd
+import streamlit as st
+
+from narzedzia.profiler_sql import ProfilerSQL
+from narzedzia.wyniki import BLAD, OK, POMINIETY, PORAZKA, WynikOceny
+
+KOMUNIKATY_STATUSU = {
+    "limit_czasu": "⏱️ **Przekroczono limit czasu.** Sprawdź, czy kod nie ma nieskończonej pętli.",
+    "limit_cpu": "⏱️ **Przekroczono limit czasu procesora.** Twój kod liczy zbyt długo.",
+    "limit_pamieci": "💾 **Przekroczono limit pamięci.** Twój kod tworzy zbyt duże struktury.",
+    "awaria": "💥 **Proces testowy zakończył się nieoczekiwanie.**",
+    "blad": "❌ **Błąd w kodzie** - testy nie zostały uruchomione.",
+    "odrzucone": "🚫 **Zgłoszenie odrzucone przed uruchomieniem testów:**",
+}
+
+IKONY_TESTOW = {OK: "✅", PORAZKA: "❌", BLAD: "💥", POMINIETY: "⏭️"}
+
+
+def pokaz_wynik_oceny(wynik: WynikOceny):
+    '''Wyświetla wynik oceniania zwrócony przez narzedzia.ocenianie'''
+    st.subheader("📊 **Wyniki testów:**")
+    if wynik.z_cache:
+        st.caption("♻️ Kod nie zmienił się od ostatniego uruchomienia - pokazuję zapamiętany wynik.")
+
+    if wynik.status != OK:
+        st.error(KOMUNIKATY_STATUSU.get(wynik.status, f"❌ Błąd: {wynik.status}"))
+        st.code(wynik.komunikat)
+        return
+
+    tabela = pd.DataFrame([{
+        "Status": IKONY_TESTOW.get(test.status, test.status),
+        "Test": test.nazwa,
+        "Klasa": test.klasa,
+        "Czas (ms)": round(test.czas_s * 1000, 1),
+        "Komunikat": test.komunikat,
+    } for test in wynik.testy])
+    st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+    for test in wynik.testy:
+        if test.status in (PORAZKA, BLAD):
+            with st.expander(f"{IKONY_TESTOW[test.status]} {test.nazwa}"):
+                ramki = [f"{r.plik}, linia {r.linia}, w {r.funkcja}\n    {r.kod}" for r in test.ramki]
+                st.code("\n".join(ramki + [test.komunikat]))
+
+    if wynik.wyjscie:
+        with st.expander("🖨️ Wyjście programu (print)"):
+            st.code(wynik.wyjscie)
+
+    if wynik.sukces:
+        st.balloons()
+        st.success(f"🎉 **Wszystkie testy przeszły!** ({wynik.uruchomione} testów, {wynik.czas_s:.2f} s)")
+    else:
+        st.error(f"❌ **Niektóre testy nie przeszły** "
+                 f"(porażki: {wynik.porazki}, błędy: {wynik.bledy}). Popraw kod i spróbuj ponownie.")
+
+
+def pokaz_profil_sql(profiler: ProfilerSQL, klucz: str = "profil_sql"):
+    '''Panel diagnostyki zapytań zebranych przez narzedzia.profiler_sql'''
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        profiler.prog_wolnych_ms = st.number_input("Próg wolnego zapytania (ms)", 0.0, 10_000.0,
+                                                   float(profiler.prog_wolnych_ms), key=f"{klucz}_prog")
+    with col2:
+        if st.button("🧹 Wyczyść pomiary", key=f"{klucz}_wyczysc"):
+            profiler.wyczysc()
+
+    raport = profiler.raport()
+    if raport.empty:
+        st.info("ℹ️ Brak zmierzonych zapytań")
+        return
+
+    skany = raport[raport["pelne_skany"] != ""]
+    if not skany.empty:
+        st.warning(f"⚠️ {len(skany)} zapytań czyta całe tabele (SCAN bez indeksu) - kandydaci na indeks")
+    st.dataframe(raport.round(2), use_container_width=True, hide_index=True)
+
+    wybrane = st.selectbox("Szczegóły zapytania:", raport["zapytanie"], key=f"{klucz}_zapytanie")
+    statystyka = profiler.statystyki.get(wybrane)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.bar_chart(profiler.histogram(wybrane).set_index("czas"))
+    with col2:
+        if statystyka is not None and statystyka.plan:
+            st.code("\n".join(statystyka.plan), language="text")
+        else:
+            st.caption("Brak planu (instrukcja bez EXPLAIN QUERY PLAN)")
+
+    st.markdown("**🐢 Wolne zapytania**")
+    wolne = profiler.dziennik_wolnych()
+    if wolne.empty:
+        st.caption(f"Żadne zapytanie nie przekroczyło {profiler.prog_wolnych_ms:g} ms")
+    else:
+        st.dataframe(wolne.round(2), use_container_width=True, hide_index=True)
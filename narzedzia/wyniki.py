@@ -0,0 +1,212 @@
+import json
+import time
+import traceback
+import unittest
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Statusy pojedynczego testu
+OK = "ok"
+PORAZKA = "porazka"
+BLAD = "blad"
+POMINIETY = "pominiety"
+
+
+@dataclass
+class RamkaTracebacku:
+    plik: str
+    linia: int
+    funkcja: str
+    kod: str = ""
+
+
+@dataclass
+class WynikTestu:
+    '''Wynik jednego testu: status, czas i (dla porażek) komunikat z ramkami'''
+    id: str
+    status: str
+    czas_s: float = 0.0
+    komunikat: str = ""
+    ramki: List[RamkaTracebacku] = field(default_factory=list)
+    # Zapisywane przy uruchomieniu testu - id podtestu może zawierać kropki, np. "T.test_a (x=0.5)"
+    klasa: str = ""
+    nazwa: str = ""
+
+    def __post_init__(self):
+        if not self.nazwa:
+            self.nazwa = self.id
+
+    @classmethod
+    def dla_testu(cls, test, status: str, **pola) -> 'WynikTestu':
+        klasa, nazwa = klasa_i_nazwa(test)
+        return cls(id=id_testu(test), status=status, klasa=klasa, nazwa=nazwa, **pola)
+
+    @classmethod
+    def from_dict(cls, dane: Dict[str, Any]) -> 'WynikTestu':
+        ramki = [RamkaTracebacku(**r) for r in dane.get("ramki", [])]
+        return cls(**{**dane, "ramki": ramki})
+
+
+@dataclass
+class WynikOceny:
+    '''Zwięzły wynik oceniania zgłoszenia, gotowy do serializacji i agregacji'''
+    status: str
+    testy: List[WynikTestu] = field(default_factory=list)
+    czas_s: float = 0.0
+    wyjscie: str = ""
+    komunikat: str = ""
+    z_cache: bool = False
+
+    @property
+    def uruchomione(self) -> int:
+        return sum(1 for t in self.testy if t.status != POMINIETY)
+
+    @property
+    def porazki(self) -> int:
+        return sum(1 for t in self.testy if t.status == PORAZKA)
+
+    @property
+    def bledy(self) -> int:
+        return sum(1 for t in self.testy if t.status == BLAD)
+
+    @property
+    def sukces(self) -> bool:
+        return self.status == OK and self.porazki == 0 and self.bledy == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        dane = asdict(self)
+        dane.pop("z_cache")
+        return dane
+
+    @classmethod
+    def from_dict(cls, dane: Dict[str, Any]) -> 'WynikOceny':
+        testy = [WynikTestu.from_dict(t) for t in dane.get("testy", [])]
+        return cls(**{**dane, "testy": testy})
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def to_junit_xml(self, nazwa_zestawu: str = "zgloszenie") -> str:
+        testy = self.testy
+        if self.status != OK:
+            # Zgłoszenie, które nie doszło do testów, raportujemy jako jeden błąd
+            testy = [WynikTestu(id=f"{nazwa_zestawu}.{self.status}", status=BLAD, czas_s=self.czas_s,
+                                komunikat=self.komunikat, klasa=nazwa_zestawu, nazwa=self.status)]
+
+        zestaw = ET.Element("testsuite", {
+            "name": nazwa_zestawu,
+            "tests": str(len(testy)),
+            "failures": str(sum(1 for t in testy if t.status == PORAZKA)),
+            "errors": str(sum(1 for t in testy if t.status == BLAD)),
+            "skipped": str(sum(1 for t in testy if t.status == POMINIETY)),
+            "time": f"{self.czas_s:.3f}",
+        })
+        for test in testy:
+            przypadek = ET.SubElement(zestaw, "testcase", {
+                "classname": test.klasa,
+                "name": test.nazwa,
+                "time": f"{test.czas_s:.3f}",
+            })
+            tag = {PORAZKA: "failure", BLAD: "error", POMINIETY: "skipped"}.get(test.status)
+            if tag:
+                element = ET.SubElement(przypadek, tag, {"message": test.komunikat})
+                element.text = "\n".join(f"{r.plik}:{r.linia} in {r.funkcja}: {r.kod}" for r in test.ramki)
+        if self.wyjscie:
+            ET.SubElement(zestaw, "system-out").text = self.wyjscie
+        return ET.tostring(zestaw, encoding="unicode")
+
+
+def _ramki(tb, zrodla: Dict[str, List[str]]) -> List[RamkaTracebacku]:
+    '''Tylko ramki z kodu studenta i testów - bez unittest, piaskownicy i serwera'''
+    ramki = []
+    while tb is not None:
+        kod = tb.tb_frame.f_code
+        if kod.co_filename in zrodla:
+            linie = zrodla[kod.co_filename]
+            tekst = linie[tb.tb_lineno - 1].strip() if 0 < tb.tb_lineno <= len(linie) else ""
+            ramki.append(RamkaTracebacku(kod.co_filename, tb.tb_lineno, kod.co_name, tekst))
+        tb = tb.tb_next
+    return ramki
+
+
+def opis_bledu(wyjatek: BaseException, zrodla: Dict[str, str]) -> str:
+    '''Opis wyjątku ograniczony do ramek z kodu studenta i testów (bez ramek serwera)'''
+    linie = {plik: kod.splitlines() for plik, kod in zrodla.items()}
+    ramki = _ramki(wyjatek.__traceback__, linie)
+    opis = [f"{r.plik}, linia {r.linia}, w {r.funkcja}\n    {r.kod}" for r in ramki]
+    opis.append("".join(traceback.format_exception_only(type(wyjatek), wyjatek)).rstrip())
+    return "\n".join(opis)
+
+
+class ZbieraczWynikow(unittest.TestResult):
+    '''TestResult zapisujący wyniki jako WynikTestu zamiast tekstu'''
+
+    def __init__(self, zrodla: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.zrodla = {plik: kod.splitlines() for plik, kod in (zrodla or {}).items()}
+        self.wyniki: List[WynikTestu] = []
+        self._start = 0.0
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._start = time.perf_counter()
+
+    def _dodaj(self, test, status: str, komunikat: str = "", err=None):
+        ramki = _ramki(err[2], self.zrodla) if err else []
+        self.wyniki.append(WynikTestu.dla_testu(
+            test,
+            status,
+            czas_s=time.perf_counter() - self._start,
+            komunikat=komunikat,
+            ramki=ramki,
+        ))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._dodaj(test, OK)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._dodaj(test, PORAZKA, str(err[1]), err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        komunikat = "".join(traceback.format_exception_only(err[0], err[1])).strip()
+        self._dodaj(test, BLAD, komunikat, err)
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                self._dodaj(subtest, PORAZKA, str(err[1]), err)
+            else:
+                komunikat = "".join(traceback.format_exception_only(err[0], err[1])).strip()
+                self._dodaj(subtest, BLAD, komunikat, err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._dodaj(test, POMINIETY, reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._dodaj(test, OK, "oczekiwana porażka")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._dodaj(test, PORAZKA, "nieoczekiwany sukces")
+
+
+def id_testu(test) -> str:
+    # test.id() dla klas z exec() zaczyna się od nazwy modułu przestrzeni ("zgloszenie.")
+    return test.id().split(".", 1)[-1] if isinstance(test, unittest.TestCase) else str(test)
+
+
+def klasa_i_nazwa(test) -> Tuple[str, str]:
+    '''Klasa i metoda testu (podtest: metoda z opisem parametrów) - wprost z obiektu, bez parsowania id'''
+    rodzic = getattr(test, "test_case", None)
+    if isinstance(rodzic, unittest.TestCase):
+        return type(rodzic).__qualname__, f"{rodzic._testMethodName} {test._subDescription()}"
+    if isinstance(test, unittest.TestCase):
+        return type(test).__qualname__, test._testMethodName
+    return "", str(test)
@@ -0,0 +1,130 @@
+import re
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+# Tabela -> (indeks FTS5, indeksowana kolumna); indeksy są "external content" - tekst zostaje w tabeli
+INDEKSY: Dict[str, Tuple[str, str]] = {
+    "pola": ("pola_fts", "nazwa"),
+    "zabiegi": ("zabiegi_fts", "opis"),
+}
+
+# remove_diacritics 2: "zyto" znajdzie "żyto" ("ł" nie rozkłada się w Unicode, więc zostaje bez zmian)
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def sql_indeksu(tabela: str, indeks: str, kolumna: str) -> str:
+    '''Indeks FTS5 nad kolumną tabeli i triggery utrzymujące go przy INSERT/UPDATE/DELETE'''
+    return f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {indeks} USING fts5(
+        {kolumna}, content='{tabela}', content_rowid='id', tokenize='{TOKENIZER}'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS {indeks}_po_dodaniu AFTER INSERT ON {tabela}
+    BEGIN
+        INSERT INTO {indeks} (rowid, {kolumna}) VALUES (NEW.id, NEW.{kolumna});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {indeks}_po_usunieciu AFTER DELETE ON {tabela}
+    BEGIN
+        INSERT INTO {indeks} ({indeks}, rowid, {kolumna}) VALUES ('delete', OLD.id, OLD.{kolumna});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS {indeks}_po_zmianie AFTER UPDATE OF {kolumna} ON {tabela}
+    BEGIN
+        INSERT INTO {indeks} ({indeks}, rowid, {kolumna}) VALUES ('delete', OLD.id, OLD.{kolumna});
+        INSERT INTO {indeks} (rowid, {kolumna}) VALUES (NEW.id, NEW.{kolumna});
+    END;
+    """
+
+
+def fts5_dostepne(conn: sqlite3.Connection) -> bool:
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def utworz_indeksy(conn: sqlite3.Connection) -> bool:
+    '''Tworzy brakujące indeksy FTS5 (i wypełnia je istniejącymi danymi); False gdy SQLite nie ma FTS5'''
+    if not fts5_dostepne(conn):
+        return False
+    istniejace = {wiersz[0] for wiersz in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for tabela, (indeks, kolumna) in INDEKSY.items():
+        if tabela not in istniejace:
+            continue
+        conn.executescript(sql_indeksu(tabela, indeks, kolumna))
+        if indeks not in istniejace:
+            with conn:
+                conn.execute(f"INSERT INTO {indeks} ({indeks}) VALUES ('rebuild')")
+    return True
+
+
+@contextmanager
+def indeksuj_po_wstawieniu(conn: sqlite3.Connection, tabela: str):
+    '''Masowy INSERT bez triggera FTS: nowe wiersze trafiają do indeksu jednym zapytaniem na końcu
+
+    Trigger i indeks są odtwarzane także przy błędzie w bloku - wiersze, które zostały w tabeli,
+    trafiają do indeksu, a ROLLBACK wywołującego cofa wszystko razem.
+    '''
+    indeks, kolumna = INDEKSY[tabela]
+    trigger = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                           (f"{indeks}_po_dodaniu",)).fetchone()
+    if trigger is None:
+        yield
+        return
+    ostatnie_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+    conn.execute(f"DROP TRIGGER {indeks}_po_dodaniu")
+    try:
+        yield
+    finally:
+        conn.execute(f"INSERT INTO {indeks} (rowid, {kolumna}) SELECT id, {kolumna} FROM {tabela} WHERE id > ?",
+                     (ostatnie_id,))
+        conn.execute(trigger[0])
+
+
+def zapytanie_fts(tekst: str) -> str:
+    '''Zamienia tekst z pola wyszukiwania na bezpieczne zapytanie FTS5 (wszystkie słowa, jako prefiksy)'''
+    slowa = re.findall(r"\w+", tekst)
+    return " ".join(f'"{slowo}"*' for slowo in slowa)
+
+
+@dataclass
+class Trafienie:
+    zrodlo: str  # "pole" albo "zabieg"
+    id: int
+    pole_id: int
+    pole: str
+    fragment: str
+    ocena: float  # bm25 - im mniejsza, tym lepsze dopasowanie
+
+
+def szukaj(conn: sqlite3.Connection, tekst: str, limit: int = 20,
+           znaczniki: Tuple[str, str] = ("**", "**")) -> List[Trafienie]:
+    '''Wyszukuje w nazwach pól i opisach zabiegów; wyniki uporządkowane wg bm25 z fragmentem tekstu'''
+    zapytanie = zapytanie_fts(tekst)
+    if not zapytanie:
+        return []
+    poczatek, koniec = znaczniki
+    wiersze = conn.execute("""
+        SELECT * FROM (
+            SELECT 'pole', pola.id, pola.id, pola.nazwa,
+                   snippet(pola_fts, 0, ?, ?, '…', 12), bm25(pola_fts) AS ocena
+            FROM pola_fts JOIN pola ON pola.id = pola_fts.rowid
+            WHERE pola_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        )
+        UNION ALL
+        SELECT * FROM (
+            SELECT 'zabieg', zabiegi.id, pola.id, pola.nazwa,
+                   snippet(zabiegi_fts, 0, ?, ?, '…', 12), bm25(zabiegi_fts) AS ocena
+            FROM zabiegi_fts
+            JOIN zabiegi ON zabiegi.id = zabiegi_fts.rowid
+            JOIN pola ON pola.id = zabiegi.pole_id
+            WHERE zabiegi_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        )
+        ORDER BY ocena
+        LIMIT ?
+    """, (poczatek, koniec, zapytanie, limit, poczatek, koniec, zapytanie, limit, limit)).fetchall()
+    return [Trafienie(*wiersz) for wiersz in wiersze]
@@ -0,0 +1,48 @@
+import unittest
+
+from narzedzia.cache_ocen import CacheOcen
+from narzedzia.piaskownica import Limity, PulaOceniania, resource
+
+TESTY_PETLA = '''
+import unittest
+class T(unittest.TestCase):
+    def test_petla(self):
+        while True:
+            pass
+    def test_szybki(self):
+        pass
+'''
+
+
+@unittest.skipIf(resource is None, "brak limitów CPU na tej platformie")
+class TestLimitCPU(unittest.TestCase):
+    '''Pętla w metodzie testowej kończy zadanie statusem limit_cpu, a nie błędem jednego testu'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pula = PulaOceniania(liczba_pracownikow=2, limity=Limity(cpu_s=1, czas_s=10))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pula.zamknij()
+
+    def _sprawdz(self, wynik):
+        self.assertEqual(wynik.status, "limit_cpu")
+        self.assertNotIn("PrzekroczonyLimitCPU", wynik.komunikat)
+        self.assertFalse(wynik.sukces)
+        cache = CacheOcen()
+        klucz = cache.klucz("test", "x = 1", TESTY_PETLA)
+        cache.zapisz(klucz, wynik)
+        self.assertIsNone(cache.pobierz(klucz))
+
+    def test_sekwencyjnie(self):
+        self._sprawdz(self.pula.ocen("x = 1", TESTY_PETLA))
+
+    def test_rownolegle(self):
+        wynik = self.pula.ocen_rownolegle("x = 1", TESTY_PETLA)
+        self._sprawdz(wynik)
+        self.assertEqual({t.nazwa: t.status for t in wynik.testy}, {"test_petla": "blad", "test_szybki": "ok"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from narzedzia.baza_rolnicza import BazaDanychRolnicza, PoleModel
+from narzedzia.pula_polaczen import PulaPolaczen
+
+
+class TestPulaPolaczen(unittest.TestCase):
+    '''Więcej wątków niż czytelników: wszystkie odczyty kończą się sukcesem, bez nowych połączeń ponad limit'''
+
+    def setUp(self):
+        self.katalog = tempfile.TemporaryDirectory()
+        self.sciezka = Path(self.katalog.name) / "test.db"
+
+    def tearDown(self):
+        self.katalog.cleanup()
+
+    def _w_watkach(self, funkcja, liczba: int):
+        bledy, wyniki = [], []
+
+        def uruchom():
+            try:
+                wyniki.append(funkcja())
+            except BaseException as e:
+                bledy.append(e)
+
+        watki = [threading.Thread(target=uruchom) for _ in range(liczba)]
+        for watek in watki:
+            watek.start()
+        for watek in watki:
+            watek.join()
+        return wyniki, bledy
+
+    def test_czytelnicy_czekaja_zamiast_bledu(self):
+        pula = PulaPolaczen(self.sciezka, czytelnicy=2, limit_oczekiwania_s=0.1)
+        with pula.pisarz() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            conn.execute("INSERT INTO t VALUES (1)")
+
+        def odczyt():
+            with pula.czytelnik() as conn:
+                time.sleep(0.2)  # dłużej niż limit_oczekiwania_s - dawniej kończyło się TimeoutError
+                return conn.execute("SELECT x FROM t").fetchone()[0]
+
+        wyniki, bledy = self._w_watkach(odczyt, 8)
+        pula.zamknij()
+        self.assertEqual(bledy, [])
+        self.assertEqual(wyniki, [1] * 8)
+
+    def test_rozmiar_puli_z_bazy(self):
+        baza = BazaDanychRolnicza(str(self.sciezka), czytelnicy=2)
+        baza.zainicjalizuj_baze()
+        baza.dodaj_pola_bulk([PoleModel(nazwa="A", powierzchnia=1.0, gleba="ilasta", plon=5.0)])
+
+        wyniki, bledy = self._w_watkach(lambda: len(baza.znajdz_pola({'gleba': 'ilasta'})), 8)
+        otwarte = len(baza.pula._wszyscy)
+        baza.zamknij()
+        self.assertEqual(bledy, [])
+        self.assertEqual(wyniki, [1] * 8)
+        self.assertLessEqual(otwarte, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()